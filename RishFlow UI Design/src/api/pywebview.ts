@@ -5,20 +5,83 @@
 
 interface PyWebViewAPI {
   browse_folder: (title: string) => Promise<string | { error: string }>;
-  start_organizing: (source: string, dest: string, mode: string, categories: any[]) => Promise<any>;
-  scan_source: (folder: string) => Promise<any>;
+  start_organizing: (source: string, dest: string, mode: string, categories: any[], skipIdentical?: boolean) => Promise<any>;
+  scan_source: (folder: string, compact?: boolean) => Promise<any>;
   get_logs: () => Promise<any>;
   get_folder_stats: (folder: string) => Promise<any>;
   find_duplicates: (folder: string) => Promise<any>;
   revert_last: () => Promise<any>;
-  query_ai: (folder: string, query: string) => Promise<any>;
+  query_ai: (folder: string, query: string, mode?: 'keyword' | 'semantic') => Promise<any>;
   start_index_for_ai: (folder: string) => Promise<any>;
   get_ai_index_status: () => Promise<any>;
   index_for_ai: (folder: string) => Promise<any>;
-  scan_organized_files: (rootPath: string) => Promise<any>;
+  scan_organized_files: (rootPath: string, compact?: boolean) => Promise<any>;
   save_state: (key: string, value: any) => Promise<any>;
   load_state: (key: string) => Promise<any>;
   clear_activity_logs: () => Promise<any>;
+  get_move_throughput: () => Promise<any>;
+  resume_organizing: (jobId: string) => Promise<any>;
+  get_organize_status: (jobId?: string) => Promise<any>;
+  list_organize_jobs: () => Promise<any>;
+  get_organize_progress: () => Promise<any>;
+  list_jobs: (includeFinished?: boolean) => Promise<any>;
+  cancel_job: (jobId: string) => Promise<any>;
+  pause_job: (jobId: string) => Promise<any>;
+  resume_job: (jobId: string) => Promise<any>;
+  set_job_priority: (jobId: string, priority: number) => Promise<any>;
+  get_scheduler_status: () => Promise<any>;
+  set_scheduler_config: (config: any) => Promise<any>;
+  get_perf_summary: () => Promise<any>;
+  set_instrumentation: (enabled: boolean) => Promise<any>;
+  reset_perf_stats: () => Promise<any>;
+  profile_next_job: (kind?: string | null, mode?: 'cprofile' | 'sample') => Promise<any>;
+  get_profile_captures: () => Promise<any>;
+  get_file_rules: () => Promise<any>;
+  set_file_rules: (rules: any[]) => Promise<any>;
+  index_names: (root_path?: string | null) => Promise<any>;
+  search_files: (query: string, limit?: number, root_path?: string | null) => Promise<any>;
+  browse_files: (rootPath: string, sortBy?: string, descending?: boolean, filters?: CatalogFilters | null,
+                 offset?: number, limit?: number, refresh?: boolean) => Promise<any>;
+  get_thumbnails: (paths: string[], size?: number) => Promise<any>;
+  get_thumbnail: (path: string, size?: number) => Promise<any>;
+  dedupe_files: (folder?: string | null, groups?: any[] | null, action?: DedupeAction, keep?: 'first' | 'oldest' | 'shortest',
+                 quarantineDir?: string | null, batchSize?: number) => Promise<any>;
+  revert_dedupe: () => Promise<any>;
+  get_media_metadata: (paths: string[]) => Promise<any>;
+  inspect_archive: (path: string) => Promise<any>;
+}
+
+export type DedupeAction = 'auto' | 'reflink' | 'hardlink' | 'quarantine';
+
+export interface CatalogFilters {
+  types?: string[];
+  categories?: string[];
+  min_size?: number;
+  max_size?: number;
+  modified_after?: number;
+  modified_before?: number;
+  name_contains?: string;
+  under?: string;
+}
+
+/** Columnar payload from file_catalog.py (scan_*(..., compact=true), browse_files) */
+export interface CatalogWire {
+  format: 'rishflow-catalog/1';
+  count: number;
+  names: string[];
+  dirs: string[];
+  types: string[];
+  categories: string[];
+  columns: Record<'size' | 'modified' | 'dir' | 'type' | 'category', { dtype: string; data: string }>;
+}
+
+export interface FileRecord {
+  name: string;
+  path: string;
+  size: number;
+  modified: number;
+  type: string;
+  category?: string;
 }
 
 declare global {
@@ -103,14 +166,15 @@ export class PythonAPIClient {
     return result;
   }
 
-  async startOrganizing(source: string, dest: string, mode: string, categories: any[] = []): Promise<any> {
+  async startOrganizing(source: string, dest: string, mode: string, categories: any[] = [],
+                        skipIdentical: boolean = false): Promise<any> {
     if (!this.api) throw new Error('Python API not available');
-    return this.api.start_organizing(source, dest, mode, categories);
+    return this.api.start_organizing(source, dest, mode, categories, skipIdentical);
   }
 
-  async scanSource(folder: string): Promise<any> {
+  async scanSource(folder: string, compact: boolean = false): Promise<any> {
     if (!this.api) throw new Error('Python API not available');
-    return this.api.scan_source(folder);
+    return this.api.scan_source(folder, compact);
   }
 
   async getLogs(): Promise<any> {
@@ -133,9 +197,20 @@ export class PythonAPIClient {
     return this.api.revert_last();
   }
 
-  async queryAI(folder: string, query: string): Promise<any> {
+  async dedupeFiles(folder: string | null, groups: any[] | null = null, action: DedupeAction = 'auto',
+                    keep: 'first' | 'oldest' | 'shortest' = 'first'): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.dedupe_files(folder, groups, action, keep);
+  }
+
+  async revertDedupe(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.revert_dedupe();
+  }
+
+  async queryAI(folder: string, query: string, mode: 'keyword' | 'semantic' = 'keyword'): Promise<any> {
     if (!this.api) throw new Error('Python API not available');
-    return this.api.query_ai(folder, query);
+    return this.api.query_ai(folder, query, mode);
   }
 
   async startIndexForAI(folder: string): Promise<any> {
@@ -153,9 +228,37 @@ export class PythonAPIClient {
     return this.api.index_for_ai(folder);
   }
 
-  async scanOrganizedFiles(rootPath: string): Promise<any> {
+  async scanOrganizedFiles(rootPath: string, compact: boolean = false): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.scan_organized_files(rootPath, compact);
+  }
+
+  async browseFiles(rootPath: string, sortBy: string = 'name', descending: boolean = false,
+                    filters: CatalogFilters | null = null, offset: number = 0, limit: number = 500,
+                    refresh: boolean = false): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.browse_files(rootPath, sortBy, descending, filters, offset, limit, refresh);
+  }
+
+  /** Cached thumbnails as names under base_url; pending ones arrive via window.onThumbnailReady(path, name) */
+  async getThumbnails(paths: string[], size: number = 256): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_thumbnails(paths, size);
+  }
+
+  async getThumbnail(path: string, size: number = 256): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_thumbnail(path, size);
+  }
+
+  async getMediaMetadata(paths: string[]): Promise<any> {
     if (!this.api) throw new Error('Python API not available');
-    return this.api.scan_organized_files(rootPath);
+    return this.api.get_media_metadata(paths);
+  }
+
+  async inspectArchive(path: string): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.inspect_archive(path);
   }
 
   async saveState(key: string, value: any): Promise<any> {
@@ -172,6 +275,145 @@ export class PythonAPIClient {
     if (!this.api) throw new Error('Python API not available');
     return this.api.clear_activity_logs();
   }
+
+  async getMoveThroughput(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_move_throughput();
+  }
+
+  async resumeOrganizing(jobId: string): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.resume_organizing(jobId);
+  }
+
+  async getOrganizeStatus(jobId?: string): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_organize_status(jobId);
+  }
+
+  async listOrganizeJobs(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.list_organize_jobs();
+  }
+
+  async getOrganizeProgress(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_organize_progress();
+  }
+
+  async listJobs(includeFinished = true): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.list_jobs(includeFinished);
+  }
+
+  async cancelJob(jobId: string): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.cancel_job(jobId);
+  }
+
+  async pauseJob(jobId: string): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.pause_job(jobId);
+  }
+
+  async resumeJob(jobId: string): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.resume_job(jobId);
+  }
+
+  async setJobPriority(jobId: string, priority: number): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.set_job_priority(jobId, priority);
+  }
+
+  async getSchedulerStatus(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_scheduler_status();
+  }
+
+  async setSchedulerConfig(config: any): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.set_scheduler_config(config);
+  }
+
+  async getPerfSummary(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_perf_summary();
+  }
+
+  async setInstrumentation(enabled: boolean): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.set_instrumentation(enabled);
+  }
+
+  async resetPerfStats(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.reset_perf_stats();
+  }
+
+  async profileNextJob(kind: string | null = null, mode: 'cprofile' | 'sample' = 'cprofile'): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.profile_next_job(kind, mode);
+  }
+
+  async getProfileCaptures(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_profile_captures();
+  }
+
+  async getFileRules(): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.get_file_rules();
+  }
+
+  async setFileRules(rules: any[]): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.set_file_rules(rules);
+  }
+
+  async indexNames(rootPath: string | null = null): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.index_names(rootPath);
+  }
+
+  async searchFiles(query: string, limit: number = 50, rootPath: string | null = null): Promise<any> {
+    if (!this.api) throw new Error('Python API not available');
+    return this.api.search_files(query, limit, rootPath);
+  }
+}
+
+function decodeColumn(col: { dtype: string; data: string }): ArrayLike<number> {
+  const raw = atob(col.data);
+  const bytes = new Uint8Array(raw.length);
+  for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+  switch (col.dtype) {
+    case '<f8': return new Float64Array(bytes.buffer);
+    case '<u4': return new Uint32Array(bytes.buffer);
+    case '<i8': return Array.from(new BigInt64Array(bytes.buffer), Number);
+    default: throw new Error(`Unsupported catalog column type ${col.dtype}`);
+  }
+}
+
+/** Expand a compact catalog payload into per-file records */
+export function decodeCatalog(wire: CatalogWire): FileRecord[] {
+  const size = decodeColumn(wire.columns.size);
+  const modified = decodeColumn(wire.columns.modified);
+  const dir = decodeColumn(wire.columns.dir);
+  const type = decodeColumn(wire.columns.type);
+  const category = decodeColumn(wire.columns.category);
+  const sep = wire.dirs.some((d) => d.includes('\\')) ? '\\' : '/';
+  return wire.names.map((name, i) => {
+    const parent = wire.dirs[dir[i]];
+    const record: FileRecord = {
+      name,
+      path: parent.endsWith(sep) ? parent + name : parent + sep + name,
+      size: size[i],
+      modified: modified[i],
+      type: wire.types[type[i]],
+    };
+    if (wire.categories[category[i]]) record.category = wire.categories[category[i]];
+    return record;
+  });
 }
 
 // Export a singleton instance
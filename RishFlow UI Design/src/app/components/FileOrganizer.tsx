@@ -466,6 +466,10 @@ export function FileOrganizer({ onPreviewFile }: FileOrganizerProps) {
                   <option>File Name</option>
                   <option>Date Modified</option>
                   <option>Size Category</option>
+                  <option>Capture Date</option>
+                  <option>Camera Model</option>
+                  <option>Resolution</option>
+                  <option>Duration</option>
                   <option>AI-based Content</option>
                 </select>
                 <p className="text-xs text-muted-foreground mt-1">Choose how files will be organized</p>
@@ -2,51 +2,260 @@
 RishFlow v2.0 - AI Smart File Sorter
 Advanced classification using Computer Vision + OCR + Rules
 100% Python 3.13 compatible - No ML dependencies
+
+OpenCV and NumPy are imported on first use, so importing this module (and app.py)
+stays cheap for users who never run AI sorting. OCR goes through ocr_service;
+document text comes from doc_text (embedded text first, OCR only for scanned PDFs).
 """
 
-import cv2
-import numpy as np
 import os
-import pytesseract
-from PIL import Image, ImageEnhance
 from pathlib import Path
 from datetime import datetime
 import hashlib
 import re
 from collections import defaultdict
 
+from instrumentation import span, timed
+from rule_engine import get_rules
+from content_sniffer import sniff, sniff_many, type_for_mime
+from media_metadata import get_media_metadata, safe_name
+
 class AISmartSorter:
-    def __init__(self):
-        # Load OpenCV cascades for face/screenshot detection
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.profile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_profileface.xml')
+    def __init__(self, stage_timer=None, ocr=None, rules=None):
+        # OpenCV cascades for face/screenshot detection are loaded on first image
+        self._face_cascade = None
+        self._profile_cascade = None
+        # Optional stage_timer(name) context manager used by job progress to time OCR separately
+        self.stage_timer = stage_timer
+        # OCR goes through the shared batched/cached service unless one is injected
+        self._ocr = ocr
+        self._doc_text = None
+        # extension/name rules (rule_engine); the shared engine holds the user's rules
+        self.rules = rules or get_rules()
+
+    @property
+    def face_cascade(self):
+        if self._face_cascade is None:
+            import cv2
+            with span('sorter.model_load'):
+                self._face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        return self._face_cascade
+
+    @property
+    def profile_cascade(self):
+        if self._profile_cascade is None:
+            import cv2
+            with span('sorter.model_load'):
+                self._profile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_profileface.xml')
+        return self._profile_cascade
+
+    @property
+    def ocr(self):
+        if self._ocr is None:
+            from ocr_service import get_ocr_service
+            self._ocr = get_ocr_service()
+        return self._ocr
+
+    @property
+    def doc_text(self):
+        if self._doc_text is None:
+            from doc_text import DocumentText
+            self._doc_text = DocumentText(ocr=self._ocr)
+        return self._doc_text
+
+    def _stage(self, name):
+        # progress stage (when run in a job) + instrumentation span; both are no-ops when off
+        return span(f'sorter.{name}', self.stage_timer(name) if self.stage_timer else None)
         
-    def classify_file(self, file_path):
-        """Main classification entry point - returns folder path"""
+    @timed('sorter.classify_file')
+    def classify_file(self, file_path, mime=None):
+        """Main classification entry point - returns folder path.
+        mime: an already-sniffed content type (sniffed here when needed and not given)"""
         file_path = Path(file_path)
-        ext = file_path.suffix.lower()
-        
-        # Extension-based quick classification
-        if ext in self.IMAGE_EXTS:
-            return self.classify_image(file_path)
-        elif ext in self.DOC_EXTS:
-            return self.classify_document(file_path)
-        elif ext in self.CODE_EXTS:
-            return self.classify_code(file_path)
-        elif ext in self.VIDEO_EXTS:
-            return 'Videos'
-        elif ext in self.AUDIO_EXTS:
-            return 'Audio'
-        elif ext in self.ARCHIVE_EXTS:
-            return 'Archives'
-        elif ext in self.EXECUTABLE_EXTS:
-            return 'Executables'
-        else:
-            return self.classify_generic(file_path)
-    
+        rule = self.rules.match(file_path.name, str(file_path))
+        if self._needs_sniff(rule):
+            if mime is None:
+                with span('sorter.sniff'):
+                    mime = sniff(str(file_path))
+            rule = self._retarget(rule, mime)
+        return self._classify_routed(file_path, rule)
+
+    def _classify_routed(self, file_path, rule):
+        handler = self._handler(rule)
+        if handler is not None:
+            return getattr(self, handler)(file_path)
+        if rule is not None and rule.folder:
+            return rule.folder
+        return self.classify_generic(file_path)
+
+    def _handler(self, rule):
+        """Content classifier for a matched rule; a user rule with its own folder skips analysis"""
+        if rule is None or (rule.user and rule.folder):
+            return None
+        return self.HANDLERS.get(rule.type)
+
+    def _needs_sniff(self, rule):
+        # unknown/missing extensions, and built-in rules that lead to image/document analysis
+        return rule is None or (not rule.user and rule.type in self.SNIFF_TYPES)
+
+    def _retarget(self, rule, mime):
+        """Rule after checking the file's content: extension-less files get the rule for what
+        they are, mislabeled files are re-routed, and binaries skip image/document analysis"""
+        if mime is None:
+            return rule            # unreadable: the handlers report it as before
+        kind = type_for_mime(mime)
+        if rule is not None and (kind == rule.type or kind == 'code'):
+            return rule            # consistent (.txt holding XML/HTML stays a document)
+        if rule is not None and rule.type == 'document' and mime == 'application/zip':
+            return rule            # zip-container document (.docx/.odt/.epub) the sniffer couldn't place
+        if kind == 'other':
+            return None
+        return self.rules.builtin_for(kind)
+
+    @timed('sorter.classify_files')
+    def classify_files(self, paths, batch_size=16):
+        """Batch form of classify_file: returns one folder path per input path, in order.
+        Headers are sniffed in parallel up front; images go through classify_image_batch and
+        everything else is classified per file."""
+        paths = [Path(p) for p in paths]
+        rules = [self.rules.match(p.name, str(p)) for p in paths]
+        need = [i for i, r in enumerate(rules) if self._needs_sniff(r)]
+        with span('sorter.sniff'):
+            mimes = sniff_many([str(paths[i]) for i in need])
+        for i, mime in zip(need, mimes):
+            rules[i] = self._retarget(rules[i], mime)
+
+        results = [None] * len(paths)
+        images = []
+        for i, (p, rule) in enumerate(zip(paths, rules)):
+            if self._handler(rule) == 'classify_image':
+                images.append(i)
+            else:
+                results[i] = self._classify_routed(p, rule)
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            for i, folder in zip(chunk, self.classify_image_batch([paths[i] for i in chunk])):
+                results[i] = folder
+        return results
+
+    def _decode_reduced(self, path):
+        """Image decoded at 1/2, 1/4 or 1/8 scale (DCT scaling for JPEG) so that its long side
+        stays at least BATCH_SIDE; returns (image or None, factor). Dimensions come from the
+        header, so the full-size image is never held for large photos. A file that cannot be
+        read or decoded gives (None, 1), so only that image lands in Images/Others."""
+        import cv2
+        try:
+            meta = get_media_metadata().read(str(path))
+            side = max(meta.get('width') or 0, meta.get('height') or 0)
+            factor = 1
+            while factor < 8 and side // (factor * 2) >= self.BATCH_SIDE:
+                factor *= 2
+            flag = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                    4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}[factor]
+            return cv2.imread(str(path), flag), factor
+        except Exception as e:
+            print(f"[classify_image_batch] Could not decode {path}: {e}")
+            return None, 1
+
+    @timed('sorter.classify_image_batch')
+    def classify_image_batch(self, image_paths):
+        """classify_image over many images, with the same features.
+        Large images are decoded at reduced size (_decode_reduced); the screenshot edge-density
+        threshold is scaled by EDGE_DENSITY_GAIN for the factor used, since Canny finds denser
+        edges in a downscaled image. Images of the same size are stacked into mosaics of at most
+        MAX_MOSAIC_BYTES, so grayscale, Canny and HSV run once per mosaic and edge density /
+        saturation are array reductions over the stack. Face cascades run on a copy reduced to
+        CASCADE_SIDE, and the images that are neither faces nor screenshots are OCR'd as one batch."""
+        import cv2
+        import numpy as np
+        image_paths = [Path(p) for p in image_paths]
+        results = ['Images/Others'] * len(image_paths)
+
+        with span('sorter.batch_decode'):
+            decoded = [self._decode_reduced(p) for p in image_paths]
+        imgs = [img for img, _ in decoded]
+        ok = [i for i, img in enumerate(imgs) if img is not None]
+        if not ok:
+            return results
+
+        edge_density = np.zeros(len(ok))
+        edge_threshold = np.array([0.08 * self.EDGE_DENSITY_GAIN[decoded[i][1]] for i in ok])
+        saturation = np.zeros(len(ok))
+        grays = [None] * len(ok)
+        groups = defaultdict(list)
+        for k, i in enumerate(ok):
+            groups[imgs[i].shape].append(k)
+        pad = 2
+        with span('sorter.batch_features'):
+            for (h, w, _), same in groups.items():
+                per_mosaic = max(1, self.MAX_MOSAIC_BYTES // ((h + 2 * pad) * w * 3))
+                for start in range(0, len(same), per_mosaic):
+                    ks = same[start:start + per_mosaic]
+                    # replicate-padded rows between tiles: no gradients across the seams
+                    mosaic = np.vstack([cv2.copyMakeBorder(imgs[ok[k]], pad, pad, 0, 0, cv2.BORDER_REPLICATE)
+                                        for k in ks])
+                    gray = cv2.cvtColor(mosaic, cv2.COLOR_BGR2GRAY)
+                    edges = cv2.Canny(gray, 100, 200).reshape(len(ks), h + 2 * pad, w)[:, pad:-pad]
+                    edge_density[ks] = (edges > 0).mean(axis=(1, 2))
+                    sat = cv2.cvtColor(mosaic, cv2.COLOR_BGR2HSV)[:, :, 1].reshape(len(ks), h + 2 * pad, w)
+                    saturation[ks] = sat[:, pad:-pad].mean(axis=(1, 2))
+                    gray = gray.reshape(len(ks), h + 2 * pad, w)
+                    for j, k in enumerate(ks):
+                        grays[k] = gray[j, pad:-pad]
+                    del mosaic, edges, sat
+        imgs = decoded = None       # only the grayscale copies are needed from here on
+
+        # faces: one cascade call per image, on a reduced copy
+        faces = np.zeros(len(ok), dtype=bool)
+        with span('sorter.cascade'):
+            for k, g in enumerate(grays):
+                scale = self.CASCADE_SIDE / max(g.shape)
+                small = cv2.resize(g, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else g
+                faces[k] = (len(self.face_cascade.detectMultiScale(small, 1.1, 4)) > 0
+                            or len(self.profile_cascade.detectMultiScale(small, 1.1, 4)) > 0)
+
+        screenshot = ~faces & (edge_density > edge_threshold)
+        needs_ocr = ~faces & ~screenshot
+
+        # text density for the rest, as one OCR batch (long side still >= BATCH_SIDE)
+        text_score = np.zeros(len(ok))
+        ocr_idx = np.flatnonzero(needs_ocr)
+        if len(ocr_idx):
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            with self._stage('ocr'):
+                datas = self.ocr.batch([clahe.apply(grays[k]) for k in ocr_idx], kind='data', psm=3)
+            for k, data in zip(ocr_idx, datas):
+                if isinstance(data, Exception):
+                    text_score[k] = np.nan    # classify_image would land in Images/Others
+                    continue
+                confs = np.array([int(c) for c in data['conf']], dtype=np.int64)
+                text_score[k] = (confs > 30).sum() / max(len(data['text']), 1)
+
+        receipt = needs_ocr & (text_score > 0.15)
+        meme = needs_ocr & ~receipt & (saturation > 80) & (text_score > 0.05)
+        today = datetime.now().strftime("%Y/%m/%d")
+        for k, i in enumerate(ok):
+            stem = image_paths[i].stem
+            if faces[k]:
+                results[i] = f'Images/Family/{stem[:20]}'
+            elif screenshot[k]:
+                results[i] = 'Images/Screenshots'
+            elif np.isnan(text_score[k]):
+                results[i] = 'Images/Others'
+            elif receipt[k]:
+                results[i] = f'Images/Receipts/{today}_{stem}'
+            elif meme[k]:
+                results[i] = 'Images/Memes'
+            else:
+                results[i] = 'Images/Photos'
+        return results
+
+    @timed('sorter.classify_image')
     def classify_image(self, image_path):
         """AI-powered image classification"""
         try:
+            import cv2
+            import numpy as np
             img = cv2.imread(str(image_path))
             if img is None:
                 return 'Images/Others'
@@ -54,8 +263,9 @@ class AISmartSorter:
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             
             # 1. FACE DETECTION → Family Photos
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-            profiles = self.profile_cascade.detectMultiScale(gray, 1.1, 4)
+            with span('sorter.cascade'):
+                faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+                profiles = self.profile_cascade.detectMultiScale(gray, 1.1, 4)
             
             if len(faces) > 0 or len(profiles) > 0:
                 return f'Images/Family/{image_path.stem[:20]}'  # Truncate long names
@@ -81,14 +291,12 @@ class AISmartSorter:
         except Exception:
             return 'Images/Others'
     
+    @timed('sorter.classify_document')
     def classify_document(self, doc_path):
-        """OCR-powered document classification"""
+        """Keyword classification of the document's first pages (embedded text, OCR for scans)"""
         try:
-            # Quick OCR for receipts/invoices
-            text = pytesseract.image_to_string(
-                Image.open(doc_path), 
-                config='--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz .,-/()'
-            )
+            with self._stage('text'):
+                text = self.doc_text.text(str(doc_path))
             
             text_lower = text.lower()
             
@@ -118,6 +326,24 @@ class AISmartSorter:
         except Exception:
             return f'Code/{code_path.stem}'
     
+    def classify_video(self, video_path):
+        """Videos by capture year (mvhd creation time), read from the container header"""
+        meta = get_media_metadata().read(str(video_path))
+        if meta.get('captured'):
+            return f"Videos/{datetime.fromtimestamp(meta['captured']).year}"
+        return 'Videos'
+
+    def classify_audio(self, audio_path):
+        """Audio by artist tag (ID3, Vorbis comment or iTunes ilst)"""
+        artist = get_media_metadata().read(str(audio_path)).get('artist')
+        return f"Audio/{safe_name(artist)}" if artist else 'Audio'
+
+    def classify_archive(self, archive_path):
+        """Archives by what they hold (Archives/Images, Archives/Code, ...), from the archive's
+        directory only - nothing is extracted"""
+        from archive_inspector import folder_for, inspect_archive
+        return folder_for(inspect_archive(str(archive_path), self.rules), self.rules)
+
     def classify_generic(self, file_path):
         """File size + age based classification"""
         stat = file_path.stat()
@@ -147,18 +373,22 @@ class AISmartSorter:
     
     def estimate_text_density(self, gray_image):
         """Estimate text presence in image"""
+        import cv2
         # Enhance contrast for better OCR detection
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
         enhanced = clahe.apply(gray_image)
         
         # OCR confidence as text density proxy
-        data = pytesseract.image_to_data(enhanced, output_type=pytesseract.Output.DICT)
+        with self._stage('ocr'):
+            data = self.ocr.image_to_data(enhanced)
         text_conf = [int(conf) for conf in data['conf'] if int(conf) > 30]
         
         return len(text_conf) / max(len(data['text']), 1)
     
     def is_colorful(self, img):
         """Detect colorful images (memes vs photos)"""
+        import cv2
+        import numpy as np
         hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
         saturation = hsv[:,:,1]
         return np.mean(saturation) > 80  # High saturation = colorful
@@ -184,14 +414,21 @@ class AISmartSorter:
         
         return max(scores, key=scores.get) if scores else 'unknown'
 
-# File extension mappings
-AISmartSorter.IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg'}
-AISmartSorter.DOC_EXTS = {'.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt'}
-AISmartSorter.CODE_EXTS = {'.py', '.js', '.ts', '.cpp', '.c', '.h', '.java', '.html', '.css', '.scss', '.json', '.xml'}
-AISmartSorter.VIDEO_EXTS = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm'}
-AISmartSorter.AUDIO_EXTS = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a'}
-AISmartSorter.ARCHIVE_EXTS = {'.zip', '.rar', '.7z', '.tar', '.gz', '.bz2'}
-AISmartSorter.EXECUTABLE_EXTS = {'.exe', '.msi', '.deb', '.rpm', '.dmg', '.app'}
+# Rule types that get content analysis; other types use the rule's folder
+AISmartSorter.HANDLERS = {'image': 'classify_image', 'document': 'classify_document', 'code': 'classify_code',
+                          'video': 'classify_video', 'audio': 'classify_audio', 'archive': 'classify_archive'}
+# Built-in rule types whose (expensive) analysis is only run after the content confirms the type
+AISmartSorter.SNIFF_TYPES = {'image', 'document'}
+
+# Batch image path: face cascades run on a copy with at most this long side
+AISmartSorter.CASCADE_SIDE = 480
+# Batch image path: images are decoded at 1/2..1/8 scale while the long side stays >= this
+AISmartSorter.BATCH_SIDE = 1600
+# Growth of Canny edge density (fraction of edge pixels) when an image is decoded at 1/factor,
+# measured on 1440p/4K screenshots; the 0.08 screenshot threshold is multiplied by it
+AISmartSorter.EDGE_DENSITY_GAIN = {1: 1.0, 2: 1.7, 4: 2.4, 8: 3.5}
+# Batch image path: largest BGR mosaic stacked for one feature pass
+AISmartSorter.MAX_MOSAIC_BYTES = 64 * 1024 * 1024
 
 # Usage example
 if __name__ == "__main__":
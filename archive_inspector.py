@@ -0,0 +1,166 @@
+"""
+RishFlow v2.0 - Archive Inspector
+What an archive holds, read from its directory - nothing is extracted.
+
+  ZIP             central directory only (zipfile seeks to it from the end of the file)
+  TAR             member headers; member data is skipped with seeks
+  TAR.GZ/BZ2/XZ   streamed; a compressed stream can only be walked by decompressing it,
+                  so at most MAX_STREAM_BYTES are read and the summary is marked partial
+  GZ/BZ2/XZ       single file: inner name from the gzip header (or the file name), size
+                  from the gzip trailer
+  7Z/RAR          via py7zr/rarfile when installed (both list from headers); otherwise
+                  only the format is reported
+
+summarize() counts members by rule_engine type; folder_for() routes an archive whose
+members are mostly one type to Archives/<that type's folder> (Archives/Images,
+Archives/Code, ...) and everything else to Archives.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import struct
+import tarfile
+import zipfile
+
+from content_sniffer import sniff
+
+MAX_STREAM_BYTES = 64 * 1024 * 1024     # decompressed bytes read from a compressed tar
+DOMINANT_SHARE = 0.6                    # share of member files one type needs to route the archive
+MAX_SAMPLE_NAMES = 20
+
+_FORMATS = {'application/zip': 'zip', 'application/x-tar': 'tar', 'application/gzip': 'gz',
+            'application/x-bzip2': 'bz2', 'application/x-xz': 'xz',
+            'application/x-7z-compressed': '7z', 'application/vnd.rar': 'rar'}
+_OPENERS = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+
+def _zip_members(path):
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if not info.is_dir():
+                yield info.filename, info.file_size, info.compress_size, bool(info.flag_bits & 1)
+
+
+def _tar_members(tf):
+    for member in tf:
+        if member.isfile():
+            yield member.name, member.size, None, False
+
+
+def _gzip_name(path):
+    """Original file name from the gzip header (FNAME), if it was stored"""
+    with open(path, 'rb') as f:
+        head = f.read(10)
+        if len(head) < 10 or not head[3] & 0x08:
+            return None
+        if head[3] & 0x04:                          # FEXTRA
+            (n,) = struct.unpack('<H', f.read(2))
+            f.seek(n, os.SEEK_CUR)
+        name = bytearray()
+        while len(name) < 1024:
+            c = f.read(1)
+            if not c or c == b'\0':
+                break
+            name += c
+        return name.decode('latin-1') or None
+
+
+def _gzip_size(path):
+    """Uncompressed size from the gzip trailer (ISIZE, modulo 4 GiB)"""
+    with open(path, 'rb') as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack('<I', f.read(4))[0]
+
+
+def _strip_ext(name):
+    stem, ext = os.path.splitext(name)
+    return stem + '.tar' if ext.lower() == '.tgz' else stem
+
+
+def _members(path, fmt, info):
+    """(name, size, compressed_size, encrypted) per member file; sets info['partial'] when
+    a compressed stream was cut short"""
+    if fmt == 'zip':
+        yield from _zip_members(path)
+    elif fmt == 'tar':
+        with tarfile.open(path, 'r:') as tf:
+            yield from _tar_members(tf)
+    elif fmt in _OPENERS:
+        with _OPENERS[fmt](path, 'rb') as stream:
+            head = stream.read(512)
+        if head[257:262] == b'ustar':
+            with _OPENERS[fmt](path, 'rb') as stream, tarfile.open(fileobj=stream, mode='r|') as tf:
+                for member in tf:
+                    if member.isfile():
+                        yield member.name, member.size, None, False
+                    # advancing to the next header decompresses this member's data: stop
+                    # before that would take the stream past the budget
+                    if stream.tell() + member.size > MAX_STREAM_BYTES:
+                        info['partial'] = True
+                        return
+        else:
+            name = (_gzip_name(path) if fmt == 'gz' else None) or _strip_ext(os.path.basename(path))
+            size = _gzip_size(path) if fmt == 'gz' else None
+            yield name, size, os.path.getsize(path), False
+    elif fmt == '7z':
+        import py7zr
+        with py7zr.SevenZipFile(path) as archive:
+            for entry in archive.list():
+                if not entry.is_directory:
+                    yield entry.filename, entry.uncompressed, entry.compressed, False
+    elif fmt == 'rar':
+        import rarfile
+        with rarfile.RarFile(path) as archive:
+            for entry in archive.infolist():
+                if not entry.is_dir():
+                    yield entry.filename, entry.file_size, entry.compress_size, entry.needs_password()
+
+
+def inspect_archive(path, rules=None):
+    """Member summary of an archive: format, files, uncompressed_size, types
+    ({type: {'count', 'size'}}), dominant type (or None), encrypted, partial, sample names.
+    {'format': None} when path is not a recognized archive."""
+    if rules is None:
+        from rule_engine import get_rules
+        rules = get_rules()
+    fmt = _FORMATS.get(sniff(path))
+    info = {'format': fmt, 'files': 0, 'uncompressed_size': 0, 'compressed_size': os.path.getsize(path),
+            'types': {}, 'dominant': None, 'encrypted': False, 'partial': False, 'sample': []}
+    if fmt is None:
+        return info
+    names, sizes = [], []
+    try:
+        for name, size, _, encrypted in _members(path, fmt, info):
+            names.append(name)
+            sizes.append(size or 0)
+            info['encrypted'] |= encrypted
+    except ImportError:
+        info['error'] = f"Listing {fmt} archives needs {'py7zr' if fmt == '7z' else 'rarfile'}"
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, lzma.LZMAError, ValueError) as e:
+        info['error'] = str(e)
+        info['partial'] = True
+    for name, ftype, size in zip(names, rules.file_types(os.path.basename(n) for n in names), sizes):
+        t = info['types'].setdefault(ftype, {'count': 0, 'size': 0})
+        t['count'] += 1
+        t['size'] += size
+    info['files'] = len(names)
+    info['uncompressed_size'] = sum(sizes)
+    info['sample'] = names[:MAX_SAMPLE_NAMES]
+    if names:
+        top, stats = max(info['types'].items(), key=lambda kv: kv[1]['count'])
+        if top != 'other' and stats['count'] >= DOMINANT_SHARE * len(names):
+            info['dominant'] = top
+    return info
+
+
+def folder_for(info, rules=None, default='Archives'):
+    """'Archives/<folder of the dominant member type>' (e.g. Archives/Images), else default"""
+    if not info.get('dominant'):
+        return default
+    if rules is None:
+        from rule_engine import get_rules
+        rules = get_rules()
+    rule = rules.builtin_for(info['dominant'])
+    return f"{default}/{rule.folder}" if rule is not None and rule.folder else default
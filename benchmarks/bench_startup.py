@@ -0,0 +1,89 @@
+"""
+RishFlow startup benchmark.
+
+Measures, in fresh interpreters:
+  - wall time to `import app` and resident memory right after the import
+  - which heavy modules (cv2, numpy, pytesseract, tesserocr, imagehash, webview, pystray, PIL) got pulled in
+  - with --gui: time from main() to the first painted window (needs a display and a built UI)
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--gui] [--out startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['cv2', 'numpy', 'pytesseract', 'tesserocr', 'imagehash', 'webview', 'pystray', 'PIL']
+
+_CHILD = r'''
+import json, sys, time
+t = time.perf_counter()
+import app
+elapsed = time.perf_counter() - t
+from job_manager import process_rss_bytes
+print(json.dumps({
+    "import_seconds": elapsed,
+    "rss_bytes": process_rss_bytes(),
+    "heavy_loaded": [m for m in %r if m in sys.modules],
+}))
+''' % (HEAVY,)
+
+
+def bench_import(runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', _CHILD], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    times = [s['import_seconds'] for s in samples]
+    rss = [s['rss_bytes'] for s in samples if s['rss_bytes']]
+    return {
+        'runs': runs,
+        'import_seconds_median': round(statistics.median(times), 4),
+        'import_seconds_min': round(min(times), 4),
+        'rss_bytes_median': int(statistics.median(rss)) if rss else None,
+        'heavy_loaded': samples[-1]['heavy_loaded'],
+    }
+
+
+def bench_gui(timeout=60):
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    env = dict(os.environ, RISHFLOW_STARTUP_BENCH=path)
+    try:
+        subprocess.run([sys.executable, 'app.py'], cwd=ROOT, env=env, timeout=timeout,
+                       capture_output=True, text=True)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        return {'error': str(e)}
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--gui', action='store_true', help='also measure main() to first paint')
+    parser.add_argument('--out', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'import': bench_import(args.runs)}
+    if args.gui:
+        report['gui'] = bench_gui()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
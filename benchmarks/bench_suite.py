@@ -0,0 +1,238 @@
+"""
+RishFlow benchmark suite.
+
+Builds a synthetic tree (see synth_tree.py) in a scratch directory and times the API
+end to end, offline and without a GUI:
+
+  scan_source, get_folder_stats      directory listing + stat
+  classify_file                      AISmartSorter per kind (image/pdf/text/code/binary/other)
+  find_duplicates                    full-content hashing
+  index_for_ai (cold, warm), query_ai (result cache cleared, cached)
+  organize (_organize_files) + revert_last, in "File Extension" and optionally AI mode
+
+Every timing is the median/min of --repeat runs. The report is JSON and carries the git
+commit, so runs can be diffed across commits:
+
+    python benchmarks/bench_suite.py --files 500 --out before.json
+    git checkout my-branch
+    python benchmarks/bench_suite.py --files 500 --compare before.json   # exit 1 on regressions
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synth_tree import DEFAULT_MIX, generate_tree, parse_mix  # noqa: E402
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment():
+    info = {'python': sys.version.split()[0], 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'tesseract': shutil.which('tesseract') is not None}
+    for mod in ('cv2', 'numpy', 'pypdf', 'PIL', 'tesserocr'):
+        try:
+            info[mod] = getattr(__import__(mod), '__version__', 'yes')
+        except Exception:
+            info[mod] = None
+    return info
+
+
+def timed(fn, repeat=1, setup=None, files=None, nbytes=None):
+    """Run fn `repeat` times (setup() before each, untimed); returns a stats dict"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t)
+    med = statistics.median(samples)
+    stats = {'runs': repeat, 'median_s': round(med, 5), 'min_s': round(min(samples), 5)}
+    if files:
+        stats['files'] = files
+        stats['files_per_s'] = round(files / med, 1) if med else None
+    if nbytes:
+        stats['mb_per_s'] = round(nbytes / med / (1024 * 1024), 2) if med else None
+    if isinstance(result, dict) and 'error' in result:
+        stats['error'] = result['error']
+    return stats
+
+
+def bench_classify(tree, sample_per_kind):
+    """Time AISmartSorter.classify_file per file kind on a sample of each"""
+    from ai_sorter import AISmartSorter
+    by_kind = {}
+    for name in sorted(os.listdir(tree)):
+        kind = ('image' if name.startswith('IMG_') else 'pdf' if name.endswith('.pdf') else
+                'code' if name.startswith('module_') else 'binary' if name.startswith('blob_') else
+                'other' if name.startswith('misc_') else 'text')
+        bucket = by_kind.setdefault(kind, [])
+        if len(bucket) < sample_per_kind:
+            bucket.append(os.path.join(tree, name))
+
+    sorter = AISmartSorter()
+    t = time.perf_counter()
+    sorter.face_cascade, sorter.profile_cascade  # one-off model load, reported separately
+    report = {'model_load_s': round(time.perf_counter() - t, 5)}
+    for kind, paths in sorted(by_kind.items()):
+        samples = []
+        for p in paths:
+            t = time.perf_counter()
+            sorter.classify_file(p)
+            samples.append(time.perf_counter() - t)
+        report[kind] = {'files': len(samples), 'median_ms': round(statistics.median(samples) * 1000, 3),
+                        'max_ms': round(max(samples) * 1000, 3)}
+    return report
+
+
+def run_suite(args):
+    mix = parse_mix(args.mix)
+    work = tempfile.mkdtemp(prefix='rishflow-bench-')
+    cwd = os.getcwd()
+    report = {'commit': git_commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'environment': environment(),
+              'config': {'files': args.files, 'mix': mix, 'binary_mb': args.binary_mb,
+                         'dup_ratio': args.dup_ratio, 'seed': args.seed, 'repeat': args.repeat},
+              'results': {}}
+    res = report['results']
+    try:
+        tree = os.path.join(work, 'tree')
+        t = time.perf_counter()
+        manifest = generate_tree(tree, args.files, mix, int(args.binary_mb * 1024 * 1024),
+                                 args.dup_ratio, args.seed)
+        report['tree'] = {k: v for k, v in manifest.items() if k != 'root'}
+        report['tree']['generate_s'] = round(time.perf_counter() - t, 3)
+        n, nbytes = manifest['files'], manifest['bytes']
+
+        # API state files (activity DB, .ai_cache, job checkpoints) go to the scratch dir
+        os.chdir(work)
+        quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+        with quiet:
+            from app import RishFlowAPI
+            api = RishFlowAPI()
+
+            res['scan_source'] = timed(lambda: api.scan_source(tree), args.repeat, files=n)
+            res['get_folder_stats'] = timed(lambda: api.get_folder_stats(tree), args.repeat, files=n)
+            res['classify_file'] = bench_classify(tree, args.classify_sample)
+            res['find_duplicates'] = timed(lambda: api.find_duplicates(tree), args.repeat,
+                                           files=n, nbytes=nbytes)
+
+            cache = os.path.join(work, '.ai_cache')
+            res['index_for_ai_cold'] = timed(lambda: api.index_for_ai(tree), args.repeat,
+                                             setup=lambda: shutil.rmtree(cache, ignore_errors=True), files=n)
+            res['index_for_ai_warm'] = timed(lambda: api.index_for_ai(tree), args.repeat, files=n)
+            # query_ai answers repeats from its result cache: time the search itself and the cache hit
+            res['query_ai'] = timed(lambda: api.query_ai(tree, 'invoice'), args.repeat * 5,
+                                    setup=api._query_cache.clear)
+            res['query_ai_cached'] = timed(lambda: api.query_ai(tree, 'invoice'), args.repeat * 5)
+
+            modes = {'File Extension': 'extension'}
+            if args.ai_organize:
+                modes['AI-based Content'] = 'ai'
+            for mode, label in modes.items():
+                dest = os.path.join(args.dest_dir or work, 'organized')
+                org, rev = [], []
+                for _ in range(args.repeat):
+                    t = time.perf_counter()
+                    api._organize_files(tree, dest, mode)
+                    org.append(time.perf_counter() - t)
+                    t = time.perf_counter()
+                    api.revert_last()
+                    rev.append(time.perf_counter() - t)
+                    shutil.rmtree(dest, ignore_errors=True)
+                med = statistics.median(org)
+                res['organize_' + label] = {
+                    'runs': args.repeat, 'median_s': round(med, 5), 'min_s': round(min(org), 5),
+                    'files': n, 'files_per_s': round(n / med, 1),
+                    'stage_seconds': api.get_organize_progress().get('stage_seconds', {}),
+                    'throughput': api.last_move_throughput,
+                }
+                med = statistics.median(rev)
+                res['revert_' + label] = {'runs': args.repeat, 'median_s': round(med, 5), 'min_s': round(min(rev), 5),
+                                          'files': n, 'files_per_s': round(n / med, 1)}
+            api.conn.close()
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+        else:
+            report['workdir'] = work
+    return report
+
+
+def compare(report, baseline, threshold, min_delta=0.005):
+    """List operations whose median got slower than baseline by more than threshold (fraction).
+    Differences under min_delta seconds are treated as noise."""
+    regressions = []
+    for op, cur in report['results'].items():
+        base = baseline.get('results', {}).get(op)
+        if not isinstance(cur, dict) or not isinstance(base, dict):
+            continue
+        if 'median_s' in cur and base.get('median_s'):
+            ratio = cur['median_s'] / base['median_s']
+            if ratio > 1 + threshold and cur['median_s'] - base['median_s'] > min_delta:
+                regressions.append({'op': op, 'baseline_s': base['median_s'], 'current_s': cur['median_s'],
+                                    'ratio': round(ratio, 2)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=200, help='files in the synthetic tree')
+    parser.add_argument('--mix', help='kind=weight,... (default %s)' % ','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()))
+    parser.add_argument('--binary-mb', type=float, default=4.0, help='size of each large binary')
+    parser.add_argument('--dup-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--classify-sample', type=int, default=20, help='files per kind for classify_file')
+    parser.add_argument('--ai-organize', action='store_true', help='also time organize in AI-based Content mode')
+    parser.add_argument('--dest-dir', help='organize into this directory (e.g. another device) instead of the scratch dir')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch directory')
+    parser.add_argument('--verbose', action='store_true', help="show the API's own logging")
+    parser.add_argument('--out', help='write the JSON report to this file')
+    parser.add_argument('--compare', help='baseline report; exit 1 if any operation regressed')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown vs baseline (0.2 = 20%%)')
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help='ignore slowdowns smaller than this many seconds (timer noise)')
+    args = parser.parse_args(argv)
+
+    report = run_suite(args)
+    code = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['baseline_commit'] = baseline.get('commit')
+        report['regressions'] = compare(report, baseline, args.threshold, args.min_delta)
+        code = 1 if report['regressions'] else 0
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Synthetic file trees for RishFlow benchmarks.
+
+Generates a flat folder (RishFlow organizes and indexes the top level of a folder) with a
+configurable number of files and mix of kinds, deterministically from a seed:
+
+  image   PNG/JPG: face-like drawings, photos (noise/gradients), screenshots and text renders
+  pdf     small text PDFs written by hand (no reportlab needed), readable by pypdf
+  text    .txt notes/invoices/reports with searchable keywords
+  code    .py/.js/.java/.cpp snippets
+  binary  large random .bin/.iso/.zip blobs (size set by binary_bytes)
+  other   odd extensions with random payloads
+
+A `dup_ratio` share of files are byte-for-byte copies of earlier files so duplicate
+scans have something to find.
+
+Usage:
+    python benchmarks/synth_tree.py OUT_DIR --files 500 --mix image=3,pdf=2,text=2,code=2,binary=1
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+
+DEFAULT_MIX = {'image': 3, 'pdf': 2, 'text': 2, 'code': 2, 'binary': 1, 'other': 1}
+
+WORDS = ('invoice receipt payment report proposal project resume meeting budget quarterly '
+         'summary contract schedule design review travel insurance tax statement order '
+         'shipping warranty manual notes draft final archive family holiday').split()
+
+CODE_SNIPPETS = {
+    '.py': "import os\n\nclass Job{n}:\n    def run(self):\n        print('job {n}')\n\ndef main():\n    return Job{n}().run()\n",
+    '.js': "const job{n} = () => {{\n  console.log('job {n}');\n}};\nfunction main() {{ return job{n}(); }}\n",
+    '.java': "public class Job{n} {{\n    public static void main(String[] args) {{\n        System.out.println(\"job {n}\");\n    }}\n}}\n",
+    '.cpp': "#include <iostream>\nint main() {{\n    std::cout << \"job {n}\" << std::endl;\n    return 0;\n}}\n",
+}
+
+
+def parse_mix(spec):
+    """'image=3,pdf=1' -> {'image': 3.0, 'pdf': 1.0}"""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown kind '{kind}' (expected one of {', '.join(DEFAULT_MIX)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def _sentence(rng, n=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def _write_pdf(path, lines):
+    """Minimal single-page PDF with a Helvetica text stream and a valid xref table"""
+    def esc(s):
+        return s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    ops = ['BT', '/F1 11 Tf', '14 TL', '50 780 Td']
+    for line in lines:
+        ops.append(f"({esc(line)}) Tj T*")
+    ops.append('ET')
+    stream = '\n'.join(ops).encode('latin-1', errors='replace')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length ' + str(len(stream)).encode() + b' >>\nstream\n' + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b'\nendobj\n'
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def _write_image(path, rng, style):
+    import cv2
+    import numpy as np
+    h, w = rng.choice([(480, 640), (600, 800), (720, 1280)])
+    nrng = np.random.default_rng(rng.randrange(2 ** 32))
+    if style == 'face':
+        img = np.full((h, w, 3), (200, 210, 220), np.uint8)
+        cx, cy, r = w // 2, h // 2, min(h, w) // 4
+        cv2.ellipse(img, (cx, cy), (r, int(r * 1.3)), 0, 0, 360, (140, 170, 215), -1)
+        for dx in (-r // 2, r // 2):
+            cv2.ellipse(img, (cx + dx, cy - r // 3), (r // 5, r // 9), 0, 0, 360, (40, 40, 40), -1)
+        cv2.line(img, (cx, cy - r // 8), (cx, cy + r // 4), (100, 120, 160), 3)
+        cv2.ellipse(img, (cx, cy + r // 2), (r // 3, r // 8), 0, 0, 180, (60, 60, 150), 4)
+    elif style == 'photo':
+        grad = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+        img = (grad * 0.6 + nrng.normal(80, 30, (h, w, 3))).clip(0, 255).astype(np.uint8)
+        img = cv2.GaussianBlur(img, (9, 9), 0)
+    elif style == 'screenshot':
+        img = np.full((h, w, 3), 245, np.uint8)
+        for y in range(0, h, 24):
+            cv2.rectangle(img, (10, y + 4), (rng.randrange(80, w - 10), y + 18), (60, 60, 60), 1)
+    else:  # text render (receipt/meme-like)
+        img = np.full((h, w, 3), 255, np.uint8)
+        for i, y in enumerate(range(30, h - 10, 28)):
+            cv2.putText(img, _sentence(rng, 5)[:48], (15, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 1)
+    cv2.imwrite(path, img)
+
+
+def generate_tree(root, files=200, mix=None, binary_bytes=4 * 1024 * 1024, dup_ratio=0.1, seed=1234):
+    """Create `files` files under root; returns a manifest dict (counts per kind, bytes)"""
+    rng = random.Random(seed)
+    mix = mix or dict(DEFAULT_MIX)
+    kinds = [k for k, w in mix.items() if w > 0]
+    weights = [mix[k] for k in kinds]
+    os.makedirs(root, exist_ok=True)
+
+    manifest = {'root': root, 'files': 0, 'bytes': 0, 'kinds': {}, 'duplicates': 0, 'seed': seed}
+    written = []
+    n_dups = int(files * dup_ratio)
+    for i in range(files - n_dups):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == 'image':
+            style = rng.choice(['face', 'photo', 'screenshot', 'text'])
+            path = os.path.join(root, f"IMG_{i:05d}_{style}{rng.choice(['.jpg', '.png'])}")
+            _write_image(path, rng, style)
+        elif kind == 'pdf':
+            path = os.path.join(root, f"doc_{i:05d}.pdf")
+            _write_pdf(path, [_sentence(rng) for _ in range(rng.randrange(5, 40))])
+        elif kind == 'text':
+            path = os.path.join(root, f"{rng.choice(WORDS)}_{i:05d}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(_sentence(rng) for _ in range(rng.randrange(10, 400))))
+        elif kind == 'code':
+            ext = rng.choice(list(CODE_SNIPPETS))
+            path = os.path.join(root, f"module_{i:05d}{ext}")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(CODE_SNIPPETS[ext].format(n=i) * rng.randrange(1, 30))
+        elif kind == 'binary':
+            path = os.path.join(root, f"blob_{i:05d}{rng.choice(['.bin', '.iso', '.zip'])}")
+            with open(path, 'wb') as f:
+                remaining = binary_bytes
+                while remaining > 0:
+                    chunk = min(remaining, 1024 * 1024)
+                    f.write(rng.randbytes(chunk))
+                    remaining -= chunk
+        else:
+            path = os.path.join(root, f"misc_{i:05d}{rng.choice(['.dat', '.log', '.xyz', ''])}")
+            with open(path, 'wb') as f:
+                f.write(rng.randbytes(rng.randrange(100, 64 * 1024)))
+        written.append(path)
+        manifest['kinds'][kind] = manifest['kinds'].get(kind, 0) + 1
+
+    for i in range(n_dups):
+        if not written:
+            break
+        src = rng.choice(written)
+        base, ext = os.path.splitext(os.path.basename(src))
+        shutil.copyfile(src, os.path.join(root, f"{base} (copy {i}){ext}"))
+        manifest['duplicates'] += 1
+
+    for entry in os.scandir(root):
+        if entry.is_file():
+            manifest['files'] += 1
+            manifest['bytes'] += entry.stat().st_size
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--mix', help='kind=weight,... (kinds: %s)' % ', '.join(DEFAULT_MIX))
+    parser.add_argument('--binary-mb', type=float, default=4.0)
+    parser.add_argument('--dup-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    print(json.dumps(generate_tree(args.out, args.files, parse_mix(args.mix), int(args.binary_mb * 1024 * 1024),
+                                   args.dup_ratio, args.seed), indent=2))
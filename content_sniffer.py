@@ -0,0 +1,180 @@
+"""
+RishFlow v2.0 - Content Sniffer
+Identifies a file by its first few KB (magic signatures), independent of its extension.
+Used by the AI sorter to route extension-less/mislabeled files and to keep binaries out of
+the OCR/document paths, and by the rule engine for "mime" rules.
+"""
+
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+HEAD_BYTES = 4096
+ZIP_DIRECTORY_BYTES = 256 * 1024   # most of a zip's central directory read to tell OOXML from a plain zip
+OCTET = 'application/octet-stream'
+
+# (offset, signature, mime) - checked in order, first hit wins
+SIGNATURES = [
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (0, b'II*\x00', 'image/tiff'),
+    (0, b'MM\x00*', 'image/tiff'),
+    (0, b'\x00\x00\x01\x00', 'image/x-icon'),
+    (0, b'%PDF-', 'application/pdf'),
+    (0, b'{\\rtf', 'application/rtf'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword'),   # OLE2: .doc/.xls/.ppt
+    (0, b'Rar!\x1a\x07', 'application/vnd.rar'),
+    (0, b"7z\xbc\xaf'\x1c", 'application/x-7z-compressed'),
+    (0, b'\x1f\x8b', 'application/gzip'),
+    (0, b'BZh', 'application/x-bzip2'),
+    (0, b'\xfd7zXZ\x00', 'application/x-xz'),
+    (257, b'ustar', 'application/x-tar'),
+    (0, b'\x7fELF', 'application/x-executable'),
+    (0, b'MZ', 'application/x-msdownload'),
+    (0, b'\xcf\xfa\xed\xfe', 'application/x-mach-binary'),
+    (0, b'\xce\xfa\xed\xfe', 'application/x-mach-binary'),
+    (0, b'fLaC', 'audio/flac'),
+    (0, b'OggS', 'audio/ogg'),
+    (0, b'ID3', 'audio/mpeg'),
+    (0, b'\x1aE\xdf\xa3', 'video/x-matroska'),
+    (0, b'\x00\x00\x01\xba', 'video/mpeg'),
+    (0, b'SQLite format 3\x00', 'application/vnd.sqlite3'),
+]
+
+_RIFF = {b'WEBP': 'image/webp', b'WAVE': 'audio/wav', b'AVI ': 'video/x-msvideo'}
+_FTYP = {b'qt  ': 'video/quicktime', b'M4A ': 'audio/mp4', b'M4B ': 'audio/mp4',
+         b'heic': 'image/heic', b'heix': 'image/heic', b'mif1': 'image/heif', b'avif': 'image/avif'}
+_OOXML = {b'word/': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+          b'xl/': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+          b'ppt/': 'application/vnd.openxmlformats-officedocument.presentationml.presentation'}
+
+# sniffed MIME -> rule_engine type
+_TYPE_BY_MIME = {
+    'application/pdf': 'document', 'application/rtf': 'document', 'application/msword': 'document',
+    'application/vnd.oasis.opendocument.text': 'document', 'text/plain': 'document',
+    'application/zip': 'archive', 'application/vnd.rar': 'archive', 'application/x-7z-compressed': 'archive',
+    'application/gzip': 'archive', 'application/x-bzip2': 'archive', 'application/x-xz': 'archive',
+    'application/x-tar': 'archive',
+    'application/x-executable': 'executable', 'application/x-msdownload': 'executable',
+    'application/x-mach-binary': 'executable',
+    'text/html': 'code', 'application/xml': 'code',
+}
+_TYPE_BY_MAJOR = {'image': 'image', 'video': 'video', 'audio': 'audio'}
+
+
+def _text_mime(head):
+    if head.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'text/plain'                       # UTF-16 with BOM
+    if b'\x00' in head:
+        return OCTET
+    control = sum(1 for b in head if b < 32 and b not in (9, 10, 12, 13, 8, 27))
+    if head and control / len(head) > 0.05:
+        return OCTET
+    start = head.lstrip(b'\xef\xbb\xbf \t\r\n')[:512].lower()
+    if start.startswith(b'<svg') or (start.startswith(b'<?xml') and b'<svg' in head.lower()):
+        return 'image/svg+xml'
+    if start.startswith((b'<!doctype html', b'<html')):
+        return 'text/html'
+    if start.startswith(b'<?xml'):
+        return 'application/xml'
+    return 'text/plain'
+
+
+def sniff_bytes(head):
+    """MIME type for the first bytes of a file (OCTET when nothing matches)"""
+    for offset, sig, mime in SIGNATURES:
+        if head[offset:offset + len(sig)] == sig:
+            return mime
+    if head[:4] == b'RIFF' and head[8:12] in _RIFF:
+        return _RIFF[head[8:12]]
+    if head[4:8] == b'ftyp':
+        return _FTYP.get(head[8:12], 'video/mp4')
+    if head[:2] == b'BM' and len(head) >= 14 and int.from_bytes(head[10:14], 'little') < 4096:
+        return 'image/bmp'
+    if head[:4] == b'PK\x03\x04':
+        if head[30:38] == b'mimetype':
+            return head[38:head.find(b'PK', 38)].decode('ascii', 'ignore').strip() or 'application/zip'
+        if b'[Content_Types].xml' in head:
+            for marker, mime in _OOXML.items():
+                if marker in head:
+                    return mime
+        return 'application/zip'        # sniff() then checks the central directory
+    if head[:2] == b'\xff\xfb' or head[:2] == b'\xff\xf3' or head[:2] == b'\xff\xf2':
+        return 'audio/mpeg'
+    return _text_mime(head)
+
+
+def read_head(path, size=HEAD_BYTES):
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+def _zip_container(path):
+    """OOXML MIME from a zip's central directory (member names like word/...), else
+    'application/zip'. For documents whose first entries (thumbnail, _rels) push the
+    word/xl/ppt parts out of the first HEAD_BYTES."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 65557))            # end-of-central-directory record + max comment
+        tail = f.read()
+        eocd = tail.rfind(b'PK\x05\x06')
+        if eocd < 0 or len(tail) < eocd + 20:
+            return 'application/zip'
+        cd_size = int.from_bytes(tail[eocd + 12:eocd + 16], 'little')
+        cd_offset = int.from_bytes(tail[eocd + 16:eocd + 20], 'little')
+        f.seek(cd_offset)
+        directory = f.read(min(cd_size, ZIP_DIRECTORY_BYTES))
+    names = []
+    pos = 0
+    while directory[pos:pos + 4] == b'PK\x01\x02' and pos + 46 <= len(directory):
+        n, extra, comment = (int.from_bytes(directory[pos + k:pos + k + 2], 'little') for k in (28, 30, 32))
+        names.append(directory[pos + 46:pos + 46 + n])
+        pos += 46 + n + extra + comment
+    if b'[Content_Types].xml' in names:
+        for marker, mime in _OOXML.items():
+            if any(name.startswith(marker) for name in names):
+                return mime
+    return 'application/zip'
+
+
+def sniff(path):
+    """MIME type from the file's first HEAD_BYTES (and, for zips, the central directory);
+    None if it cannot be read"""
+    try:
+        mime = sniff_bytes(read_head(path))
+        if mime == 'application/zip':
+            mime = _zip_container(path)
+        return mime
+    except OSError:
+        return None
+
+
+def sniff_many(paths, workers=8):
+    """sniff() over many files; the small reads are issued in parallel (order preserved)"""
+    paths = list(paths)
+    if len(paths) < 4 or workers <= 1:
+        return [sniff(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths)), thread_name_prefix='rishflow-sniff') as pool:
+        return list(pool.map(sniff, paths))
+
+
+def type_for_mime(mime):
+    """rule_engine type for a sniffed MIME ('other' for unknown/binary)"""
+    if not mime or mime == OCTET:
+        return 'other'
+    if mime in _TYPE_BY_MIME:
+        return _TYPE_BY_MIME[mime]
+    if mime.startswith('application/vnd.openxmlformats-officedocument.'):
+        return 'document'
+    if mime.startswith('application/vnd.oasis.opendocument.'):
+        return 'document'
+    return _TYPE_BY_MAJOR.get(mime.split('/')[0], 'other')
+
+
+def mime_of(path):
+    """Sniffed MIME for rule matching; falls back to the extension for unreadable paths"""
+    mime = sniff(path) if os.path.isfile(path) else None
+    return mime or mimetypes.guess_type(path)[0] or ''
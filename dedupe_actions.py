@@ -0,0 +1,296 @@
+"""
+RishFlow v2.0 - Dedupe Actions
+Reclaims the space taken by duplicate groups from DuplicateFinder.find_duplicates.
+
+Per group one file is kept; every other copy is
+  reflink    - replaced by a copy-on-write clone of the kept file (FICLONE: Btrfs, XFS, bcachefs)
+  hardlink   - replaced by a hard link to the kept file
+  auto       - reflink where the filesystem supports it, hard link otherwise
+  quarantine - moved under QUARANTINE_DIR, to be reviewed and deleted later
+
+Groups are processed in batches. Each copy is re-hashed right before it is touched, so
+a file edited since the scan is left alone, and replacements go through a temp file and
+os.replace so a crash never leaves a path missing. Every action is appended, tagged with
+its run_id, to a journal (JOURNAL_PATH) that keeps all runs not yet reverted; undo()
+replays the most recent run in reverse, like revert_last does for organize runs, and
+a second undo() then reverts the run before it.
+"""
+
+import errno
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+
+from move_engine import MoveEngine, copy_file, prune_empty_dirs
+from organize_jobs import JOBS_DIR
+
+ACTIONS = ('auto', 'reflink', 'hardlink', 'quarantine')
+KEEP_POLICIES = ('first', 'oldest', 'shortest')
+QUARANTINE_DIR = '.rishflow_quarantine'
+JOURNAL_PATH = os.path.join(JOBS_DIR, 'dedupe_journal.jsonl')
+TMP_SUFFIX = '.rishflow-dedupe'
+FICLONE = 0x40049409        # _IOW(0x94, 9, int) on Linux
+# errors meaning "this filesystem (pair) cannot clone", as opposed to a real I/O failure
+NO_CLONE = {errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS}
+
+
+def reflink(src, dst):
+    """Create dst as a copy-on-write clone of src; OSError where the filesystem can't clone"""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+    with open(src, 'rb') as fsrc:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(fd, FICLONE, fsrc.fileno())
+        except OSError:
+            os.close(fd)
+            os.remove(dst)
+            raise
+        os.close(fd)
+
+
+def files_identical(a, b, hasher, expected=None):
+    """Same size and same digest (digest of `a` may be passed in as `expected`)"""
+    try:
+        if os.path.getsize(a) != os.path.getsize(b):
+            return False
+    except OSError:
+        return False
+    return (expected or hasher(a)) == hasher(b)
+
+
+class DedupeEngine:
+    """Applies one dedupe action to confirmed duplicate groups, journaling every change"""
+
+    def __init__(self, action='auto', quarantine_dir=QUARANTINE_DIR, journal_path=JOURNAL_PATH,
+                 batch_size=64, hasher=None, throttle=None):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown dedupe action: {action}")
+        self.action = action
+        self.quarantine_dir = quarantine_dir
+        self.journal_path = journal_path
+        self.batch_size = max(1, int(batch_size))
+        if hasher is None:
+            from duplicate_finder import DuplicateFinder
+            hasher = DuplicateFinder().hash_file     # same digest the groups were built with
+        self.hasher = hasher
+        self.throttle = throttle
+        self.run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._no_clone = set()      # st_dev of filesystems that refused FICLONE
+
+    # ---------- planning ----------
+    @staticmethod
+    def choose_keeper(files, keep='first'):
+        if keep not in KEEP_POLICIES:
+            raise ValueError(f"Unknown keep policy: {keep}")
+        if keep == 'oldest':
+            return min(files, key=lambda p: os.path.getmtime(p))
+        if keep == 'shortest':
+            return min(files, key=len)
+        return files[0]
+
+    def plan(self, groups, keep='first'):
+        """[(keeper, copy, expected_hash)] for every copy that would be acted on"""
+        planned = []
+        for group in groups:
+            files = [f for f in group['files'] if os.path.isfile(f)]
+            if len(files) < 2:
+                continue
+            keeper = group.get('keep') or self.choose_keeper(files, keep)
+            for path in files:
+                if path != keeper:
+                    planned.append((keeper, path, group.get('hash')))
+        return planned
+
+    def quarantine_path(self, path):
+        drive, rest = os.path.splitdrive(os.path.abspath(path))
+        return os.path.join(self.quarantine_dir, self.run_id, drive.strip(':\\/'), rest.lstrip('\\/'))
+
+    # ---------- actions ----------
+    def _replace(self, keeper, path, method):
+        """Swap `path` for a link/clone of keeper via a temp file; returns the method used"""
+        tmp = path + TMP_SUFFIX
+        if method in ('auto', 'reflink'):
+            dev = os.stat(path).st_dev
+            if dev not in self._no_clone:
+                try:
+                    reflink(keeper, tmp)
+                    shutil.copystat(path, tmp)       # a clone is its own inode: keep the copy's metadata
+                    os.replace(tmp, path)
+                    return 'reflink'
+                except OSError as e:
+                    if e.errno not in NO_CLONE:
+                        raise
+                    self._no_clone.add(dev)
+            if method == 'reflink':
+                raise OSError(errno.EOPNOTSUPP, "Filesystem does not support reflinks")
+        try:
+            os.link(keeper, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            raise
+        return 'hardlink'
+
+    def _journal(self, entries):
+        if not entries:
+            return
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(dict(e, run=self.run_id)) + '\n' for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _run_batch(self, batch, verified, entries, checkpoint, report):
+        moves = []
+        for keeper, path, expected in batch:
+            if checkpoint:
+                checkpoint()
+            res = {'path': path, 'keeper': keeper, 'ok': False, 'method': None,
+                   'reason': None, 'bytes': 0, 'error': None}
+            try:
+                st = os.stat(path)
+                if keeper not in verified:
+                    verified[keeper] = self.hasher(keeper, throttle=self.throttle)
+                if expected and verified[keeper] != expected:
+                    res['reason'] = 'keeper_changed'
+                elif self.action != 'quarantine' and os.path.samefile(keeper, path):
+                    res['reason'] = 'already_linked'
+                elif not files_identical(keeper, path, lambda p: self.hasher(p, throttle=self.throttle),
+                                         verified[keeper]):
+                    res['reason'] = 'changed'
+                elif self.action == 'quarantine':
+                    # moving loses nothing, so quarantine moves can wait for the rest of the batch
+                    moves.append((path, self.quarantine_path(path), keeper))
+                    continue
+                else:
+                    method = self._replace(keeper, path, self.action)
+                    # a copy that was already a hard link elsewhere frees nothing
+                    res.update(ok=True, method=method, bytes=st.st_size if st.st_nlink == 1 else 0)
+                    entries.append({'op': method, 'path': path, 'keeper': keeper, 'mode': st.st_mode,
+                                    'atime': st.st_atime, 'mtime': st.st_mtime})
+            except OSError as e:
+                res.update(reason='error', error=str(e))
+            report(res)
+
+        if moves:
+            # renames inline, cross-device copies on the move engine's pool
+            keepers = {src: keeper for src, _, keeper in moves}
+            for mres in MoveEngine(throttle=self.throttle).move_many([(src, dest) for src, dest, _ in moves]):
+                res = {'path': mres['src'], 'keeper': keepers[mres['src']], 'ok': mres['ok'],
+                       'method': 'quarantine', 'reason': None if mres['ok'] else 'error',
+                       'bytes': 0, 'error': mres['error']}
+                if mres['ok']:
+                    entries.append({'op': 'quarantine', 'path': mres['src'], 'dest': mres['dest'],
+                                    'keeper': res['keeper']})
+                report(res)
+
+    def run(self, groups, keep='first', checkpoint=None, on_result=None):
+        """Act on every duplicate copy in `groups` ([{'hash', 'files', 'size'}], optionally with a
+        'keep' path). on_result(result) is called per copy. Earlier runs stay in the journal
+        until undone. Returns counts: done, skipped (by reason), failed, bytes_reclaimed."""
+        planned = self.plan(groups, keep)
+        summary = {'run_id': self.run_id, 'action': self.action, 'planned': len(planned), 'done': 0,
+                   'skipped': {}, 'failed': 0, 'bytes_reclaimed': 0, 'methods': {}}
+        verified = {}               # keeper -> digest, hashed once per run
+
+        def report(res):
+            if res['ok']:
+                summary['done'] += 1
+                summary['bytes_reclaimed'] += res['bytes']
+                summary['methods'][res['method']] = summary['methods'].get(res['method'], 0) + 1
+            elif res['reason'] == 'error':
+                summary['failed'] += 1
+            else:
+                summary['skipped'][res['reason']] = summary['skipped'].get(res['reason'], 0) + 1
+            if on_result:
+                on_result(res)
+
+        for start in range(0, len(planned), self.batch_size):
+            entries = []
+            try:
+                self._run_batch(planned[start:start + self.batch_size], verified, entries, checkpoint, report)
+            finally:
+                # journaled even when the batch was cut short (cancel, crash in a later file)
+                self._journal(entries)
+        return summary
+
+
+def read_journal(journal_path=JOURNAL_PATH):
+    entries = []
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue        # torn last line after a crash
+    return entries
+
+
+def _write_journal(journal_path, entries):
+    if not entries:
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        return
+    tmp = journal_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(e) + '\n' for e in entries))
+    os.replace(tmp, journal_path)
+
+
+def undo(journal_path=JOURNAL_PATH, on_result=None):
+    """Reverse the most recent run still in the journal: quarantined files move back,
+    links/clones become independent copies again (with their original mode and times).
+    Entries that could not be restored stay journaled for another try.
+    Returns {'restored', 'failed', 'run_id'}."""
+    restored = failed = 0
+    engine = MoveEngine()
+    emptied = set()
+    entries = read_journal(journal_path)
+    run_id = entries[-1].get('run') if entries else None
+    kept = [e for e in entries if e.get('run') != run_id]
+    for entry in reversed([e for e in entries if e.get('run') == run_id]):
+        path = entry['path']
+        res = {'path': path, 'op': entry['op'], 'ok': False, 'error': None}
+        started = time.perf_counter()
+        try:
+            if entry['op'] == 'quarantine':
+                if os.path.lexists(path):
+                    raise OSError(errno.EEXIST, f"{path} already exists")
+                mres = engine.move(entry['dest'], path)
+                if not mres['ok']:
+                    raise OSError(mres['error'])
+                emptied.add(os.path.dirname(entry['dest']))
+            elif os.path.lexists(path):
+                tmp = path + TMP_SUFFIX
+                try:
+                    copy_file(entry['keeper'], tmp)
+                    os.chmod(tmp, entry['mode'] & 0o7777)
+                    os.utime(tmp, (entry['atime'], entry['mtime']))
+                    os.replace(tmp, path)
+                except BaseException:
+                    if os.path.lexists(tmp):
+                        os.remove(tmp)
+                    raise
+            else:
+                raise OSError(errno.ENOENT, f"{path} no longer exists")
+            res['ok'] = True
+            restored += 1
+        except OSError as e:
+            res['error'] = str(e)
+            failed += 1
+            kept.append(entry)
+        res['seconds'] = time.perf_counter() - started
+        if on_result:
+            on_result(res)
+    prune_empty_dirs(emptied)
+    if entries:
+        _write_journal(journal_path, kept)
+    return {'restored': restored, 'failed': failed, 'run_id': run_id}
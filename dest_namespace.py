@@ -0,0 +1,97 @@
+"""
+RishFlow v2.0 - Destination Namespace
+In-memory view of the file names in an organize destination, so collisions are resolved
+without probing the disk for every candidate name.
+
+Each destination directory is listed once (os.scandir) the first time a move targets
+it; after that, claims are set lookups. A claimed name is reserved immediately, so two
+files headed for the same folder_name/filename - or parallel copies in the move engine -
+can never be given the same target. Collisions get deterministic suffixes,
+'report.pdf' -> 'report (1).pdf' -> 'report (2).pdf', and with skip_identical a file
+whose bytes already sit under that name is not moved at all.
+"""
+
+import os
+import sys
+import threading
+
+# Windows and macOS volumes are case-insensitive by default
+CASE_INSENSITIVE = sys.platform in ('win32', 'darwin')
+
+
+class DestinationNamespace:
+    """Names taken in each destination directory: on disk at first use, plus claims made since"""
+
+    def __init__(self, skip_identical=False, hasher=None, case_insensitive=CASE_INSENSITIVE):
+        self.skip_identical = skip_identical
+        self.hasher = hasher
+        self.case_insensitive = case_insensitive
+        self._taken = {}        # directory -> {key: name}
+        self._on_disk = {}      # directory -> keys that existed when the directory was listed
+        self._next = {}         # (directory, stem key, ext key) -> next suffix to try
+        self._lock = threading.Lock()
+        self.renamed = 0
+        self.identical = 0
+
+    def _key(self, name):
+        return name.casefold() if self.case_insensitive else name
+
+    def _names(self, directory):
+        taken = self._taken.get(directory)
+        if taken is None:
+            taken = {}
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        taken[self._key(entry.name)] = entry.name
+            except OSError:
+                pass            # not created yet: nothing to collide with
+            self._taken[directory] = taken
+            self._on_disk[directory] = set(taken)
+        return taken
+
+    def _identical(self, src, existing):
+        from dedupe_actions import files_identical
+        if self.hasher is None:
+            from duplicate_finder import DuplicateFinder
+            self.hasher = DuplicateFinder().hash_file
+        return os.path.isfile(existing) and files_identical(src, existing, self.hasher)
+
+    def claim(self, src, dest):
+        """Reserve a free path for moving src to dest: dest itself, a suffixed sibling, or
+        None when skip_identical is set and dest already holds the same bytes"""
+        directory, name = os.path.split(dest)
+        with self._lock:
+            taken = self._names(directory)
+            key = self._key(name)
+            if key not in taken:
+                taken[key] = name
+                return dest
+            if (self.skip_identical and key in self._on_disk[directory]
+                    and self._identical(src, os.path.join(directory, taken[key]))):
+                self.identical += 1
+                return None
+            stem, ext = os.path.splitext(name)
+            counter = (directory, self._key(stem), self._key(ext))
+            n = self._next.get(counter, 1)
+            while self._key(f"{stem} ({n}){ext}") in taken:
+                n += 1
+            self._next[counter] = n + 1
+            name = f"{stem} ({n}){ext}"
+            taken[self._key(name)] = name
+            self.renamed += 1
+            return os.path.join(directory, name)
+
+    def release(self, path):
+        """Give back a claimed name (the move failed), or forget a file that was removed"""
+        directory, name = os.path.split(path)
+        with self._lock:
+            taken = self._taken.get(directory)
+            if taken is not None:
+                taken.pop(self._key(name), None)
+                self._on_disk[directory].discard(self._key(name))
+
+    def __contains__(self, path):
+        directory, name = os.path.split(path)
+        with self._lock:
+            return self._key(name) in self._names(directory)
@@ -0,0 +1,341 @@
+"""
+RishFlow v2.0 - Document Text Extraction
+Reads the text a document already contains before anything is OCR'd:
+
+  .pdf                     pypdf, first pages only; scanned PDFs fall back to OCR of the
+                           page images embedded in those pages
+  .docx .xlsx .pptx .odt   streamed out of the zip container with iterparse
+  .txt .md .csv .log       direct read (head, or the whole file for the AI index)
+  .rtf                     control words and non-text destinations stripped
+  .doc                     printable runs from the legacy binary (good enough for keywords)
+  anything else            read as plain text when its content sniffs as text
+
+Extracted text is stored in the AI index cache (.ai_cache/<sha256(abspath)>.json, keyed by
+mtime), so the sorter and index_for_ai parse each file once. Each entry records how much
+of the file it covers; a request for more pages than a cached entry holds re-extracts.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import zipfile
+from xml.etree import ElementTree
+
+from instrumentation import count, span
+
+AI_CACHE_DIR = '.ai_cache'
+PLAIN_EXTS = {'.txt', '.md', '.csv', '.log'}
+TEXT_EXTS = PLAIN_EXTS | {'.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.rtf', '.doc'}
+
+CLASSIFY_PAGES = 3              # pages (PDF) / slides (PPTX) read for classification
+CLASSIFY_BYTES = 64 * 1024      # characters kept for classification
+LARGE_TEXT_BYTES = 50 * 1024 * 1024
+LARGE_TEXT_TAIL = 1024 * 1024
+OCR_PAGES = 2                   # scanned-PDF pages OCR'd when there is no embedded text
+LEGACY_INDEX_PAGES = 20         # entries written before coverage was recorded came from the index
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_S = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_ODF_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+
+def cache_path_for(path, cache_dir=AI_CACHE_DIR):
+    key = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+# ---------- format readers ----------
+
+class _Budget:
+    """Collects text until max_chars, then flags truncation"""
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, text):
+        if not text:
+            return True
+        if self.max_chars is not None and self.size + len(text) > self.max_chars:
+            self.parts.append(text[:self.max_chars - self.size])
+            self.size = self.max_chars
+            self.truncated = True
+            return False
+        self.parts.append(text)
+        self.size += len(text)
+        return True
+
+    def text(self, sep='\n'):
+        return sep.join(self.parts)
+
+
+def _iter_xml(zf, member, tag):
+    """Yield elements named `tag` from a zip member without building the whole tree"""
+    with zf.open(member) as f:
+        for _, elem in ElementTree.iterparse(f, events=('end',)):
+            if elem.tag == tag:
+                yield elem
+                elem.clear()
+
+
+def read_plain(path, max_chars, large_text_bytes=LARGE_TEXT_BYTES):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if max_chars is None and size > large_text_bytes:
+            # huge logs/dumps: keep the tail, where the recent/relevant part usually is
+            f.seek(max(0, size - LARGE_TEXT_TAIL))
+            return f.read().decode('utf-8', errors='ignore'), True
+        raw = f.read(max_chars * 4 if max_chars is not None else -1)
+    text = raw.decode('utf-8', errors='ignore')
+    if max_chars is not None and (len(text) > max_chars or len(raw) < size):
+        return text[:max_chars], True
+    return text, False
+
+
+_RTF_SKIP = {'fonttbl', 'colortbl', 'stylesheet', 'info', 'pict', 'header', 'footer',
+             'listtable', 'listoverridetable', 'rsidtbl', 'generator', 'themedata', 'datastore'}
+_RTF_TOKEN = re.compile(r"\\([a-z]+)(-?\d+)? ?|\\'([0-9a-f]{2})|\\(.)|([{}])|([^\\{}\r\n]+)", re.I)
+
+
+def read_rtf(path, max_chars):
+    with open(path, 'rb') as f:
+        data = f.read(max_chars * 8 if max_chars is not None else -1).decode('latin-1')
+    out = _Budget(max_chars)
+    stack = []          # skip flag per group
+    skip = False
+    new_group = False
+    for m in _RTF_TOKEN.finditer(data):
+        word, _, hexcode, sym, brace, text = m.groups()
+        if brace == '{':
+            stack.append(skip)
+            new_group = True
+            continue
+        if brace == '}':
+            skip = stack.pop() if stack else False
+            continue
+        first, new_group = new_group, False
+        if word:
+            if first and word.lower() in _RTF_SKIP:
+                skip = True
+            elif not skip and word.lower() in ('par', 'line', 'row', 'page'):
+                if not out.add('\n'):
+                    break
+            elif not skip and word.lower() == 'tab':
+                out.add('\t')
+        elif sym:
+            if sym == '*' and first:
+                skip = True            # {\* ...} ignorable destination
+            elif not skip and sym in '\\{}':
+                out.add(sym)
+        elif hexcode and not skip:
+            if not out.add(bytes([int(hexcode, 16)]).decode('cp1252', errors='ignore')):
+                break
+        elif text and not skip:
+            if not out.add(text):
+                break
+    return out.text(sep=''), out.truncated
+
+
+def read_docx(path, max_chars):
+    out = _Budget(max_chars)
+    with zipfile.ZipFile(path) as zf:
+        for p in _iter_xml(zf, 'word/document.xml', _W + 'p'):
+            if not out.add(''.join(t.text or '' for t in p.iter(_W + 't'))):
+                break
+    return out.text(), out.truncated
+
+
+def read_pptx(path, max_chars, max_pages):
+    out = _Budget(max_chars)
+    with zipfile.ZipFile(path) as zf:
+        slides = sorted((n for n in zf.namelist() if re.fullmatch(r'ppt/slides/slide\d+\.xml', n)),
+                        key=lambda n: int(re.search(r'(\d+)\.xml$', n).group(1)))
+        for name in slides[:max_pages]:
+            for p in _iter_xml(zf, name, _A + 'p'):
+                if not out.add(''.join(t.text or '' for t in p.iter(_A + 't'))):
+                    return out.text(), True
+    return out.text(), out.truncated or len(slides) > max_pages
+
+
+def read_xlsx(path, max_chars):
+    out = _Budget(max_chars)
+    with zipfile.ZipFile(path) as zf:
+        if 'xl/sharedStrings.xml' not in zf.namelist():
+            return '', False
+        for si in _iter_xml(zf, 'xl/sharedStrings.xml', _S + 'si'):
+            if not out.add(''.join(si.itertext())):
+                break
+    return out.text(), out.truncated
+
+
+def read_odt(path, max_chars):
+    out = _Budget(max_chars)
+    with zipfile.ZipFile(path) as zf:
+        with zf.open('content.xml') as f:
+            for _, elem in ElementTree.iterparse(f, events=('end',)):
+                if elem.tag in (_ODF_TEXT + 'p', _ODF_TEXT + 'h'):
+                    if not out.add(''.join(elem.itertext())):
+                        break
+                    elem.clear()
+    return out.text(), out.truncated
+
+
+def read_doc(path, max_chars):
+    """Word 97-2003: pull printable runs (cp1252 and UTF-16LE) out of the binary"""
+    limit = max_chars * 8 if max_chars is not None else 8 * 1024 * 1024
+    with open(path, 'rb') as f:
+        data = f.read(limit)
+    runs = [m.decode('cp1252') for m in re.findall(rb'[\x20-\x7e\r\n\t]{6,}', data)]
+    runs += [m.decode('utf-16-le', errors='ignore') for m in re.findall(rb'(?:[\x20-\x7e]\x00){6,}', data)]
+    out = _Budget(max_chars)
+    for r in runs:
+        if not out.add(r.strip()):
+            break
+    return out.text(), out.truncated
+
+
+def read_pdf(path, max_chars, max_pages):
+    import pypdf
+    reader = pypdf.PdfReader(path)
+    n = min(len(reader.pages), max_pages)
+    out = _Budget(max_chars)
+    for page in reader.pages[:n]:
+        try:
+            if not out.add(page.extract_text() or ''):
+                break
+        except Exception:
+            continue
+    return out.text(), out.truncated or len(reader.pages) > n, n
+
+
+def pdf_page_images(path, max_pages=OCR_PAGES):
+    """Largest embedded image of each of the first pages, as grayscale arrays (scanned PDFs)"""
+    import numpy as np
+    import pypdf
+    reader = pypdf.PdfReader(path)
+    images = []
+    for page in reader.pages[:max_pages]:
+        best = None
+        try:
+            for img in page.images:
+                pil = img.image
+                if pil is not None and (best is None or pil.width * pil.height > best.width * best.height):
+                    best = pil
+        except Exception:
+            continue
+        if best is not None:
+            images.append(np.asarray(best.convert('L')))
+    return images
+
+
+def _sniffs_as_text(path):
+    from content_sniffer import sniff
+    return sniff(path) == 'text/plain'
+
+
+# ---------- cached front end ----------
+
+class DocumentText:
+    """Embedded-text-first extraction shared by the AI sorter and the AI index"""
+
+    def __init__(self, cache_dir=AI_CACHE_DIR, ocr=None):
+        self.cache_dir = cache_dir
+        self._ocr = ocr
+        self._lock = threading.Lock()
+
+    @property
+    def ocr(self):
+        if self._ocr is None:
+            from ocr_service import get_ocr_service
+            self._ocr = get_ocr_service()
+        return self._ocr
+
+    def lookup(self, path, max_pages=CLASSIFY_PAGES, max_chars=CLASSIFY_BYTES, mtime=None):
+        """Cached entry for path if it is current and covers the request, else None"""
+        try:
+            mtime = os.path.getmtime(path) if mtime is None else mtime
+            with open(cache_path_for(path, self.cache_dir), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('mtime') != mtime or entry.get('text') is None:
+            return None
+        pages = entry.get('pages', LEGACY_INDEX_PAGES)
+        chars = entry.get('chars')   # None = no character limit was applied
+        covered = not entry.get('truncated', 'pages' not in entry) or (
+            pages >= max_pages and (chars is None or (max_chars is not None and chars >= max_chars)))
+        if not covered:
+            return None
+        count('text.cache_hits')
+        return entry
+
+    def extract(self, path, max_pages=CLASSIFY_PAGES, max_chars=CLASSIFY_BYTES, ocr_fallback=True,
+                large_text_bytes=LARGE_TEXT_BYTES):
+        """Extract (no cache read) and store in the shared cache. max_chars=None reads everything
+        (the index's mode). Returns the entry dict; raises for unreadable/unsupported files."""
+        ext = os.path.splitext(path)[1].lower()
+        mtime = os.path.getmtime(path)
+        pages = max_pages
+        source = 'text'
+        with span(f"text.extract{ext}"):
+            if ext in PLAIN_EXTS:
+                text, truncated = read_plain(path, max_chars, large_text_bytes)
+            elif ext == '.pdf':
+                text, truncated, pages = read_pdf(path, max_chars, max_pages)
+            elif ext == '.docx':
+                text, truncated = read_docx(path, max_chars)
+            elif ext == '.pptx':
+                text, truncated = read_pptx(path, max_chars, max_pages)
+            elif ext == '.xlsx':
+                text, truncated = read_xlsx(path, max_chars)
+            elif ext == '.odt':
+                text, truncated = read_odt(path, max_chars)
+            elif ext == '.rtf':
+                text, truncated = read_rtf(path, max_chars)
+            elif ext == '.doc':
+                text, truncated = read_doc(path, max_chars)
+            elif _sniffs_as_text(path):
+                # extension-less/unknown files the sorter routed here by content
+                text, truncated = read_plain(path, max_chars, large_text_bytes)
+            else:
+                raise ValueError(f"No text extractor for {ext or 'files without extension'}")
+
+        if not text.strip() and ext == '.pdf' and ocr_fallback and self.ocr.available:
+            # scanned PDF: OCR only the first pages' images
+            with span('text.ocr_fallback'):
+                images = pdf_page_images(path)
+                texts = [t for t in self.ocr.batch(images, kind='string', psm=3) if isinstance(t, str)]
+            text, source = '\n'.join(texts), 'ocr'
+
+        entry = {'mtime': mtime, 'text': text, 'source': source, 'pages': pages,
+                 'chars': max_chars, 'truncated': bool(truncated)}
+        self._store(path, entry)
+        return entry
+
+    def get(self, path, max_pages=CLASSIFY_PAGES, max_chars=CLASSIFY_BYTES, ocr_fallback=True):
+        entry = self.lookup(path, max_pages, max_chars)
+        if (entry is not None and ocr_fallback and entry.get('source') != 'ocr'
+                and not entry['text'].strip() and path.lower().endswith('.pdf')):
+            entry = None   # cached by the index, which never OCRs; this caller wants the scan read
+        if entry is None:
+            entry = self.extract(path, max_pages, max_chars, ocr_fallback)
+        return entry
+
+    def text(self, path, **kwargs):
+        return self.get(path, **kwargs)['text']
+
+    def _store(self, path, entry):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            target = cache_path_for(path, self.cache_dir)
+            tmp = f"{target}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, target)
+        except OSError:
+            pass
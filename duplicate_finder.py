@@ -1,37 +1,50 @@
 import hashlib
 import os
 from pathlib import Path
-from PIL import Image
-import imagehash
+
+from instrumentation import count, timed
 
 class DuplicateFinder:
     def __init__(self):
         self.hashes = {}
         
-    def hash_file(self, file_path, block_size=65536):
+    @timed('dedupe.hash_file')
+    def hash_file(self, file_path, block_size=65536, throttle=None):
         """MD5 hash for exact duplicates"""
         hasher = hashlib.md5()
         with open(file_path, 'rb') as f:
             buf = f.read(block_size)
             while buf:
+                if throttle:
+                    throttle(file_path, len(buf), 1)
                 hasher.update(buf)
                 buf = f.read(block_size)
+            count('dedupe.bytes_hashed', f.tell())
         return hasher.hexdigest()
         
+    @timed('dedupe.perceptual_hash')
     def perceptual_hash(self, image_path):
         """Perceptual hash for similar images"""
         try:
+            # PIL/imagehash are only needed here; keep them off the import path
+            import imagehash
+            from PIL import Image
             hash_val = imagehash.average_hash(Image.open(image_path))
             return str(hash_val)
         except:
             return None
             
-    def find_duplicates(self, folder_path):
+    @timed('dedupe.find_duplicates')
+    def find_duplicates(self, folder_path, checkpoint=None, throttle=None):
+        """checkpoint() is called before each file so a managed job can pause/cancel the scan;
+        throttle(path, nbytes, ops) is charged for every block read"""
         duplicates = []
         
         for file_path in Path(folder_path).rglob('*'):
+            if checkpoint:
+                checkpoint()
             if file_path.is_file():
-                file_hash = self.hash_file(str(file_path))
+                file_hash = self.hash_file(str(file_path), throttle=throttle)
                 
                 if file_hash in self.hashes:
                     self.hashes[file_hash].append(str(file_path))
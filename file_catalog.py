@@ -0,0 +1,216 @@
+"""
+RishFlow v2.0 - File Catalog
+Columnar store for scan results: one typed array per field instead of one dict per file.
+Directories, types and categories are interned (a file stores small integer ids), names
+live in one UTF-8 buffer, and sizes/mtimes in array('q')/array('d') that NumPy reads
+without copying - so sorting, filtering and aggregation run on whole columns.
+
+encode() is the wire form for the UI bridge and the service: names as one JSON list,
+numeric columns as base64 buffers and the string tables once, so neither keys nor
+directory paths are repeated per file.
+"""
+
+import base64
+import os
+from array import array
+
+import numpy as np
+
+WIRE_FORMAT = 'rishflow-catalog/1'
+SORT_KEYS = ('name', 'path', 'size', 'modified', 'type', 'category')
+
+
+class StringTable:
+    """Interned strings <-> dense ids"""
+
+    def __init__(self, values=()):
+        self.values = []
+        self._ids = {}
+        for v in values:
+            self.intern(v)
+
+    def intern(self, value):
+        i = self._ids.get(value)
+        if i is None:
+            i = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def id_of(self, value):
+        return self._ids.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class FileCatalog:
+    """Append-only columns: dir, name, size, modified, type, category"""
+
+    def __init__(self):
+        self.dirs = StringTable()
+        self.types = StringTable()
+        self.categories = StringTable([''])      # id 0: no category
+        self._names = bytearray()
+        self._name_ends = array('q')
+        self._dir = array('I')
+        self._size = array('q')
+        self._mtime = array('d')
+        self._type = array('H')
+        self._category = array('I')
+
+    def add(self, dirpath, name, size, mtime, ftype, category=''):
+        self._names += name.encode('utf-8', 'surrogateescape')
+        self._name_ends.append(len(self._names))
+        self._names += b'\0'         # file names never contain NUL: lets names() split the buffer
+        self._dir.append(self.dirs.intern(dirpath))
+        self._size.append(size)
+        self._mtime.append(mtime)
+        self._type.append(self.types.intern(ftype))
+        self._category.append(self.categories.intern(category or ''))
+
+    @classmethod
+    def from_records(cls, records):
+        cat = cls()
+        for r in records:
+            cat.add(os.path.dirname(r['path']), r['name'], r['size'], r['modified'], r['type'], r.get('category', ''))
+        return cat
+
+    def __len__(self):
+        return len(self._size)
+
+    # ---------- column access ----------
+    def column(self, field):
+        """Zero-copy NumPy view of a numeric column ('size', 'modified', or the id columns
+        'dir', 'type', 'category')"""
+        arr = {'size': self._size, 'modified': self._mtime, 'dir': self._dir,
+               'type': self._type, 'category': self._category}[field]
+        return np.frombuffer(arr, dtype=arr.typecode) if len(arr) else np.zeros(0, dtype=arr.typecode)
+
+    def name(self, i):
+        start = self._name_ends[i - 1] + 1 if i else 0
+        return self._names[start:self._name_ends[i]].decode('utf-8', 'surrogateescape')
+
+    def names(self, idx=None):
+        if idx is not None and len(idx) * 8 < len(self):
+            return [self.name(int(i)) for i in idx]
+        everything = self._names[:-1].decode('utf-8', 'surrogateescape').split('\0') if len(self) else []
+        return everything if idx is None else [everything[i] for i in np.asarray(idx).tolist()]
+
+    def path(self, i):
+        return os.path.join(self.dirs.values[self._dir[i]], self.name(i))
+
+    def record(self, i):
+        r = {'name': self.name(i), 'path': self.path(i), 'size': self._size[i],
+             'modified': self._mtime[i], 'type': self.types.values[self._type[i]]}
+        if self._category[i]:
+            r['category'] = self.categories.values[self._category[i]]
+        return r
+
+    def to_records(self, idx=None):
+        """Dicts in the scanners' historical shape (for callers that still want them)"""
+        idx = range(len(self)) if idx is None else idx
+        return [self.record(int(i)) for i in idx]
+
+    def __iter__(self):
+        return (self.record(i) for i in range(len(self)))
+
+    # ---------- queries ----------
+    def sort(self, key='name', descending=False, idx=None):
+        """Row order by one column; string columns sort by their text, ties keep scan order"""
+        if key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {key}")
+        idx = np.arange(len(self)) if idx is None else np.asarray(idx)
+        if key in ('size', 'modified'):
+            values = self.column(key)[idx]
+        elif key in ('type', 'category'):
+            table = self.types if key == 'type' else self.categories
+            # interned strings are distinct, so their inverse in np.unique is their sort rank
+            rank = np.unique(np.array(table.values, dtype=object), return_inverse=True)[1]
+            values = rank[self.column(key)[idx]]
+        else:
+            text = self.names(idx) if key == 'name' else [self.path(int(i)) for i in idx]
+            lower = [t.lower() for t in text]
+            # Python's sort beats NumPy's on strings, and stays stable with reverse=True
+            order = sorted(range(len(lower)), key=lower.__getitem__, reverse=descending)
+            return idx[np.asarray(order, dtype=np.int64)]
+        order = np.argsort(-values if descending else values, kind='stable')
+        return idx[order]
+
+    def filter(self, types=None, categories=None, min_size=None, max_size=None,
+               modified_after=None, modified_before=None, name_contains=None, under=None):
+        """Row indices matching every given condition"""
+        mask = np.ones(len(self), dtype=bool)
+        if types is not None:
+            ids = [self.types.id_of(t) for t in types]
+            mask &= np.isin(self.column('type'), [i for i in ids if i is not None])
+        if categories is not None:
+            ids = [self.categories.id_of(c) for c in categories]
+            mask &= np.isin(self.column('category'), [i for i in ids if i is not None])
+        if min_size is not None:
+            mask &= self.column('size') >= min_size
+        if max_size is not None:
+            mask &= self.column('size') <= max_size
+        if modified_after is not None:
+            mask &= self.column('modified') >= modified_after
+        if modified_before is not None:
+            mask &= self.column('modified') < modified_before
+        if under is not None:
+            prefix = os.path.abspath(under).rstrip(os.sep)
+            ok = [d == prefix or d.startswith(prefix + os.sep) for d in self.dirs.values]
+            mask &= np.asarray(ok, dtype=bool)[self.column('dir')] if ok else False
+        idx = np.flatnonzero(mask)
+        if name_contains:
+            needle = name_contains.lower()
+            idx = np.asarray([i for i in idx if needle in self.name(int(i)).lower()], dtype=np.int64)
+        return idx
+
+    def aggregate(self, by='type', idx=None):
+        """{value: {'count', 'size'}} per type or category (over `idx` rows if given)"""
+        table = {'type': self.types, 'category': self.categories}[by]
+        ids = self.column(by)
+        sizes = self.column('size')
+        if idx is not None:
+            ids, sizes = ids[idx], sizes[idx]
+        counts = np.bincount(ids, minlength=len(table))
+        totals = np.bincount(ids, weights=sizes, minlength=len(table))
+        return {table.values[i]: {'count': int(counts[i]), 'size': int(totals[i])}
+                for i in np.flatnonzero(counts)}
+
+    def largest(self, n=10, idx=None):
+        """Row indices of the n largest files, largest first"""
+        sizes = self.column('size')
+        idx = np.arange(len(self)) if idx is None else np.asarray(idx)
+        if n <= 0:
+            return idx[:0]
+        if len(idx) > n:
+            idx = idx[np.argpartition(-sizes[idx], n - 1)[:n]]
+        return idx[np.argsort(-sizes[idx], kind='stable')]
+
+    # ---------- wire ----------
+    def encode(self, idx=None):
+        """Wire form: names as a list, numeric columns as base64 little-endian buffers
+        (Float64Array/BigInt64Array-ready in JS), string tables holding only entries `idx` uses"""
+        idx = np.arange(len(self)) if idx is None else np.asarray(idx, dtype=np.int64)
+        columns = {'size': self.column('size')[idx].astype('<i8'),
+                   'modified': self.column('modified')[idx].astype('<f8')}
+        out = {'format': WIRE_FORMAT, 'count': int(len(idx)), 'names': self.names(idx)}
+        for field, key, table in (('dir', 'dirs', self.dirs), ('type', 'types', self.types),
+                                  ('category', 'categories', self.categories)):
+            used, local = np.unique(self.column(field)[idx], return_inverse=True)
+            out[key] = [table.values[i] for i in used]
+            columns[field] = local.astype('<u4')
+        out['columns'] = {k: {'dtype': v.dtype.str, 'data': base64.b64encode(v.tobytes()).decode('ascii')}
+                          for k, v in columns.items()}
+        return out
+
+    @classmethod
+    def decode(cls, wire):
+        if wire.get('format') != WIRE_FORMAT:
+            raise ValueError(f"Not a {WIRE_FORMAT} payload")
+        cols = {k: np.frombuffer(base64.b64decode(v['data']), dtype=v['dtype']) for k, v in wire['columns'].items()}
+        dirs, types, cats = wire['dirs'], wire['types'], wire['categories']
+        cat = cls()
+        for i, name in enumerate(wire['names']):
+            cat.add(dirs[cols['dir'][i]], name, int(cols['size'][i]), float(cols['modified'][i]),
+                    types[cols['type'][i]], cats[cols['category'][i]])
+        return cat
@@ -0,0 +1,254 @@
+"""
+RishFlow v2.0 - Instrumentation
+Timing spans, counters and latency percentiles per operation, plus opt-in
+cProfile / sampling-profiler capture of a single background job.
+
+Spans are off by default. While disabled, span() returns a shared no-op context
+manager (or the wrapped stage timer unchanged) and timed() calls straight through,
+so instrumented code paths cost one flag check.
+
+    from instrumentation import span, timed
+    with span('sorter.ocr'):
+        ...
+    @timed('api.scan_source')
+    def scan_source(...): ...
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+PROFILES_DIR = '.rishflow_profiles'
+RESERVOIR = 4096          # latency samples kept per operation for percentiles
+SAMPLE_INTERVAL = 0.005   # sampling profiler period in seconds
+
+_NULL = nullcontext()
+
+
+class _OpStats:
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=RESERVOIR)
+
+
+class _Span:
+    __slots__ = ('registry', 'name', 'inner', 'start')
+
+    def __init__(self, registry, name, inner):
+        self.registry = registry
+        self.name = name
+        self.inner = inner
+        self.start = 0.0
+
+    def __enter__(self):
+        if self.inner is not None:
+            self.inner.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.name, time.perf_counter() - self.start)
+        if self.inner is not None:
+            return self.inner.__exit__(*exc)
+        return False
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Instrumentation:
+    """Process-wide registry of operation latencies and counters"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._ops = {}
+        self._counters = {}
+        self.since = time.time()
+
+    def span(self, name, inner=None):
+        """Time a block as `name`. `inner` (e.g. a JobProgress stage) is entered too and
+        is returned as-is while instrumentation is disabled."""
+        if not self.enabled:
+            return inner if inner is not None else _NULL
+        return _Span(self, name, inner)
+
+    def record(self, name, seconds):
+        """Add an externally measured duration (e.g. a move result's 'seconds')"""
+        if not self.enabled:
+            return
+        with self._lock:
+            op = self._ops.get(name)
+            if op is None:
+                op = self._ops[name] = _OpStats()
+            op.count += 1
+            op.total += seconds
+            if seconds > op.max:
+                op.max = seconds
+            op.samples.append(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._ops = {}
+            self._counters = {}
+            self.since = time.time()
+
+    def summary(self):
+        """Per operation: count, total, mean and p50/p95/p99/max latency in ms"""
+        with self._lock:
+            ops = {name: (op.count, op.total, op.max, sorted(op.samples)) for name, op in self._ops.items()}
+            counters = dict(self._counters)
+        report = {}
+        for name, (count, total, mx, samples) in sorted(ops.items()):
+            report[name] = {
+                'count': count,
+                'total_s': round(total, 4),
+                'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+                'p50_ms': round(_percentile(samples, 0.50) * 1000, 3),
+                'p95_ms': round(_percentile(samples, 0.95) * 1000, 3),
+                'p99_ms': round(_percentile(samples, 0.99) * 1000, 3),
+                'max_ms': round(mx * 1000, 3),
+            }
+        return {'enabled': self.enabled, 'since': self.since, 'operations': report, 'counters': counters}
+
+
+INSTRUMENT = Instrumentation(enabled=os.environ.get('RISHFLOW_INSTRUMENT', '') not in ('', '0'))
+
+
+def span(name, inner=None):
+    return INSTRUMENT.span(name, inner)
+
+
+def record(name, seconds):
+    INSTRUMENT.record(name, seconds)
+
+
+def count(name, n=1):
+    INSTRUMENT.count(name, n)
+
+
+def timed(name):
+    """Decorator: time every call of the function as `name` while instrumentation is enabled"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENT.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                INSTRUMENT.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# ---------- profiling ----------
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval and writes folded stacks
+    ("frame;frame;frame count" lines, the input format of flamegraph.pl / speedscope).
+    Unlike cProfile it also sees the move/extraction worker pools a job starts."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name='rishflow-sampler')
+        self._thread.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ';'.join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, n in sorted(self.stacks.items(), key=lambda kv: -kv[1]):
+                f.write(f"{stack} {n}\n")
+
+
+def run_profiled(mode, name, fn, *args, **kwargs):
+    """Run fn under cProfile ('cprofile') or the sampling profiler ('sample') and save the
+    capture to PROFILES_DIR/<name>.prof|.folded (plus a readable .txt for cProfile).
+    Returns (result, capture_path)."""
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    base = os.path.join(PROFILES_DIR, name)
+    if mode == 'sample':
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+            sampler.dump(base + '.folded')
+        print(f"[profile] {sampler.samples} samples -> {base}.folded")
+        return result, base + '.folded'
+
+    import cProfile
+    import io
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(base + '.prof')
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(40)
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+    print(f"[profile] cProfile -> {base}.prof")
+    return result, base + '.prof'
+
+
+def list_profiles():
+    if not os.path.isdir(PROFILES_DIR):
+        return []
+    captures = []
+    for name in sorted(os.listdir(PROFILES_DIR)):
+        path = os.path.join(PROFILES_DIR, name)
+        captures.append({'file': path, 'size': os.path.getsize(path), 'modified': os.path.getmtime(path)})
+    return captures
@@ -0,0 +1,246 @@
+"""
+RishFlow v2.0 - I/O Scheduler
+Admission control and per-device bandwidth/IOPS budgets for background jobs.
+
+- At most `max_concurrent_jobs` jobs run at once; waiting jobs are admitted by priority.
+- Reads/writes are charged against token buckets for the device they touch.
+- Background jobs (JobManager.submit) below `idle_only_below_priority` are deferred while
+  the user is active or the machine is on battery, so RishFlow can run continuously
+  without getting in the way. Calls the user is waiting on (JobManager.run) never are.
+"""
+
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from move_engine import device_of
+
+DEFAULT_CONFIG = {
+    'max_concurrent_jobs': 2,
+    # Budgets: {'bytes_per_sec': int|None, 'iops': int|None}; None = unlimited
+    'default': {'bytes_per_sec': None, 'iops': None},
+    # Per-device overrides keyed by any path on that device, e.g. {"D:\\": {"bytes_per_sec": 20971520}}
+    'devices': {},
+    'idle_only_when_active': True,
+    'idle_only_on_battery': True,
+    'user_idle_seconds': 120,
+    'idle_only_below_priority': 10,   # organize (10) is user-initiated and never deferred
+}
+
+_STATUS_TTL = 5.0  # seconds to cache idle/battery probes
+_DEV_CACHE_ENTRIES = 4096  # directory -> st_dev entries kept by reserve()
+
+
+def user_idle_seconds():
+    """Seconds since the last keyboard/mouse input, or None if it can't be determined"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+
+            class LASTINPUTINFO(ctypes.Structure):
+                _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
+            info = LASTINPUTINFO()
+            info.cbSize = ctypes.sizeof(info)
+            if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+                return (ctypes.windll.kernel32.GetTickCount() - info.dwTime) / 1000.0
+            return None
+        if sys.platform == 'darwin':
+            out = subprocess.run(['ioreg', '-c', 'IOHIDSystem', '-d', '4'],
+                                 capture_output=True, text=True, timeout=2).stdout
+            for line in out.splitlines():
+                if 'HIDIdleTime' in line:
+                    return int(line.split('=')[-1].strip()) / 1e9
+            return None
+        if os.environ.get('DISPLAY') and shutil.which('xprintidle'):
+            out = subprocess.run(['xprintidle'], capture_output=True, text=True, timeout=2).stdout
+            return int(out.strip()) / 1000.0
+    except Exception:
+        pass
+    return None
+
+
+def on_battery():
+    """True/False when the power source is known, None otherwise"""
+    try:
+        import psutil
+        batt = psutil.sensors_battery()
+        if batt is not None:
+            return not batt.power_plugged
+    except Exception:
+        pass
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+
+            class SYSTEM_POWER_STATUS(ctypes.Structure):
+                _fields_ = [('ACLineStatus', ctypes.c_byte), ('BatteryFlag', ctypes.c_byte),
+                            ('BatteryLifePercent', ctypes.c_byte), ('SystemStatusFlag', ctypes.c_byte),
+                            ('BatteryLifeTime', ctypes.c_ulong), ('BatteryFullLifeTime', ctypes.c_ulong)]
+            status = SYSTEM_POWER_STATUS()
+            if ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+                return {0: True, 1: False}.get(status.ACLineStatus)
+        elif sys.platform.startswith('linux'):
+            mains = []
+            for p in glob.glob('/sys/class/power_supply/*'):
+                with open(os.path.join(p, 'type')) as f:
+                    if f.read().strip() == 'Mains':
+                        mains.append(p)
+            for p in mains:
+                with open(os.path.join(p, 'online')) as f:
+                    if f.read().strip() == '1':
+                        return False
+            return True if mains else None
+    except Exception:
+        pass
+    return None
+
+
+class TokenBucket:
+    """Rate limiter that lets callers go into debt and tells them how long to wait"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n):
+        """Take n tokens; returns the seconds the caller should sleep to stay within rate"""
+        if not self.rate or n <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= n
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class IOScheduler:
+    """Shared scheduler for all background jobs"""
+
+    def __init__(self, config=None):
+        self._cond = threading.Condition()
+        self._active = set()
+        self._waiting = []    # [(priority, seq, job_id)]
+        self._seq = 0
+        self._buckets = {}    # dev -> {'bytes': TokenBucket, 'ops': TokenBucket}
+        self._status_cache = {}
+        self._dev_cache = {}  # directory -> st_dev
+        self.configure(config or {})
+
+    # ---------- configuration ----------
+    def configure(self, config):
+        cfg = dict(DEFAULT_CONFIG)
+        cfg.update(config or {})
+        dev_budgets = {}
+        for path, budget in (cfg.get('devices') or {}).items():
+            dev = device_of(path)
+            if dev is not None:
+                dev_budgets[dev] = budget
+        default = cfg.get('default') or {}
+        with self._cond:
+            self.config = cfg
+            self._dev_budgets = dev_budgets
+            self._buckets = {}
+            self._limited = bool(default.get('bytes_per_sec') or default.get('iops')) or any(
+                b.get('bytes_per_sec') or b.get('iops') for b in dev_budgets.values())
+            self._cond.notify_all()
+
+    def _bucket(self, dev):
+        b = self._buckets.get(dev)
+        if b is None:
+            budget = self._dev_budgets.get(dev, self.config.get('default') or {})
+            b = self._buckets[dev] = {
+                'bytes': TokenBucket(budget.get('bytes_per_sec')),
+                'ops': TokenBucket(budget.get('iops')),
+            }
+        return b
+
+    # ---------- admission ----------
+    def acquire(self, job, should_abort=lambda: False):
+        """Block until job may run: a free slot and no higher-priority waiter ahead of it"""
+        with self._cond:
+            self._seq += 1
+            entry = (-job.priority, self._seq, job.job_id)
+            self._waiting.append(entry)
+            try:
+                while True:
+                    if should_abort():
+                        return False
+                    limit = max(1, int(self.config.get('max_concurrent_jobs') or 1))
+                    if len(self._active) < limit and min(self._waiting) == entry:
+                        self._active.add(job.job_id)
+                        return True
+                    job.state = 'queued'
+                    self._cond.wait(0.5)
+            finally:
+                self._waiting.remove(entry)
+                self._cond.notify_all()
+
+    def release(self, job):
+        with self._cond:
+            self._active.discard(job.job_id)
+            self._cond.notify_all()
+
+    # ---------- idle-only mode ----------
+    def _probe(self, name, fn):
+        cached = self._status_cache.get(name)
+        now = time.monotonic()
+        if cached and now - cached[0] < _STATUS_TTL:
+            return cached[1]
+        value = fn()
+        self._status_cache[name] = (now, value)
+        return value
+
+    def idle_only_reason(self):
+        """Why background work is currently restricted, or None"""
+        cfg = self.config
+        if cfg.get('idle_only_on_battery') and self._probe('battery', on_battery):
+            return 'on_battery'
+        if cfg.get('idle_only_when_active'):
+            idle = self._probe('idle', user_idle_seconds)
+            if idle is not None and idle < cfg.get('user_idle_seconds', 120):
+                return 'user_active'
+        return None
+
+    def must_defer(self, job):
+        """True while a background job should sit out because the machine isn't idle"""
+        if not job.background or job.priority >= self.config.get('idle_only_below_priority', 10):
+            return False
+        return self.idle_only_reason() is not None
+
+    # ---------- throttling ----------
+    def reserve(self, path, nbytes=0, ops=1):
+        """Charge an I/O against path's device; returns seconds to sleep"""
+        if not self._limited:
+            return 0.0
+        directory = os.path.dirname(os.path.abspath(path))
+        dev = self._dev_cache.get(directory)
+        if dev is None:
+            dev = device_of(directory)
+            if len(self._dev_cache) >= _DEV_CACHE_ENTRIES:
+                self._dev_cache.clear()
+            self._dev_cache[directory] = dev
+        with self._cond:
+            b = self._bucket(dev)
+        return max(b['bytes'].reserve(nbytes), b['ops'].reserve(ops))
+
+    def status(self):
+        with self._cond:
+            active = sorted(self._active)
+            waiting = [job_id for _, _, job_id in sorted(self._waiting)]
+            budgets = {str(dev): {'bytes_per_sec': b['bytes'].rate, 'iops': b['ops'].rate}
+                       for dev, b in self._buckets.items()}
+        return {
+            'config': self.config,
+            'active_jobs': active,
+            'waiting_jobs': waiting,
+            'idle_only_reason': self.idle_only_reason(),
+            'device_budgets': budgets,
+        }
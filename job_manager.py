@@ -0,0 +1,283 @@
+"""
+RishFlow v2.0 - Background Job Manager
+Cancel / pause / resume / priority for long-running work (organize, AI index, duplicate scans).
+
+Control is cooperative: job code calls `job.checkpoint()` at safe points (between files,
+before submitting a move). That is where a cancel raises JobCancelled and where a paused
+or preempted job blocks.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from instrumentation import record, run_profiled
+
+# Default priorities: higher runs first, lower-priority jobs wait at checkpoints
+PRIORITY_ORGANIZE = 10
+PRIORITY_DEDUPE = 5
+PRIORITY_INDEX = 0
+
+
+class JobCancelled(Exception):
+    """Raised from BackgroundJob.checkpoint() once a job has been cancelled"""
+
+
+def process_rss_bytes():
+    """Resident set size of this process, or None where it can't be read cheaply"""
+    try:
+        if sys.platform.startswith('linux'):
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        import resource
+        # ru_maxrss is peak, in KB on Linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except Exception:
+        return None
+
+
+class BackgroundJob:
+    """Handle for one managed job; passed to the job function as its first argument"""
+
+    def __init__(self, manager, job_id, kind, description='', priority=0, background=True):
+        self.manager = manager
+        self.job_id = job_id
+        self.kind = kind
+        self.description = description
+        self.priority = priority
+        self.background = background  # False for run(): someone is waiting, never idle-deferred
+        self.state = 'queued'
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.result = None
+        self.profile = None  # capture file when this job was profiled
+        self.files = 0
+        self.bytes = 0
+        self.cpu_seconds = 0.0
+        self._cpu_start = None
+        self._cancel = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        self.thread = None
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def add_io(self, files=0, nbytes=0):
+        """Account work done, reported by list_jobs()"""
+        self.files += files
+        self.bytes += nbytes
+
+    def _update_cpu(self):
+        # thread_time() is per-thread, so only the job's own thread can sample it
+        if self._cpu_start is not None and threading.current_thread() is self.thread:
+            self.cpu_seconds = time.thread_time() - self._cpu_start
+
+    def checkpoint(self):
+        """Cooperative control point: raises JobCancelled, blocks while paused, preempted
+        or deferred by the scheduler's idle-only mode"""
+        self._update_cpu()
+        while True:
+            if self._cancel.is_set():
+                raise JobCancelled(self.job_id)
+            if not self._resume.is_set():
+                self.state = 'paused'
+                self._resume.wait(0.5)
+                continue
+            if self.manager._preempted(self):
+                self.state = 'waiting'
+                time.sleep(0.2)
+                continue
+            scheduler = self.manager.scheduler
+            if scheduler and scheduler.must_defer(self):
+                # idle-only mode: sit out until the user is away / back on AC
+                self.state = 'deferred'
+                self._cancel.wait(1.0)
+                continue
+            self.state = 'running'
+            return
+
+    def throttle(self, path, nbytes=0, ops=1):
+        """Charge an I/O on path against the scheduler's device budget, sleeping if over it.
+        Wakes early on cancel; the next checkpoint() then raises."""
+        scheduler = self.manager.scheduler
+        if not scheduler:
+            return
+        wait = scheduler.reserve(path, nbytes, ops)
+        if wait > 0:
+            self._cancel.wait(wait)
+
+    def to_dict(self):
+        elapsed = None
+        if self.started:
+            elapsed = round((self.finished or time.time()) - self.started, 3)
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'description': self.description,
+            'priority': self.priority,
+            'state': self.state,
+            'created': self.created,
+            'elapsed': elapsed,
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'files': self.files,
+            'bytes': self.bytes,
+            'error': self.error,
+            'profile': self.profile,
+        }
+
+
+class JobManager:
+    """Registry and control channel for background jobs"""
+
+    def __init__(self, keep_finished=50, scheduler=None):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.keep_finished = keep_finished
+        self.scheduler = scheduler  # optional IOScheduler: admission, I/O budgets, idle-only mode
+        self._profile_next = None   # (kind or None, mode) armed by profile_next()
+
+    def _new_job(self, kind, description, priority, job_id, background=True):
+        job_id = job_id or f"{kind}-{uuid.uuid4().hex[:8]}"
+        job = BackgroundJob(self, job_id, kind, description, priority, background)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+        return job
+
+    def _prune(self):
+        done = [j for j in self._jobs.values() if j.finished]
+        for j in sorted(done, key=lambda j: j.finished)[:max(0, len(done) - self.keep_finished)]:
+            self._jobs.pop(j.job_id, None)
+
+    def _execute(self, job, target, args, kwargs):
+        job.thread = threading.current_thread()
+        job.started = time.time()
+        job._cpu_start = time.thread_time()
+        admitted = False
+        try:
+            if self.scheduler:
+                admitted = self.scheduler.acquire(job, should_abort=lambda: job.cancelled)
+                if not admitted:
+                    raise JobCancelled(job.job_id)
+            job.checkpoint()
+            profile_mode = self._take_profile(job)
+            if profile_mode:
+                job.result, job.profile = run_profiled(profile_mode, job.job_id, target, job, *args, **kwargs)
+            else:
+                job.result = target(job, *args, **kwargs)
+            job.state = 'cancelled' if job.cancelled else 'completed'
+        except JobCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+            print(f"[jobs] {job.job_id} failed: {e}")
+        finally:
+            if admitted:
+                self.scheduler.release(job)
+            job._update_cpu()
+            job.finished = time.time()
+            record(f"job.{job.kind}", job.finished - job.started)
+        return job.result
+
+    def submit(self, kind, target, args=(), kwargs=None, priority=0, description='', job_id=None):
+        """Run target(job, *args, **kwargs) in a daemon thread"""
+        job = self._new_job(kind, description, priority, job_id)
+        t = threading.Thread(target=self._execute, args=(job, target, args, kwargs or {}), daemon=True)
+        job.thread = t
+        t.start()
+        return job
+
+    def run(self, kind, target, args=(), kwargs=None, priority=0, description='', job_id=None):
+        """Run target(job, ...) in the calling thread while registered (for blocking API calls).
+        Returns (job, result). Such jobs are never deferred by the scheduler's idle-only mode."""
+        job = self._new_job(kind, description, priority, job_id, background=False)
+        result = self._execute(job, target, args, kwargs or {})
+        return job, result
+
+    def profile_next(self, kind=None, mode='cprofile'):
+        """Capture a profile of the next job of `kind` (any kind if None).
+        mode: 'cprofile' (job thread only, exact call counts) or 'sample' (all threads)."""
+        if mode not in ('cprofile', 'sample'):
+            raise ValueError(f"Unknown profile mode: {mode}")
+        with self._lock:
+            self._profile_next = (kind, mode)
+
+    def _take_profile(self, job):
+        with self._lock:
+            armed = self._profile_next
+            if armed and armed[0] in (None, job.kind):
+                self._profile_next = None
+                return armed[1]
+        return None
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _preempted(self, job):
+        """A job yields while a higher-priority job is actively running"""
+        with self._lock:
+            return any(o is not job and o.state == 'running' and o.priority > job.priority
+                       for o in self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job._cancel.set()
+        job._resume.set()
+        job.state = 'cancelling'
+        return True
+
+    def pause(self, job_id):
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job._resume.clear()
+        return True
+
+    def resume(self, job_id):
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job._resume.set()
+        return True
+
+    def set_priority(self, job_id, priority):
+        job = self.get(job_id)
+        if not job:
+            return False
+        job.priority = int(priority)
+        return True
+
+    def list_jobs(self, include_finished=True):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if not include_finished:
+            jobs = [j for j in jobs if not j.finished]
+        jobs.sort(key=lambda j: (j.finished is not None, -j.priority, j.created))
+        return [j.to_dict() for j in jobs]
@@ -0,0 +1,125 @@
+"""
+RishFlow v2.0 - Job Progress
+Live progress, per-stage timing and throughput for long-running jobs
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class JobProgress:
+    """Thread-safe progress/metrics collector for one job.
+
+    Stage timers are exclusive: time spent in a nested stage (e.g. 'ocr' inside
+    'classify') is counted only for the inner stage.
+    """
+
+    def __init__(self, job_id, push=None, push_interval=0.5):
+        self.job_id = job_id
+        self.push = push                  # callable(snapshot) for throttled UI updates
+        self.push_interval = push_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started = time.perf_counter()
+        self.phase = 'starting'
+        self.phase_started = self.started
+        self.files_total = 0
+        self.bytes_total = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.queues = {}
+        self._last_push = 0.0
+        self.finished = None
+
+    def start_phase(self, name, files_total=0, bytes_total=0):
+        """Switch phase; rates and ETA are measured per phase"""
+        with self._lock:
+            self.phase = name
+            self.phase_started = time.perf_counter()
+            self.files_total = files_total
+            self.bytes_total = bytes_total
+            self.files_done = 0
+            self.bytes_done = 0
+        self.maybe_push(force=True)
+
+    def finish(self, phase='completed'):
+        """Mark the job finished, keeping the last phase's counters for the final report"""
+        with self._lock:
+            self.phase = phase
+            self.finished = time.perf_counter()
+        self.maybe_push(force=True)
+
+    def advance(self, files=1, nbytes=0):
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += nbytes
+        self.maybe_push()
+
+    def add_stage_time(self, name, seconds):
+        with self._lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as `name`, excluding time spent in nested stages"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = [time.perf_counter(), 0.0]  # start, time spent in children
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if stack:
+                stack[-1][1] += elapsed
+            self.add_stage_time(name, elapsed - frame[1])
+
+    def set_queue(self, name, depth):
+        with self._lock:
+            self.queues[name] = depth
+
+    def snapshot(self):
+        with self._lock:
+            now = self.finished or time.perf_counter()
+            phase_elapsed = max(now - self.phase_started, 1e-9)
+            files_per_s = self.files_done / phase_elapsed
+            bytes_per_s = self.bytes_done / phase_elapsed
+            eta = None
+            if self.files_total and files_per_s > 0:
+                eta = max(self.files_total - self.files_done, 0) / files_per_s
+            return {
+                'job_id': self.job_id,
+                'phase': self.phase,
+                'elapsed': round(now - self.started, 3),
+                'phase_elapsed': round(phase_elapsed, 3),
+                'files_done': self.files_done,
+                'files_total': self.files_total,
+                'bytes_done': self.bytes_done,
+                'bytes_total': self.bytes_total,
+                'files_per_s': round(files_per_s, 2),
+                'bytes_per_s': round(bytes_per_s, 1),
+                'eta_seconds': round(eta, 1) if eta is not None else None,
+                'stage_seconds': {k: round(v, 4) for k, v in self.stage_seconds.items()},
+                'stage_calls': dict(self.stage_calls),
+                'queues': dict(self.queues),
+            }
+
+    def maybe_push(self, force=False):
+        """Push a snapshot if push_interval has passed since the last one"""
+        if not self.push:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._last_push < self.push_interval:
+                return
+            self._last_push = now
+        try:
+            self.push(self.snapshot())
+        except Exception:
+            pass
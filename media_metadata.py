@@ -0,0 +1,558 @@
+"""
+RishFlow v2.0 - Media Metadata
+Capture date, camera, resolution and duration read from file headers only - pixels and
+samples are never decoded, and large payloads (JPEG scans, mdat, cover art) are skipped
+with seeks, so a file costs a few KB of reads however big it is.
+
+  JPEG           EXIF (APP1) date/camera, SOF dimensions
+  TIFF/DNG       EXIF IFDs
+  HEIC/HEIF/AVIF 'meta' box: Exif item via iinf/iloc, 'ispe' dimensions
+  MP4/MOV/M4A    'mvhd' creation time and duration, 'tkhd' dimensions, iTunes 'ilst' tags
+  MP3            ID3v2/ID3v1 tags, duration from TLEN, a Xing/VBRI header or the CBR bitrate
+  FLAC           STREAMINFO duration, Vorbis comments
+  WAV            'fmt '/'data' chunks
+  PNG/GIF/BMP/WebP dimensions
+
+read_metadata() returns only the fields it found: kind ('image', 'video' or 'audio'),
+captured (epoch seconds), camera, width, height, duration (seconds), artist, album,
+title, year. MediaMetadata caches results per (path, mtime, size) and reads in parallel.
+"""
+
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from content_sniffer import HEAD_BYTES, sniff_bytes
+
+MAX_SEGMENT = 256 * 1024        # largest header structure read into memory (EXIF, tags)
+CACHE_ENTRIES = 100_000
+MAC_EPOCH = 2082844800          # seconds from 1904-01-01 (QuickTime) to 1970-01-01
+SORT_MODES = ("Capture Date", "Camera Model", "Resolution", "Duration")
+
+# EXIF tags we keep
+_EXIF_TAGS = {0x010F: 'make', 0x0110: 'model', 0x0132: 'datetime', 0x9003: 'original',
+              0x0100: 'width', 0x0101: 'height', 0xA002: 'width', 0xA003: 'height'}
+_EXIF_IFD = 0x8769
+_EXIF_TEXT = {'make', 'model', 'datetime', 'original'}     # ASCII (type 2); the rest are SHORT/LONG
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 7: 1, 9: 4}
+_ID3_FRAMES = {'TIT2': 'title', 'TPE1': 'artist', 'TALB': 'album', 'TDRC': 'year', 'TYER': 'year',
+               'TLEN': 'tlen', 'TT2': 'title', 'TP1': 'artist', 'TAL': 'album', 'TYE': 'year', 'TLE': 'tlen'}
+_VORBIS = {'TITLE': 'title', 'ARTIST': 'artist', 'ALBUM': 'album', 'DATE': 'year'}
+_ILST = {b'\xa9nam': 'title', b'\xa9ART': 'artist', b'\xa9alb': 'album', b'\xa9day': 'year'}
+# MPEG audio layer III: bitrates (kbps) for MPEG-1 and MPEG-2/2.5, sample rates per version
+_MP3_BITRATES = {1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+                 2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]}
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _exif_date(text):
+    """'YYYY:MM:DD HH:MM:SS' (local time, as cameras write it) -> epoch seconds"""
+    try:
+        return datetime.strptime(text.strip()[:19], '%Y:%m:%d %H:%M:%S').timestamp()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _mac_date(seconds):
+    return seconds - MAC_EPOCH if seconds > MAC_EPOCH else None
+
+
+# ---------- TIFF / EXIF ----------
+def _read_ifd(buf, offset, e, out):
+    """Wanted tags of one IFD into out; returns the Exif sub-IFD offset if present"""
+    (count,) = struct.unpack_from(e + 'H', buf, offset)
+    sub = None
+    for i in range(min(count, 512)):
+        tag, typ, n = struct.unpack_from(e + 'HHI', buf, offset + 2 + 12 * i)
+        if tag != _EXIF_IFD and tag not in _EXIF_TAGS:
+            continue
+        size = _TYPE_SIZES.get(typ, 0) * n
+        at = offset + 2 + 12 * i + 8
+        if size > 4:
+            (at,) = struct.unpack_from(e + 'I', buf, at)
+        # a tag stored with an unexpected type (a numeric Make, a text width) is ignored
+        text = tag != _EXIF_IFD and _EXIF_TAGS[tag] in _EXIF_TEXT
+        if typ == 2 and text:
+            out.setdefault(_EXIF_TAGS[tag], bytes(buf[at:at + size]).split(b'\0')[0].decode('latin-1').strip())
+        elif typ in (3, 4) and n and not text:
+            (value,) = struct.unpack_from(e + ('H' if typ == 3 else 'I'), buf, at)
+            if tag == _EXIF_IFD:
+                sub = value
+            else:
+                out[_EXIF_TAGS[tag]] = value
+    return sub
+
+
+def parse_exif(buf):
+    """Fields from a TIFF-structured EXIF block ('II*\\0' / 'MM\\0*' header)"""
+    e = {b'II': '<', b'MM': '>'}.get(bytes(buf[:2]))
+    if e is None:
+        return {}
+    tags = {}
+    try:
+        (ifd0,) = struct.unpack_from(e + 'I', buf, 4)
+        sub = _read_ifd(buf, ifd0, e, tags)
+        if sub:
+            exif = {}
+            _read_ifd(buf, sub, e, exif)
+            tags.update(exif)
+    except (struct.error, IndexError):
+        pass                    # truncated or odd EXIF: keep what was read
+    meta = {}
+    captured = _exif_date(tags.get('original') or tags.get('datetime') or '')
+    if captured:
+        meta['captured'] = captured
+    make, model = tags.get('make', ''), tags.get('model', '')
+    camera = model if model.lower().startswith(make.lower()) else f"{make} {model}"
+    if camera.strip():
+        meta['camera'] = camera.strip()
+    if tags.get('width') and tags.get('height'):
+        meta['width'], meta['height'] = tags['width'], tags['height']
+    return meta
+
+
+def _read_jpeg(f):
+    meta = {'kind': 'image'}
+    f.seek(2)
+    while True:
+        head = f.read(4)
+        if len(head) < 4 or head[0] != 0xFF:
+            break
+        marker, length = head[1], struct.unpack('>H', head[2:])[0]
+        if marker == 0xDA or marker == 0xD9:            # start of scan: only pixel data follows
+            break
+        if marker == 0xE1 and 'exif' not in meta and length <= MAX_SEGMENT:
+            data = f.read(length - 2)
+            if data.startswith(b'Exif\0\0'):
+                meta['exif'] = True
+                exif = parse_exif(memoryview(data)[6:])
+                exif.pop('width', None), exif.pop('height', None)   # SOF is authoritative
+                meta.update(exif)
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            sof = f.read(5)
+            meta['height'], meta['width'] = struct.unpack('>HH', sof[1:5])
+            break
+        f.seek(length - 2, os.SEEK_CUR)
+    meta.pop('exif', None)
+    return meta
+
+
+def _read_tiff(f):
+    buf = f.read(MAX_SEGMENT)
+    meta = {'kind': 'image'}
+    meta.update(parse_exif(buf))
+    return meta
+
+
+# ---------- ISO base media (MP4, MOV, M4A, HEIC) ----------
+def _boxes(f, start, end):
+    """(type, payload_start, payload_end) of the boxes in [start, end), reading headers only"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        head = f.read(8)
+        if len(head) < 8:
+            return
+        size, kind = struct.unpack('>I4s', head)
+        body = pos + 8
+        if size == 1:
+            (size,) = struct.unpack('>Q', f.read(8))
+            body += 8
+        elif size == 0:
+            size = end - pos
+        if size < body - pos:
+            return
+        yield kind, body, min(pos + size, end)
+        pos += size
+
+
+def _child(f, start, end, kind):
+    for k, s, e in _boxes(f, start, end):
+        if k == kind:
+            return s, e
+    return None
+
+
+def _read_ilst(f, start, end, meta):
+    for kind, s, e in _boxes(f, start, end):
+        field = _ILST.get(kind)
+        data = _child(f, s, e, b'data') if field else None
+        if data and data[1] - data[0] > 8:
+            f.seek(data[0] + 8)                         # type indicator + locale
+            meta.setdefault(field, f.read(min(data[1] - data[0] - 8, 1024)).decode('utf-8', 'replace'))
+
+
+def _read_moov(f, start, end, meta):
+    for kind, s, e in _boxes(f, start, end):
+        f.seek(s)
+        if kind == b'mvhd':
+            body = f.read(32)
+            if body[0] == 1:
+                created, _, scale, duration = struct.unpack('>QQIQ', body[4:32])
+            else:
+                created, _, scale, duration = struct.unpack('>IIII', body[4:20])
+            if _mac_date(created):
+                meta['captured'] = _mac_date(created)
+            if scale:
+                meta['duration'] = duration / scale
+        elif kind == b'trak':
+            tkhd = _child(f, s, e, b'tkhd')
+            if tkhd and tkhd[1] - tkhd[0] >= 84:
+                f.seek(tkhd[1] - 8)
+                w, h = struct.unpack('>II', f.read(8))
+                w, h = w >> 16, h >> 16                 # 16.16 fixed point
+                if w * h > meta.get('width', 0) * meta.get('height', 0):
+                    meta['width'], meta['height'] = w, h
+        elif kind == b'udta':
+            m = _child(f, s, e, b'meta')
+            ilst = m and _child(f, m[0] + 4, m[1], b'ilst')     # 'meta' is a full box here
+            if ilst:
+                _read_ilst(f, ilst[0], ilst[1], meta)
+
+
+def _read_heif_meta(f, start, end, meta):
+    start += 4                                          # full box: version + flags
+    exif_ids, locations = set(), {}
+    for kind, s, e in _boxes(f, start, end):
+        f.seek(s)
+        if kind == b'iinf':
+            version = f.read(4)[0]
+            for ik, i_s, i_e in _boxes(f, s + (6 if version == 0 else 8), e):
+                f.seek(i_s)
+                body = f.read(min(i_e - i_s, 16))
+                if ik == b'infe' and body[0] >= 2:
+                    item_id, at = (struct.unpack('>H', body[4:6])[0], 8) if body[0] == 2 else \
+                        (struct.unpack('>I', body[4:8])[0], 10)
+                    if body[at:at + 4] == b'Exif':
+                        exif_ids.add(item_id)
+        elif kind == b'iloc':
+            body = f.read(min(e - s, MAX_SEGMENT))
+            version = body[0]
+            off_size, len_size = body[4] >> 4, body[4] & 15
+            base_size, idx_size = body[5] >> 4, (body[5] & 15 if version in (1, 2) else 0)
+            pos = 6
+
+            def num(n):
+                nonlocal pos
+                v = int.from_bytes(body[pos:pos + n], 'big') if n else 0
+                pos += n
+                return v
+            count = num(2 if version < 2 else 4)
+            for _ in range(count):
+                item_id = num(2 if version < 2 else 4)
+                if version in (1, 2):
+                    num(2)                              # construction method
+                num(2)                                  # data reference index
+                base = num(base_size)
+                extents = [(num(idx_size), num(off_size), num(len_size))[1:] for _ in range(num(2))]
+                if extents:
+                    locations[item_id] = (base + extents[0][0], extents[0][1])
+        elif kind == b'iprp':
+            ipco = _child(f, s, e, b'ipco')
+            for pk, p_s, _ in (_boxes(f, *ipco) if ipco else ()):
+                if pk == b'ispe':
+                    f.seek(p_s + 4)
+                    w, h = struct.unpack('>II', f.read(8))
+                    if w * h > meta.get('width', 0) * meta.get('height', 0):
+                        meta['width'], meta['height'] = w, h
+    for item_id in exif_ids:
+        if item_id in locations:
+            offset, length = locations[item_id]
+            f.seek(offset)
+            data = f.read(min(length, MAX_SEGMENT))
+            if len(data) > 4:
+                skip = 4 + struct.unpack('>I', data[:4])[0]     # exif_tiff_header_offset
+                exif = parse_exif(memoryview(data)[skip:])
+                exif.pop('width', None), exif.pop('height', None)
+                meta.update(exif)
+            break
+
+
+def _read_bmff(f, size, kind):
+    meta = {'kind': kind}
+    for box, s, e in _boxes(f, 0, size):
+        if box == b'moov':
+            _read_moov(f, s, e, meta)
+        elif box == b'meta':
+            _read_heif_meta(f, s, e, meta)
+    if kind == 'audio':
+        meta.pop('width', None), meta.pop('height', None)
+    return meta
+
+
+# ---------- audio ----------
+def _id3_text(frame):
+    enc, raw = frame[0], frame[1:]
+    if enc in (1, 2):
+        text = raw.decode('utf-16' if enc == 1 else 'utf-16-be', 'replace')
+    else:
+        text = raw.decode('utf-8' if enc == 3 else 'latin-1', 'replace')
+    return text.replace('﻿', '').split('\0')[0].strip()
+
+
+def _mp3_duration(f, start, size):
+    f.seek(start)
+    head = f.read(4096)
+    i = 0
+    while i + 4 <= len(head):
+        if head[i] == 0xFF and head[i + 1] & 0xE0 == 0xE0:
+            version, layer = (head[i + 1] >> 3) & 3, (head[i + 1] >> 1) & 3
+            br_idx, sr_idx = head[i + 2] >> 4, (head[i + 2] >> 2) & 3
+            if layer == 1 and version != 1 and 0 < br_idx < 15 and sr_idx < 3:    # layer III
+                rate = _MP3_RATES[version][sr_idx]
+                per_frame = 1152 if version == 3 else 576
+                mono = (head[i + 3] >> 6) == 3
+                side = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+                xing = head[i + 4 + side:i + 16 + side]
+                if xing[:4] in (b'Xing', b'Info') and struct.unpack('>I', xing[4:8])[0] & 1:
+                    return struct.unpack('>I', xing[8:12])[0] * per_frame / rate
+                if head[i + 36:i + 40] == b'VBRI':
+                    return struct.unpack('>I', head[i + 50:i + 54])[0] * per_frame / rate
+                kbps = _MP3_BITRATES[1 if version == 3 else 2][br_idx]
+                return (size - start - i) * 8 / (kbps * 1000)
+        i += 1
+    return None
+
+
+def _read_mp3(f, size):
+    meta = {'kind': 'audio'}
+    head = f.read(10)
+    audio_start = 0
+    if head[:3] == b'ID3':
+        major = head[3]
+        tag_size = sum((b & 0x7F) << (7 * (3 - i)) for i, b in enumerate(head[6:10]))
+        audio_start = 10 + tag_size
+        id_len, hdr_len = (3, 6) if major == 2 else (4, 10)
+        pos, end = 10, min(audio_start, size)
+        if head[5] & 0x40 and major > 2:               # extended header
+            ext = f.read(4)
+            pos += (sum((b & 0x7F) << (7 * (3 - i)) for i, b in enumerate(ext)) if major == 4
+                    else 4 + int.from_bytes(ext, 'big'))
+        while pos + hdr_len <= end:
+            f.seek(pos)
+            fh = f.read(hdr_len)
+            fid = fh[:id_len].decode('latin-1')
+            if not fid.strip('\0'):
+                break                                   # padding
+            raw = fh[id_len:id_len + (3 if major == 2 else 4)]
+            flen = sum((b & 0x7F) << (7 * (3 - i)) for i, b in enumerate(raw)) if major == 4 \
+                else int.from_bytes(raw, 'big')
+            field = _ID3_FRAMES.get(fid)
+            if field and flen <= 4096:
+                meta.setdefault(field, _id3_text(f.read(flen)))
+            pos += hdr_len + flen                       # cover art and the rest are skipped
+    if 'title' not in meta and size >= 128:
+        f.seek(size - 128)
+        v1 = f.read(128)
+        if v1[:3] == b'TAG':
+            for field, (a, b) in (('title', (3, 33)), ('artist', (33, 63)), ('album', (63, 93)),
+                                  ('year', (93, 97))):
+                value = v1[a:b].split(b'\0')[0].decode('latin-1').strip()
+                if value:
+                    meta.setdefault(field, value)
+    tlen = meta.pop('tlen', '')
+    duration = int(tlen) / 1000 if tlen.isdigit() else _mp3_duration(f, audio_start, size)
+    if duration:
+        meta['duration'] = duration
+    return meta
+
+
+def _read_flac(f, size):
+    meta = {'kind': 'audio'}
+    pos = 4
+    while pos + 4 <= size:
+        f.seek(pos)
+        head = f.read(4)
+        last, kind, length = head[0] & 0x80, head[0] & 0x7F, int.from_bytes(head[1:4], 'big')
+        if kind == 0:
+            info = f.read(18)
+            packed = int.from_bytes(info[10:18], 'big')
+            rate, total = packed >> 44, packed & ((1 << 36) - 1)
+            if rate and total:
+                meta['duration'] = total / rate
+        elif kind == 4 and length <= MAX_SEGMENT:
+            block = f.read(length)
+            (vendor,) = struct.unpack_from('<I', block, 0)
+            at = 4 + vendor
+            (count,) = struct.unpack_from('<I', block, at)
+            at += 4
+            for _ in range(min(count, 1024)):
+                (n,) = struct.unpack_from('<I', block, at)
+                key, _, value = block[at + 4:at + 4 + n].decode('utf-8', 'replace').partition('=')
+                at += 4 + n
+                if key.upper() in _VORBIS:
+                    meta.setdefault(_VORBIS[key.upper()], value)
+        if last:
+            break
+        pos += 4 + length                               # pictures and padding are skipped
+    return meta
+
+
+def _read_wav(f, size):
+    meta = {'kind': 'audio'}
+    byte_rate = None
+    pos = 12
+    while pos + 8 <= size:
+        f.seek(pos)
+        kind, length = struct.unpack('<4sI', f.read(8))
+        if kind == b'fmt ':
+            byte_rate = struct.unpack('<I', f.read(12)[8:12])[0]
+        elif kind == b'data':
+            if byte_rate:
+                meta['duration'] = min(length, size - pos - 8) / byte_rate
+            break
+        pos += 8 + length + (length & 1)
+    return meta
+
+
+# ---------- other images ----------
+def _image_size(head, mime):
+    if mime == 'image/png' and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    if mime == 'image/gif':
+        return struct.unpack('<HH', head[6:10])
+    if mime == 'image/bmp':
+        w, h = struct.unpack('<ii', head[18:26])
+        return w, abs(h)
+    if mime == 'image/webp':
+        chunk = head[12:16]
+        if chunk == b'VP8X':
+            return (int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1)
+        if chunk == b'VP8 ':
+            w, h = struct.unpack('<HH', head[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(head[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+def read_metadata(path):
+    """Header fields of one media file ({} when it is not media or cannot be parsed)"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(HEAD_BYTES)
+            mime = sniff_bytes(head)
+            f.seek(0)
+            if mime == 'image/jpeg':
+                return _read_jpeg(f)
+            if mime == 'image/tiff':
+                return _read_tiff(f)
+            if mime in ('image/heic', 'image/heif', 'image/avif'):
+                return _read_bmff(f, size, 'image')
+            if mime in ('video/mp4', 'video/quicktime', 'audio/mp4'):
+                return _read_bmff(f, size, mime.split('/')[0])
+            if mime == 'audio/mpeg':
+                return _read_mp3(f, size)
+            if mime == 'audio/flac':
+                return _read_flac(f, size)
+            if mime == 'audio/wav':
+                return _read_wav(f, size)
+            dims = _image_size(head, mime)
+            if dims:
+                return {'kind': 'image', 'width': dims[0], 'height': dims[1]}
+            if mime.startswith(('video/', 'audio/', 'image/')):
+                return {'kind': mime.split('/')[0]}
+    except Exception as e:
+        # malformed headers can fail in any parser in any way; the file is just not media
+        print(f"[media] {path}: {e}")
+    return {}
+
+
+class MediaMetadata:
+    """read_metadata with an in-memory cache keyed by (path, mtime, size), plus parallel reads"""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, path, st=None):
+        st = st or os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            meta = self._cache.get(key)
+            if meta is not None:
+                self._cache.move_to_end(key)
+                return meta
+        meta = read_metadata(path)
+        with self._lock:
+            self._cache[key] = meta
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return meta
+
+    def read_many(self, paths, workers=8):
+        """{path: metadata}; the small header reads are issued in parallel"""
+        paths = list(paths)
+
+        def one(p):
+            try:
+                return self.read(p)
+            except OSError:
+                return {}
+        if len(paths) < 4 or workers <= 1:
+            return {p: one(p) for p in paths}
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths)), thread_name_prefix='rishflow-media') as pool:
+            return dict(zip(paths, pool.map(one, paths)))
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_media_metadata():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MediaMetadata()
+        return _shared
+
+
+# ---------- sort modes ----------
+def safe_name(name):
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', name).strip(' .') or 'Unknown'
+
+
+def resolution_label(meta):
+    w, h = meta.get('width'), meta.get('height')
+    if not w or not h:
+        return None
+    if meta.get('kind') == 'video':
+        short = min(w, h)
+        for limit, label in ((4320, '8K'), (2160, '4K'), (1440, '1440p'), (1080, '1080p'), (720, '720p')):
+            if short >= limit:
+                return label
+        return 'SD'
+    mp = w * h / 1e6
+    for limit, label in ((24, '24+ MP'), (12, '12-24 MP'), (6, '6-12 MP'), (2, '2-6 MP')):
+        if mp >= limit:
+            return label
+    return 'Under 2 MP'
+
+
+def duration_label(seconds):
+    for limit, label in ((60, 'Under 1 min'), (300, '1-5 min'), (1800, '5-30 min'), (3600, '30-60 min')):
+        if seconds < limit:
+            return label
+    return 'Over 1 hour'
+
+
+def folder_for(sort_mode, meta, st):
+    """Destination folder for one of SORT_MODES"""
+    if sort_mode == "Capture Date":
+        # files without a capture date fall back to their modification time, like "Date Modified"
+        return datetime.fromtimestamp(meta.get('captured') or st.st_mtime).strftime("%Y-%m-%d")
+    if sort_mode == "Camera Model":
+        return safe_name(meta['camera']) if meta.get('camera') else "Unknown Camera"
+    if sort_mode == "Resolution":
+        return resolution_label(meta) or "Unknown Resolution"
+    if sort_mode == "Duration":
+        return duration_label(meta['duration']) if meta.get('duration') else "No Duration"
+    raise ValueError(f"Unknown media sort mode: {sort_mode}")
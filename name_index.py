@@ -0,0 +1,330 @@
+"""
+RishFlow v2.0 - File Name Index
+Persistent trigram index over the names and root-relative paths of every file under the
+organized roots, for typo-tolerant search-as-you-type.
+
+Layout (INDEX_DIR):
+  meta.json        roots, generation, document counts
+  *.npy            base segment, memory-mapped on load:
+                     blob/offsets   UTF-8 absolute paths
+                     root_ids       root of each path
+                     ntri           distinct trigrams per path
+                     codes/ptr/docs sorted trigram codes -> posting lists (CSR)
+  journal.jsonl    adds/removes since the base was written; replayed on load and folded
+                   into a new base by compact()
+
+Trigrams are taken over the lowercased UTF-8 bytes of "/<relative path>", so every name
+segment starts with "/" and two-character queries still have a trigram to look up.
+A query counts trigram hits with one bincount over the posting lists, keeps paths that
+share enough of the query's trigrams, and re-ranks the best few hundred by substring and
+edit similarity on the file name.
+"""
+
+import difflib
+import json
+import os
+import threading
+
+import numpy as np
+
+INDEX_DIR = os.path.join('.rishflow_index', 'names')
+MIN_COVERAGE = 0.4        # share of the query's trigrams a path must contain
+RERANK = 256              # candidates re-scored in Python
+COMPACT_RATIO = 0.2       # fold the journal into the base once it holds this share of docs
+_SEGMENT = ('blob', 'offsets', 'root_ids', 'ntri', 'codes', 'ptr', 'docs')
+
+
+def _trigrams(data):
+    """Distinct trigram codes of a bytes object (no trigram spans a NUL separator)"""
+    b = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    if len(b) < 3:
+        return np.zeros(0, dtype=np.uint32)
+    codes = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+    ok = (b[:-2] != 0) & (b[1:-1] != 0) & (b[2:] != 0)
+    return np.unique(codes[ok])
+
+
+def _key_text(root, path):
+    # paths always sit under root here; slicing is ~20x cheaper than os.path.relpath
+    rel = path[len(root.rstrip(os.sep)) + 1:]
+    return '/' + (rel.replace(os.sep, '/') if os.sep != '/' else rel).lower()
+
+
+def build_segment(paths, root_ids, roots):
+    """Vectorised build of a base segment for `paths` (absolute) under `roots`"""
+    n = len(paths)
+    enc = [p.encode('utf-8', 'surrogateescape') for p in paths]
+    lengths = np.fromiter((len(e) for e in enc), dtype=np.int64, count=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    blob = np.frombuffer(b''.join(enc), dtype=np.uint8)
+
+    keys = [_key_text(roots[r], p).encode('utf-8', 'surrogateescape') for p, r in zip(paths, root_ids)]
+    klen = np.fromiter((len(k) + 1 for k in keys), dtype=np.int64, count=n)
+    b = np.frombuffer(b'\0'.join(keys) + b'\0', dtype=np.uint8).astype(np.uint32)
+    doc_of = np.repeat(np.arange(n, dtype=np.uint64), klen)
+    if len(b) >= 3:
+        codes = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+        ok = (b[:-2] != 0) & (b[1:-1] != 0) & (b[2:] != 0)
+        pairs = (codes[ok].astype(np.uint64) << np.uint64(32)) | doc_of[:-2][ok]
+        pairs.sort()
+        # np.unique re-sorts and is pathologically slow on large presorted uint64 input
+        pairs = pairs[np.append(True, pairs[1:] != pairs[:-1])]
+    else:
+        pairs = np.zeros(0, dtype=np.uint64)
+    tri = (pairs >> np.uint64(32)).astype(np.uint32)
+    docs = (pairs & np.uint64(0xffffffff)).astype(np.int32)
+    starts = np.flatnonzero(np.append(True, tri[1:] != tri[:-1])) if len(tri) else np.zeros(0, np.int64)
+    ucodes = tri[starts]
+    ptr = np.append(starts, len(tri)).astype(np.int64)
+    ntri = np.bincount(docs, minlength=n).astype(np.int32)
+    return {'blob': blob, 'offsets': offsets, 'root_ids': np.asarray(root_ids, dtype=np.int32),
+            'ntri': ntri, 'codes': ucodes.astype(np.uint32), 'ptr': ptr, 'docs': docs}
+
+
+class NameIndex:
+    """Base segment (memory-mapped arrays) + in-memory delta replayed from the journal"""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.roots = []
+        self.generation = 0
+        self._lock = threading.RLock()
+        self._reset({k: None for k in _SEGMENT})
+        self.load()
+
+    # ---------- state ----------
+    def _reset(self, seg):
+        self.seg = seg
+        self.base_n = 0 if seg['offsets'] is None else len(seg['offsets']) - 1
+        self.alive = np.ones(self.base_n, dtype=bool)
+        self.extra_paths = []          # docs added since the base, ids base_n + i
+        self.extra_roots = []
+        self.extra_ntri = []
+        self.delta = {}                # trigram code -> [doc ids]
+        self._ids = None               # path -> id, built on first update
+
+    @property
+    def size(self):
+        return int(self.alive.sum())
+
+    def path_of(self, doc):
+        if doc < self.base_n:
+            o = self.seg['offsets']
+            return bytes(self.seg['blob'][o[doc]:o[doc + 1]]).decode('utf-8', 'surrogateescape')
+        return self.extra_paths[doc - self.base_n]
+
+    def _root_of(self, path):
+        path = os.path.abspath(path)
+        for i, root in enumerate(self.roots):
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                return i
+        return None
+
+    def covers(self, folder):
+        return self._root_of(folder) is not None
+
+    # ---------- persistence ----------
+    def _file(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def load(self):
+        try:
+            with open(self._file('meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            seg = {k: np.load(self._file(f'{k}.npy'), mmap_mode='r') for k in _SEGMENT}
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self.roots = meta['roots']
+            self.generation = meta.get('generation', 0)
+            self._reset(seg)
+            try:
+                with open(self._file('journal.jsonl'), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            op = json.loads(line)
+                        except ValueError:
+                            break          # torn last line after a crash
+                        self._apply(op.get('add', []), op.get('del', []))
+            except OSError:
+                pass
+
+    def _save_base(self, seg):
+        os.makedirs(self.index_dir, exist_ok=True)
+        for k in _SEGMENT:
+            np.save(self._file(f'{k}.tmp.npy'), seg[k])
+        for k in _SEGMENT:
+            os.replace(self._file(f'{k}.tmp.npy'), self._file(f'{k}.npy'))
+        with open(self._file('meta.json.tmp'), 'w', encoding='utf-8') as f:
+            json.dump({'roots': self.roots, 'generation': self.generation, 'docs': len(seg['ntri'])}, f)
+        os.replace(self._file('meta.json.tmp'), self._file('meta.json'))
+        try:
+            os.remove(self._file('journal.jsonl'))
+        except OSError:
+            pass
+
+    # ---------- building ----------
+    def _walk(self, root, checkpoint=None):
+        for dirpath, dirnames, filenames in os.walk(root):
+            if checkpoint:
+                checkpoint()
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for name in filenames:
+                if not name.startswith('.'):
+                    yield os.path.join(dirpath, name)
+
+    def build(self, roots, checkpoint=None):
+        """(Re)index every file under `roots` from scratch and write a new base"""
+        roots = [os.path.abspath(r) for r in dict.fromkeys(roots)]
+        paths, root_ids = [], []
+        for i, root in enumerate(roots):
+            for p in self._walk(root, checkpoint):
+                paths.append(p)
+                root_ids.append(i)
+        seg = build_segment(paths, root_ids, roots)
+        with self._lock:
+            self.roots = roots
+            self.generation += 1
+            self._save_base(seg)
+        self.load()
+        return self.stats()
+
+    def add_root(self, root, checkpoint=None):
+        root = os.path.abspath(root)
+        if root in self.roots:
+            return self.build(self.roots, checkpoint)
+        return self.build(self.roots + [root], checkpoint)
+
+    def compact(self):
+        """Fold journal adds/removes into a fresh base segment"""
+        with self._lock:
+            docs = np.flatnonzero(self.alive)
+            paths = [self.path_of(int(d)) for d in docs]
+            root_ids = [self._root_id_of_doc(int(d)) for d in docs]
+            seg = build_segment(paths, root_ids, self.roots)
+            self.generation += 1
+            self._save_base(seg)
+        self.load()
+
+    def _root_id_of_doc(self, doc):
+        if doc < self.base_n:
+            return int(self.seg['root_ids'][doc])
+        return self.extra_roots[doc - self.base_n]
+
+    # ---------- incremental updates ----------
+    def _apply(self, added, removed):
+        if self._ids is None:
+            self._ids = {self.path_of(d): d for d in range(self.base_n + len(self.extra_paths))}
+        for path in removed:
+            doc = self._ids.pop(path, None)
+            if doc is not None:
+                self.alive[doc] = False
+        self.generation += 1
+        new_alive = []
+        for path in added:
+            root = self._root_of(path)
+            if root is None or path in self._ids:
+                continue
+            doc = self.base_n + len(self.extra_paths)
+            codes = _trigrams(_key_text(self.roots[root], path).encode('utf-8', 'surrogateescape'))
+            for c in codes.tolist():
+                self.delta.setdefault(c, []).append(doc)
+            self.extra_paths.append(path)
+            self.extra_roots.append(root)
+            self.extra_ntri.append(len(codes))
+            self._ids[path] = doc
+            new_alive.append(True)
+        if new_alive:
+            self.alive = np.concatenate([self.alive, np.array(new_alive)])
+
+    def update(self, added=(), removed=()):
+        """Record moved/created/deleted files (absolute paths). Paths outside the indexed roots
+        are ignored. Journaled, and compacted into the base once the delta grows large."""
+        added = [os.path.abspath(p) for p in added]
+        removed = [os.path.abspath(p) for p in removed]
+        if not self.roots or not (added or removed):
+            return
+        with self._lock:
+            self._apply(added, removed)
+            os.makedirs(self.index_dir, exist_ok=True)
+            with open(self._file('journal.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'add': added, 'del': removed}) + '\n')
+            churn = len(self.extra_paths) + (self.base_n - int(self.alive[:self.base_n].sum()))
+            if churn > max(1000, COMPACT_RATIO * self.base_n):
+                self.compact()
+
+    # ---------- search ----------
+    def search(self, query, limit=50, under=None):
+        """Ranked, typo-tolerant matches: [{'name', 'path', 'score'}]"""
+        q = query.strip().lower()
+        if len(q) < 2 or not self.roots:
+            return []
+        with self._lock:
+            seg, delta, alive = self.seg, self.delta, self.alive
+            total = len(alive)
+            qcodes = _trigrams((q if len(q) >= 3 else '/' + q).encode('utf-8', 'surrogateescape'))
+            if total == 0 or len(qcodes) == 0:
+                return []
+            parts = []
+            if self.base_n:
+                codes = seg['codes']
+                pos = np.searchsorted(codes, qcodes)
+                pos_ok = pos < len(codes)
+                hit = np.zeros(len(qcodes), dtype=bool)
+                hit[pos_ok] = codes[pos[pos_ok]] == qcodes[pos_ok]
+                ptr = seg['ptr']
+                for p in pos[hit]:
+                    parts.append(seg['docs'][ptr[p]:ptr[p + 1]])
+            for c in qcodes.tolist():
+                if c in delta:
+                    parts.append(np.asarray(delta[c], dtype=np.int32))
+            if not parts:
+                return []
+            counts = np.bincount(np.concatenate(parts), minlength=total)
+            counts[~alive] = 0
+            need = max(1, int(np.ceil(len(qcodes) * MIN_COVERAGE)))
+            cand = np.flatnonzero(counts >= need)
+            if not len(cand):
+                return []
+            ntri = np.concatenate([np.asarray(seg['ntri']) if self.base_n else np.zeros(0, np.int32),
+                                   np.asarray(self.extra_ntri, dtype=np.int32)])
+            # coverage first, shorter paths break ties
+            primary = counts[cand] / len(qcodes) - ntri[cand] * 1e-6
+            keep = min(len(cand), max(RERANK, limit * 4) if under is None else max(RERANK, limit * 4) * 8)
+            top = cand[np.argpartition(-primary, keep - 1)[:keep]] if keep < len(cand) else cand
+            rows = [(int(d), float(counts[d]) / len(qcodes), self.path_of(int(d))) for d in top]
+
+        under = os.path.abspath(under).rstrip(os.sep) + os.sep if under else None
+        results = []
+        for doc, coverage, path in rows:
+            if under and not path.startswith(under):
+                continue
+            name = os.path.basename(path)
+            lname = name.lower()
+            if q in lname:
+                score = 3.0 + (1.0 if lname.startswith(q) else 0.0)
+            elif q in path.lower():
+                score = 2.0
+            else:
+                score = 1.5 * difflib.SequenceMatcher(None, q, os.path.splitext(lname)[0]).ratio()
+            results.append({'name': name, 'path': path, 'score': round(score + coverage, 4)})
+        results.sort(key=lambda r: (-r['score'], len(r['path'])))
+        return results[:limit]
+
+    def stats(self):
+        return {'roots': self.roots, 'files': self.size, 'generation': self.generation,
+                'journal_docs': len(self.extra_paths)}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_name_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NameIndex()
+    return _index
@@ -0,0 +1,467 @@
+"""
+RishFlow v2.0 - OCR Service
+Shared OCR layer for the AI sorter: long-lived Tesseract workers, request batching and a
+content-hash cache.
+
+Backends, best first:
+  - tesserocr: a pool of PyTessBaseAPI handles, each created once, so language data
+    is loaded once per worker instead of once per image.
+  - tesseract CLI: a batch of images goes to one process through a list file (one page
+    per image), which amortizes process start and model load over the batch. Processes
+    run with OMP_THREAD_LIMIT=1 and in parallel, which beats one multi-threaded process.
+
+Single calls (image_to_string / image_to_data) are queued and a dispatcher groups what
+arrives within `batch_window` into one batch, so concurrent classifiers share workers.
+Results are cached by image content hash + settings, in memory and under .ai_cache/ocr.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from instrumentation import count, span
+
+OCR_CACHE_DIR = os.path.join('.ai_cache', 'ocr')
+DEFAULT_DPI = 300           # most receipts/scans/phone photos carry no usable DPI metadata
+MEMORY_CACHE_ENTRIES = 2048
+
+# Leptonica reads these; multi-frame formats (TIFF/GIF) are OCR'd alone so pages stay aligned
+_MAGIC = [
+    (b'\x89PNG', 'png'), (b'\xff\xd8\xff', 'jpg'), (b'BM', 'bmp'), (b'RIFF', 'webp'),
+    (b'P1', 'pnm'), (b'P2', 'pnm'), (b'P3', 'pnm'), (b'P4', 'pnm'), (b'P5', 'pnm'), (b'P6', 'pnm'),
+    (b'II*\x00', 'tif'), (b'MM\x00*', 'tif'), (b'GIF8', 'gif'),
+]
+_MULTI_FRAME = {'tif', 'gif'}
+
+
+class OCRUnavailable(RuntimeError):
+    """Neither tesserocr nor the tesseract binary is installed"""
+
+
+class OCRError(RuntimeError):
+    """One image could not be OCR'd (unreadable / unsupported format)"""
+
+
+def image_format(path):
+    """Leptonica-readable image format of path by magic bytes, or None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(12)
+    except OSError:
+        return None
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            if fmt == 'webp' and head[8:12] != b'WEBP':
+                return None
+            return fmt
+    return None
+
+
+def _parse_tsv(tsv):
+    """Tesseract TSV -> {page_num: {'text': [...], 'conf': [...]}} (pytesseract DICT layout)"""
+    pages = {}
+    lines = tsv.splitlines()
+    if not lines:
+        return pages
+    header = lines[0].split('\t')
+    try:
+        i_page, i_conf, i_text = header.index('page_num'), header.index('conf'), header.index('text')
+    except ValueError:
+        return pages
+    for line in lines[1:]:
+        cols = line.split('\t')
+        if len(cols) < len(header):
+            cols += [''] * (len(header) - len(cols))
+        try:
+            page = int(cols[i_page])
+            conf = int(float(cols[i_conf]))
+        except ValueError:
+            continue
+        rec = pages.setdefault(page, {'text': [], 'conf': []})
+        rec['text'].append(cols[i_text])
+        rec['conf'].append(conf)
+    return pages
+
+
+class _Request:
+    __slots__ = ('path', 'array', 'fmt', 'kind', 'psm', 'whitelist', 'key', 'future', 'tmp')
+
+    def __init__(self, path, fmt, kind, psm, whitelist, key, tmp=False, array=None):
+        self.path = path
+        self.array = array
+        self.fmt = fmt
+        self.kind = kind
+        self.psm = psm
+        self.whitelist = whitelist
+        self.key = key
+        self.future = Future()
+        self.tmp = tmp
+
+
+class OCRService:
+    """Thread-safe OCR front end; use get_ocr_service() for the shared instance"""
+
+    def __init__(self, workers=None, batch_size=16, batch_window=0.02, lang='eng', dpi=DEFAULT_DPI,
+                 cache_dir=OCR_CACHE_DIR, tessdata=None, backend=None):
+        self.workers = max(1, int(workers or min(4, os.cpu_count() or 1)))
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.lang = lang
+        self.dpi = dpi
+        self.cache_dir = cache_dir
+        self.tessdata = tessdata or os.environ.get('TESSDATA_PREFIX')
+        self.backend = backend or self._detect_backend()
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pool = None
+        self._apis = None
+        self._dispatcher = None
+        self._start_lock = threading.Lock()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'batches': 0, 'images': 0}
+
+    # ---------- backend ----------
+    def _detect_backend(self):
+        try:
+            import tesserocr  # noqa: F401
+            return 'tesserocr'
+        except Exception:
+            pass
+        if shutil.which('tesseract'):
+            return 'cli'
+        return None
+
+    @property
+    def available(self):
+        return self.backend is not None
+
+    def _start(self):
+        with self._start_lock:
+            if self._dispatcher is not None:
+                return
+            if self.backend is None:
+                raise OCRUnavailable('OCR needs tesserocr or the tesseract binary on PATH')
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='rishflow-ocr')
+            try:
+                if self.backend == 'tesserocr':
+                    import tesserocr
+                    kwargs = {'lang': self.lang}
+                    if self.tessdata:
+                        kwargs['path'] = self.tessdata.rstrip('/\\') + os.sep
+                    # Long-lived handles: language data is loaded here, once per worker
+                    self._apis = queue.Queue()
+                    for _ in range(self.workers):
+                        self._apis.put(tesserocr.PyTessBaseAPI(**kwargs))
+            except BaseException:
+                # e.g. missing language data: don't leave the pool or the handles made so far behind
+                self._pool.shutdown(wait=False)
+                self._pool = None
+                if self._apis is not None:
+                    while not self._apis.empty():
+                        self._apis.get().End()
+                    self._apis = None
+                raise
+            self._dispatcher = threading.Thread(target=self._dispatch, daemon=True, name='rishflow-ocr-dispatch')
+            self._dispatcher.start()
+
+    def close(self):
+        if self._dispatcher is not None:
+            self._queue.put(None)
+            self._dispatcher.join()
+            self._dispatcher = None
+        if self._pool:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._apis is not None:
+            while not self._apis.empty():
+                self._apis.get().End()
+            self._apis = None
+
+    # ---------- cache ----------
+    def _key(self, digest, kind, psm, whitelist):
+        raw = f"{digest}|{kind}|{psm}|{whitelist or ''}|{self.lang}|{self.dpi}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cache_get(self, key):
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        path = os.path.join(self.cache_dir, key[:2], key + '.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)['result']
+        except (OSError, ValueError, KeyError):
+            return None
+        self._memo_put(key, value)
+        return value
+
+    def _memo_put(self, key, value):
+        with self._memo_lock:
+            self._memo[key] = value
+            self._memo.move_to_end(key)
+            while len(self._memo) > MEMORY_CACHE_ENTRIES:
+                self._memo.popitem(last=False)
+
+    def _cache_put(self, key, value):
+        self._memo_put(key, value)
+        folder = os.path.join(self.cache_dir, key[:2])
+        try:
+            os.makedirs(folder, exist_ok=True)
+            tmp = os.path.join(folder, f".{key}.{threading.get_ident()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'result': value}, f)
+            os.replace(tmp, os.path.join(folder, key + '.json'))
+        except OSError:
+            pass
+
+    # ---------- request intake ----------
+    def _prepare(self, image, kind, psm, whitelist):
+        """Turn a path / numpy array / PIL image into a _Request (or a cached result)"""
+        tmp = False
+        if isinstance(image, (str, os.PathLike)):
+            path = os.fspath(image)
+            fmt = image_format(path)
+            if fmt is None:
+                raise OCRError(f"Not an image OCR can read: {path}")
+            h = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                for buf in iter(lambda: f.read(1024 * 1024), b''):
+                    h.update(buf)
+            digest = h.hexdigest()
+        else:
+            import numpy as np
+            arr = np.ascontiguousarray(np.asarray(image))
+            digest = hashlib.blake2b(arr.tobytes() + repr(arr.shape).encode(), digest_size=16).hexdigest()
+            path, fmt = None, 'png'
+        key = self._key(digest, kind, psm, whitelist)
+        cached = self._cache_get(key)
+        if cached is not None:
+            count('ocr.cache_hits')
+            self._count(cache_hits=1)
+            return cached
+        if path is None and self.backend == 'tesserocr':
+            return _Request(None, fmt, kind, psm, whitelist, key, array=arr)
+        if path is None:
+            # in-memory image (e.g. a CLAHE-enhanced frame): spill to a temp PNG for the CLI
+            import cv2
+            fd, path = tempfile.mkstemp(suffix='.png', prefix='rishflow-ocr-')
+            os.close(fd)
+            cv2.imwrite(path, arr)
+            tmp = True
+        return _Request(path, fmt, kind, psm, whitelist, key, tmp)
+
+    def submit(self, image, kind='string', psm=6, whitelist=None):
+        """Queue one image; returns a Future of str ('string') or {'text', 'conf'} ('data')"""
+        self._count(requests=1)
+        req = self._prepare(image, kind, psm, whitelist)
+        if not isinstance(req, _Request):
+            done = Future()
+            done.set_result(req)
+            return done
+        self._start()
+        self._queue.put(req)
+        return req.future
+
+    def image_to_string(self, image, psm=6, whitelist=None):
+        with span('ocr.image_to_string'):
+            return self.submit(image, 'string', psm, whitelist).result()
+
+    def image_to_data(self, image, psm=3):
+        """Word boxes in pytesseract's Output.DICT layout (only 'text' and 'conf' columns)"""
+        with span('ocr.image_to_data'):
+            return self.submit(image, 'data', psm).result()
+
+    def batch(self, images, kind='string', psm=6, whitelist=None):
+        """OCR many images at once; failed items come back as exceptions in the list"""
+        futures = []
+        for image in images:
+            try:
+                futures.append(self.submit(image, kind, psm, whitelist))
+            except Exception as e:
+                failed = Future()
+                failed.set_exception(e)
+                futures.append(failed)
+        results = []
+        for fut in futures:
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # ---------- batching ----------
+    def _dispatch(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            reqs = [first]
+            try:
+                while len(reqs) < self.batch_size:
+                    nxt = self._queue.get(timeout=self.batch_window)
+                    if nxt is None:
+                        self._queue.put(None)
+                        break
+                    reqs.append(nxt)
+            except queue.Empty:
+                pass
+            if self.backend == 'tesserocr':
+                # each worker owns a handle; spread the batch over all of them
+                for r in reqs:
+                    self._pool.submit(self._run_group, [r])
+                continue
+            # one tesseract process per (kind, psm, whitelist); multi-frame images go alone
+            groups = {}
+            for r in reqs:
+                key = (r.kind, r.psm, r.whitelist, r.path if r.fmt in _MULTI_FRAME else None)
+                groups.setdefault(key, []).append(r)
+            for group in groups.values():
+                self._pool.submit(self._run_group, group)
+
+    def _count(self, **deltas):
+        with self._memo_lock:
+            for k, v in deltas.items():
+                self.stats[k] += v
+
+    def _run_group(self, reqs):
+        self._count(batches=1, images=len(reqs))
+        try:
+            with span('ocr.batch'):
+                if self.backend == 'tesserocr':
+                    results = [self._run_tesserocr(r) for r in reqs]
+                else:
+                    results = self._run_cli(reqs)
+            for r, res in zip(reqs, results):
+                if isinstance(res, Exception):
+                    r.future.set_exception(res)
+                else:
+                    self._cache_put(r.key, res)
+                    r.future.set_result(res)
+        except Exception as e:
+            for r in reqs:
+                if not r.future.done():
+                    r.future.set_exception(e)
+        finally:
+            for r in reqs:
+                if r.tmp:
+                    try:
+                        os.remove(r.path)
+                    except OSError:
+                        pass
+
+    def _run_tesserocr(self, r):
+        import tesserocr
+        api = self._apis.get()
+        try:
+            api.SetPageSegMode(r.psm)
+            api.SetVariable('tessedit_char_whitelist', r.whitelist or '')
+            if r.array is not None:
+                from PIL import Image
+                api.SetImage(Image.fromarray(r.array))
+            else:
+                api.SetImageFile(r.path)
+            api.SetSourceResolution(self.dpi)
+            if r.kind == 'string':
+                try:
+                    return api.GetUTF8Text()
+                except RuntimeError:  # tesserocr raises on a page with no text
+                    return ''
+            api.Recognize()
+            # Same rows as `tesseract ... tsv`: one per page/block/para/line (conf -1) and per word
+            words, confs = [], []
+            it = api.GetIterator()
+            if it is not None:
+                for w in tesserocr.iterate_level(it, tesserocr.RIL.WORD):
+                    try:
+                        words.append(w.GetUTF8Text(tesserocr.RIL.WORD) or '')
+                    except RuntimeError:  # empty page: the iterator has no element
+                        break
+                    confs.append(int(w.Confidence(tesserocr.RIL.WORD)))
+            text, conf = [''], [-1]
+            if words:
+                for level in (tesserocr.RIL.BLOCK, tesserocr.RIL.PARA, tesserocr.RIL.TEXTLINE):
+                    for _ in tesserocr.iterate_level(api.GetIterator(), level):
+                        text.append('')
+                        conf.append(-1)
+            text += words
+            conf += confs
+            return {'text': text, 'conf': conf}
+        except Exception as e:
+            return OCRError(f"{r.path or 'image'}: {e}")
+        finally:
+            api.Clear()
+            self._apis.put(api)
+
+    def _run_cli(self, reqs):
+        fd, list_file = tempfile.mkstemp(suffix='.txt', prefix='rishflow-ocr-list-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(r.path for r in reqs) + '\n')
+        r0 = reqs[0]
+        cmd = ['tesseract', list_file, 'stdout', '-l', self.lang, '--psm', str(r0.psm), '--dpi', str(self.dpi)]
+        if self.tessdata:
+            cmd += ['--tessdata-dir', self.tessdata]
+        if r0.whitelist:
+            cmd += ['-c', f"tessedit_char_whitelist={r0.whitelist}"]
+        if r0.kind == 'data':
+            cmd.append('tsv')
+        env = dict(os.environ, OMP_THREAD_LIMIT='1')
+        try:
+            proc = subprocess.run(cmd, capture_output=True, env=env, timeout=60 + 30 * len(reqs))
+        finally:
+            os.remove(list_file)
+        out = proc.stdout.decode('utf-8', errors='replace')
+        err = proc.stderr.decode('utf-8', errors='replace').strip() or f"tesseract exited with {proc.returncode}"
+        if proc.returncode != 0 and (not out or r0.fmt in _MULTI_FRAME):
+            return [OCRError(err) for _ in reqs]
+
+        if r0.kind == 'data':
+            pages = _parse_tsv(out)
+            if r0.fmt in _MULTI_FRAME:
+                merged = {'text': [], 'conf': []}
+                for p in sorted(pages):
+                    merged['text'] += pages[p]['text']
+                    merged['conf'] += pages[p]['conf']
+                return [merged]
+            if proc.returncode != 0 and pages:
+                pages.pop(max(pages))   # output stops mid-page when tesseract dies
+            # every page has at least its level-1 row, so a missing page was never finished
+            results = [pages.get(i + 1) for i in range(len(reqs))]
+        else:
+            # text output: every finished page ends with a form feed; what follows the last
+            # one is a page cut short
+            chunks = out.split('\f')
+            if r0.fmt in _MULTI_FRAME:
+                return ['\n'.join(c.strip('\n') for c in chunks)]
+            finished = chunks[:-1]
+            if not finished and len(reqs) == 1 and proc.returncode == 0:
+                finished = [out]        # page separator configured away
+            results = (finished + [None] * len(reqs))[:len(reqs)]
+
+        missing = [i for i, res in enumerate(results) if res is None]
+        if missing and len(reqs) > 1:
+            # a crash mid-batch: retry the unfinished images one at a time
+            for i in missing:
+                results[i] = self._run_cli([reqs[i]])[0]
+            return results
+        return [OCRError(f"{reqs[i].path}: {err}") if res is None else res for i, res in enumerate(results)]
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_ocr_service():
+    """Process-wide OCRService, created on first use"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = OCRService()
+        return _shared
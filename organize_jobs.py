@@ -0,0 +1,201 @@
+"""
+RishFlow v2.0 - Organize Jobs
+Checkpointed, resumable organize runs.
+
+Each job lives in JOBS_DIR as two files:
+  <job_id>.json   - header: source/dest/mode, status and (once planning finished) the plan
+  <job_id>.jsonl  - append-only journal of classifications, move intents (the claimed,
+                   possibly suffixed, target written before a move starts) and completed moves
+The journal is cheap to append to after every file, so a crash or a quit from the
+tray loses at most the file that was in flight.
+"""
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+JOBS_DIR = '.rishflow_jobs'
+
+
+class OrganizeJob:
+    """One organize run with a persisted checkpoint"""
+
+    def __init__(self, job_id, source, dest, sort_mode, user_categories=None, jobs_dir=JOBS_DIR):
+        self.job_id = job_id
+        self.source = source
+        self.dest = dest
+        self.sort_mode = sort_mode
+        self.user_categories = user_categories or []
+        self.skip_identical = False     # leave files whose byte-identical copy is already at dest
+        self.jobs_dir = jobs_dir
+        self.status = 'planning'
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self.updated = self.created
+        self.plan = None            # list of [src, dest, folder_name] once planning is done
+        self.completed = {}         # src -> dest for moves that finished
+        self.intents = {}           # src -> dest claimed for a move that was started
+        self.failed = 0
+        self.classifications = {}   # src -> {'mtime', 'size', 'folder'}
+        self._lock = threading.Lock()
+        self._journal = None
+
+    # ---------- paths ----------
+    @property
+    def header_path(self):
+        return os.path.join(self.jobs_dir, f"{self.job_id}.json")
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.jobs_dir, f"{self.job_id}.jsonl")
+
+    # ---------- create / load ----------
+    @classmethod
+    def create(cls, source, dest, sort_mode, user_categories=None, jobs_dir=JOBS_DIR, skip_identical=False):
+        job_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        job = cls(job_id, source, dest, sort_mode, user_categories, jobs_dir)
+        job.skip_identical = bool(skip_identical)
+        os.makedirs(jobs_dir, exist_ok=True)
+        job.save()
+        return job
+
+    @classmethod
+    def load(cls, job_id, jobs_dir=JOBS_DIR):
+        """Load a job header and replay its journal"""
+        with open(os.path.join(jobs_dir, f"{job_id}.json"), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        job = cls(job_id, data['source'], data['dest'], data['sort_mode'],
+                  data.get('user_categories'), jobs_dir)
+        job.skip_identical = data.get('skip_identical', False)
+        job.status = data.get('status', 'planning')
+        job.created = data.get('created', job.created)
+        job.updated = data.get('updated', job.updated)
+        job.plan = data.get('plan')
+        job.failed = data.get('failed', 0)
+
+        if os.path.exists(job.journal_path):
+            with open(job.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        # torn last line after a crash
+                        continue
+                    if rec.get('t') == 'c':
+                        job.classifications[rec['src']] = {
+                            'mtime': rec['mtime'], 'size': rec['size'], 'folder': rec['folder']
+                        }
+                    elif rec.get('t') == 'i':
+                        job.intents[rec['src']] = rec['dest']
+                    elif rec.get('t') == 'm':
+                        job.completed[rec['src']] = rec['dest']
+        return job
+
+    @classmethod
+    def list_jobs(cls, jobs_dir=JOBS_DIR):
+        """Headers of all persisted jobs (plans omitted), newest first"""
+        jobs = []
+        if not os.path.isdir(jobs_dir):
+            return jobs
+        for name in os.listdir(jobs_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(jobs_dir, name), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                plan = data.pop('plan', None)
+                data['total'] = len(plan) if plan is not None else None
+                jobs.append(data)
+            except Exception:
+                pass
+        return sorted(jobs, key=lambda j: j.get('created', ''), reverse=True)
+
+    # ---------- persistence ----------
+    def save(self):
+        """Atomically rewrite the header"""
+        self.updated = datetime.now().isoformat(timespec='seconds')
+        data = {
+            'job_id': self.job_id,
+            'source': self.source,
+            'dest': self.dest,
+            'sort_mode': self.sort_mode,
+            'user_categories': self.user_categories,
+            'skip_identical': self.skip_identical,
+            'status': self.status,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'plan': self.plan,
+        }
+        tmp = self.header_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.header_path)
+
+    def _append(self, rec):
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write(json.dumps(rec) + '\n')
+            self._journal.flush()
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    # ---------- checkpoint API ----------
+    def cached_folder(self, src, stat_result):
+        """Classification from a previous attempt, if the file hasn't changed since"""
+        c = self.classifications.get(src)
+        if c and c['mtime'] == stat_result.st_mtime and c['size'] == stat_result.st_size:
+            return c['folder']
+        return None
+
+    def record_classification(self, src, stat_result, folder):
+        self.classifications[src] = {'mtime': stat_result.st_mtime, 'size': stat_result.st_size, 'folder': folder}
+        self._append({'t': 'c', 'src': src, 'mtime': stat_result.st_mtime,
+                      'size': stat_result.st_size, 'folder': folder})
+
+    def set_plan(self, plan):
+        self.plan = [list(p) for p in plan]
+        self.status = 'moving'
+        self.save()
+
+    def record_intent(self, src, dest):
+        """The actual target of a move about to start; lets a resume recognise a move that
+        finished right before a crash without guessing from the planned name"""
+        self.intents[src] = dest
+        self._append({'t': 'i', 'src': src, 'dest': dest})
+
+    def record_move(self, src, dest):
+        self.completed[src] = dest
+        self._append({'t': 'm', 'src': src, 'dest': dest})
+
+    def remaining(self):
+        """Planned moves that have not completed yet"""
+        return [p for p in (self.plan or []) if p[0] not in self.completed]
+
+    def finish(self, status='completed', failed=0):
+        self.status = status
+        self.failed = failed
+        self.close()
+        self.save()
+
+    def summary(self):
+        total = len(self.plan) if self.plan is not None else None
+        return {
+            'job_id': self.job_id,
+            'source': self.source,
+            'dest': self.dest,
+            'sort_mode': self.sort_mode,
+            'status': self.status,
+            'created': self.created,
+            'updated': self.updated,
+            'total': total,
+            'done': len(self.completed),
+            'failed': self.failed,
+            'classified': len(self.classifications),
+        }
@@ -0,0 +1,225 @@
+"""
+RishFlow v2.0 - Headless CLI
+Run organize / index / query / dedupe / revert without the pywebview window or tray.
+Every command prints one JSON document on stdout (exit code 1 if it contains "error"),
+so it can be used from cron and batch pipelines.
+
+Examples:
+    python rishflow_cli.py organize ~/Downloads ~/Sorted --mode "File Extension"
+    python rishflow_cli.py --state-dir /var/lib/rishflow index /srv/docs
+    python rishflow_cli.py query /srv/docs invoice
+    python rishflow_cli.py dedupe /srv/photos
+    python rishflow_cli.py revert
+    python rishflow_cli.py serve --port 8765
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+SORT_MODES = ["File Extension", "Date Modified", "Size Category", "File Name",
+              "Capture Date", "Camera Model", "Resolution", "Duration", "AI-based Content"]
+
+
+def _wait(thread, poll, progress_fn, show_progress):
+    """Join a worker thread, optionally streaming progress snapshots to stderr as JSON lines"""
+    while thread is not None and thread.is_alive():
+        thread.join(poll)
+        if show_progress and thread.is_alive():
+            print(json.dumps(progress_fn()), file=sys.stderr, flush=True)
+
+
+def cmd_organize(api, args):
+    categories = [c.strip() for c in args.categories.split(',')] if args.categories else None
+    resp = api.start_organizing(args.source, args.dest, args.mode, categories)
+    if 'error' in resp:
+        return resp
+    _wait(api.organizer_thread, args.poll, api.get_organize_progress, args.progress)
+    return {
+        'job_id': resp['job_id'],
+        'status': api.get_organize_status(),
+        'progress': api.get_organize_progress(),
+        'throughput': api.get_move_throughput().get('devices', []),
+    }
+
+
+def cmd_resume(api, args):
+    resp = api.resume_organizing(args.job_id)
+    if 'error' in resp or resp.get('status') == 'completed':
+        return resp
+    _wait(api.organizer_thread, args.poll, api.get_organize_progress, args.progress)
+    return {
+        'job_id': args.job_id,
+        'status': api.get_organize_status(),
+        'progress': api.get_organize_progress(),
+        'throughput': api.get_move_throughput().get('devices', []),
+    }
+
+
+def cmd_jobs(api, args):
+    return api.list_organize_jobs()
+
+
+def _index(api, folder, args):
+    resp = api.start_index_for_ai(folder)
+    if 'error' in resp:
+        return resp
+    job = api.jobs.get(resp.get('job_id'))
+    _wait(job.thread if job else None, args.poll, api.get_ai_index_status, args.progress)
+    return api.get_ai_index_status()
+
+
+def cmd_index(api, args):
+    return _index(api, args.folder, args)
+
+
+def cmd_query(api, args):
+    status = _index(api, args.folder, args)
+    if 'error' in status:
+        return status
+    resp = api.query_ai(args.folder, args.query, mode=args.mode)
+    if 'results' in resp and args.limit:
+        resp['results'] = resp['results'][:args.limit]
+    return resp
+
+
+def cmd_dedupe(api, args):
+    resp = api.find_duplicates(args.folder)
+    resp.pop('details', None)  # stringified copy kept for the UI; 'groups' is the structured form
+    return resp
+
+
+def cmd_revert(api, args):
+    return api.revert_last()
+
+
+def cmd_stats(api, args):
+    return api.get_folder_stats(args.folder)
+
+
+def cmd_scan(api, args):
+    return api.scan_source(args.folder)
+
+
+def cmd_serve(api, args):
+    from rishflow_service import create_server
+    server = create_server(api, args.host, args.port, args.workers, args.backlog, args.token)
+    print(f"[service] RishFlow listening on http://{args.host}:{server.server_address[1]} ({args.workers} workers)")
+    if not args.token:
+        print(f"[service] X-RishFlow-Token: {server.token}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return {'status': 'stopped'}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='rishflow', description='RishFlow headless batch mode (JSON output)')
+    parser.add_argument('--state-dir', help='directory for the activity DB, state.json, caches and job checkpoints '
+                                            '(default: current directory)')
+    parser.add_argument('--progress', action='store_true', help='stream progress snapshots to stderr as JSON lines')
+    parser.add_argument('--poll', type=float, default=1.0, help='progress interval in seconds')
+    parser.add_argument('--pretty', action='store_true', help='indent JSON output')
+    parser.add_argument('--instrument', action='store_true',
+                        help='collect per-stage timing spans and add p50/p95/p99 latencies to the output as "perf"')
+    parser.add_argument('--profile', choices=['cprofile', 'sample'],
+                        help='profile the background job this command starts (written to .rishflow_profiles/)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('organize', help='organize SOURCE into DEST and wait for completion')
+    p.add_argument('source')
+    p.add_argument('dest')
+    p.add_argument('--mode', default='File Extension', choices=SORT_MODES)
+    p.add_argument('--categories', help='comma-separated user categories (AI mode)')
+    p.set_defaults(func=cmd_organize)
+
+    p = sub.add_parser('resume', help='resume an interrupted organize job')
+    p.add_argument('job_id')
+    p.set_defaults(func=cmd_resume)
+
+    p = sub.add_parser('jobs', help='list organize jobs and their checkpoints')
+    p.set_defaults(func=cmd_jobs)
+
+    p = sub.add_parser('index', help='build the AI text index for FOLDER')
+    p.add_argument('folder')
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser('query', help='index FOLDER (cached) and search it')
+    p.add_argument('folder')
+    p.add_argument('query')
+    p.add_argument('--limit', type=int, default=0, help='max results (0 = all)')
+    p.add_argument('--mode', choices=('keyword', 'semantic'), default='keyword',
+                   help='semantic: fuse keyword hits with the local embedding index')
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser('dedupe', help='find duplicate files under FOLDER')
+    p.add_argument('folder')
+    p.set_defaults(func=cmd_dedupe)
+
+    p = sub.add_parser('revert', help='undo the last organize run')
+    p.set_defaults(func=cmd_revert)
+
+    p = sub.add_parser('stats', help='folder statistics')
+    p.add_argument('folder')
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser('scan', help='list files in FOLDER')
+    p.add_argument('folder')
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser('serve', help='keep one warm process and serve the API as JSON-RPC over HTTP')
+    p.add_argument('--host', default='127.0.0.1', help='bind address (default: localhost only)')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--workers', type=int, default=8, help='request worker threads')
+    p.add_argument('--backlog', type=int, default=32, help='queued requests before answering 503')
+    p.add_argument('--token', default=os.environ.get('RISHFLOW_TOKEN'),
+                   help='require this value in the X-RishFlow-Token header (default: $RISHFLOW_TOKEN, '
+                        'else a random token printed at startup)')
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Resolve user paths before switching into the state directory
+    for attr in ('source', 'dest', 'folder'):
+        if getattr(args, attr, None):
+            setattr(args, attr, os.path.abspath(os.path.expanduser(getattr(args, attr))))
+    if args.state_dir:
+        os.makedirs(args.state_dir, exist_ok=True)
+        os.chdir(args.state_dir)
+
+    started = time.perf_counter()
+    # The API logs with print(); keep stdout clean for the JSON result
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            from app import RishFlowAPI
+            from instrumentation import INSTRUMENT
+            api = RishFlowAPI()
+            if args.instrument:
+                INSTRUMENT.enabled = True
+            if args.profile:
+                api.jobs.profile_next(mode=args.profile)
+            result = args.func(api, args)
+            if isinstance(result, dict) and INSTRUMENT.enabled:
+                result['perf'] = INSTRUMENT.summary()['operations']
+            if isinstance(result, dict) and args.profile:
+                result['profiles'] = [j['profile'] for j in api.jobs.list_jobs() if j['profile']]
+        except Exception as e:
+            result = {'error': str(e)}
+    if isinstance(result, dict):
+        result.setdefault('elapsed_seconds', round(time.perf_counter() - started, 3))
+
+    print(json.dumps(result, indent=2 if args.pretty else None, default=str))
+    return 1 if isinstance(result, dict) and 'error' in result else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""
+RishFlow v2.0 - Local Service Mode
+Exposes RishFlowAPI over HTTP/JSON-RPC 2.0 so several clients (dashboard, scripts,
+batch jobs) can share one warm process with its caches, indexes and loaded models.
+
+Endpoints (localhost only by default; every request needs the X-RishFlow-Token header,
+generated at startup and printed when none is given):
+  GET  /health   -> {"status": "ok", ...}
+  GET  /thumbs/<name> -> a cached thumbnail (names from get_thumbnails); the token may be
+                    passed as ?token= since <img> tags cannot set headers
+  POST /rpc      -> JSON-RPC 2.0 request or batch; methods are those in REMOTE_METHODS
+  POST /stream   -> {"method": ..., "params": ...}; chunked NDJSON response
+                    scan_source / scan_organized_files: {"files": [...]} batches as they are found
+                    watch_job: progress snapshots until the job finishes
+
+Requests are served by a bounded worker pool; when the pool and its backlog are full
+new connections get 503 instead of spawning more threads.
+
+Web pages open in the user's browser can reach localhost too, so POSTs must be
+'Content-Type: application/json' (a cross-site form or text/plain "simple" request is
+refused with 415), and requests whose Host or Origin is not a loopback name get 403
+(DNS rebinding, cross-origin fetch).
+"""
+
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from instrumentation import span
+
+# The remote-safe API. GUI hooks (browse_folder, on_*) and internals such as
+# init_database, log_activity and save_state/load_state are deliberately not served.
+REMOTE_METHODS = (
+    'start_organizing', 'resume_organizing', 'get_organize_status', 'list_organize_jobs',
+    'get_organize_progress', 'get_move_throughput', 'revert_last',
+    'scan_source', 'scan_organized_files', 'get_folder_stats', 'browse_files',
+    'index_for_ai', 'start_index_for_ai', 'get_ai_index_status', 'query_ai', 'index_names', 'search_files',
+    'find_duplicates', 'dedupe_files', 'revert_dedupe',
+    'list_jobs', 'cancel_job', 'pause_job', 'resume_job', 'set_job_priority',
+    'get_scheduler_status', 'set_scheduler_config',
+    'get_perf_summary', 'set_instrumentation', 'reset_perf_stats', 'profile_next_job', 'get_profile_captures',
+    'get_file_rules', 'set_file_rules', 'get_logs',
+    'get_thumbnails', 'get_thumbnail', 'inspect_archive', 'get_media_metadata',
+)
+LOOPBACK_HOSTS = {'localhost', '127.0.0.1', '::1'}
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+_THUMB_NAME = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{32}\.(webp|jpg)$')
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a bounded ThreadPoolExecutor"""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, api, workers=8, backlog=32, token=None):
+        super().__init__(address, handler)
+        self.api = api
+        self.token = token
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rishflow-rpc')
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+        self.methods = {name: getattr(api, name) for name in REMOTE_METHODS if hasattr(api, name)}
+        # an explicit non-wildcard bind address is also an acceptable Host
+        self.allowed_hosts = LOOPBACK_HOSTS | ({address[0]} if address[0] not in ('', '0.0.0.0', '::') else set())
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(b'HTTP/1.1 503 Service Unavailable\r\n'
+                                b'Content-Length: 0\r\nConnection: close\r\n\r\n')
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self.pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+class RPCHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'RishFlow/2.0'
+
+    def log_message(self, fmt, *args):
+        print(f"[service] {self.address_string()} {fmt % args}")
+
+    # ---------- helpers ----------
+    def _authorized(self, query_token=None):
+        token = self.server.token
+        if not token:
+            return True
+        return hmac.compare_digest(self.headers.get('X-RishFlow-Token', '') or query_token or '', token)
+
+    def _local_origin(self):
+        """Host (and Origin, when the client sent one) name this machine"""
+        host = urlsplit('//' + self.headers.get('Host', '')).hostname
+        if host not in self.server.allowed_hosts:
+            return False
+        origin = self.headers.get('Origin')
+        return origin is None or urlsplit(origin).hostname in self.server.allowed_hosts
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = True
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def _call(self, method, params):
+        fn = self.server.methods.get(method)
+        if fn is None:
+            raise LookupError(method)
+        with span(f"rpc.{method}"):
+            if isinstance(params, dict):
+                return fn(**params)
+            return fn(*(params or []))
+
+    # ---------- JSON-RPC ----------
+    def _handle_one(self, req):
+        if not isinstance(req, dict) or req.get('jsonrpc') != '2.0' or not isinstance(req.get('method'), str):
+            return {'jsonrpc': '2.0', 'id': None,
+                    'error': {'code': INVALID_REQUEST, 'message': 'Invalid Request'}}
+        req_id = req.get('id')
+        try:
+            result = self._call(req['method'], req.get('params'))
+            resp = {'jsonrpc': '2.0', 'id': req_id, 'result': result}
+        except LookupError:
+            resp = {'jsonrpc': '2.0', 'id': req_id,
+                    'error': {'code': METHOD_NOT_FOUND, 'message': f"Method not found: {req['method']}"}}
+        except TypeError as e:
+            resp = {'jsonrpc': '2.0', 'id': req_id, 'error': {'code': INVALID_PARAMS, 'message': str(e)}}
+        except Exception as e:
+            resp = {'jsonrpc': '2.0', 'id': req_id, 'error': {'code': INTERNAL_ERROR, 'message': str(e)}}
+        # notifications (no id) get no response
+        return resp if 'id' in req else None
+
+    def do_GET(self):
+        if not self._local_origin():
+            return self._send_json(403, {'error': 'Forbidden'})
+        if self.path.startswith('/thumbs/'):
+            return self._do_thumb()
+        if self.path != '/health':
+            return self._send_json(404, {'error': 'Not found'})
+        self._send_json(200, {'status': 'ok', 'workers': self.server.workers, 'pid': os.getpid(),
+                              'methods': sorted(self.server.methods)})
+
+    def _do_thumb(self):
+        url = urlsplit(self.path)
+        if not self._authorized(parse_qs(url.query).get('token', [None])[0]):
+            return self._send_json(401, {'error': 'Unauthorized'})
+        name = url.path[len('/thumbs/'):]
+        if not _THUMB_NAME.match(name):
+            return self._send_json(404, {'error': 'Not found'})
+        thumbs = self.server.api._thumbnail_service()
+        try:
+            with open(os.path.join(thumbs.cache_dir, name), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return self._send_json(404, {'error': 'Not found'})
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/webp' if name.endswith('.webp') else 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'private, max-age=31536000, immutable')   # content-keyed
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self._local_origin():
+            return self._send_json(403, {'error': 'Forbidden'})
+        if self.headers.get_content_type() != 'application/json':
+            return self._send_json(415, {'error': 'Content-Type must be application/json'})
+        if not self._authorized():
+            return self._send_json(401, {'error': 'Unauthorized'})
+        if self.path == '/rpc':
+            return self._do_rpc()
+        if self.path == '/stream':
+            return self._do_stream()
+        self._send_json(404, {'error': 'Not found'})
+
+    def _do_rpc(self):
+        try:
+            payload = self._read_json()
+        except ValueError:
+            return self._send_json(200, {'jsonrpc': '2.0', 'id': None,
+                                         'error': {'code': PARSE_ERROR, 'message': 'Parse error'}})
+        if isinstance(payload, list):
+            if not payload:
+                return self._send_json(200, {'jsonrpc': '2.0', 'id': None,
+                                             'error': {'code': INVALID_REQUEST, 'message': 'Invalid Request'}})
+            responses = [r for r in (self._handle_one(p) for p in payload) if r is not None]
+            return self._send_json(200, responses)
+        resp = self._handle_one(payload)
+        if resp is None:
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._send_json(200, resp)
+
+    # ---------- streaming ----------
+    def _write_chunk(self, obj):
+        data = (json.dumps(obj, default=str) + '\n').encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def _stream_records(self, records, batch, compact=False):
+        if compact:
+            from file_catalog import FileCatalog
+
+        def chunk(buf):
+            # compact: each batch as a columnar file_catalog payload instead of a list of dicts
+            return {'catalog': FileCatalog.from_records(buf).encode()} if compact else {'files': buf}
+
+        buf = []
+        count = 0
+        for rec in records:
+            buf.append(rec)
+            if len(buf) >= batch:
+                count += len(buf)
+                self._write_chunk(chunk(buf))
+                buf = []
+        count += len(buf)
+        if buf:
+            self._write_chunk(chunk(buf))
+        self._write_chunk({'done': True, 'count': count})
+
+    def _watch_job(self, job_id, interval):
+        api = self.server.api
+        while True:
+            job = api.jobs.get(job_id)
+            if job is None:
+                self._write_chunk({'error': f"Unknown job {job_id}"})
+                return
+            snapshot = job.to_dict()
+            if job.kind == 'organize':
+                snapshot['progress'] = api.get_organize_progress()
+            elif job.kind == 'index':
+                snapshot['progress'] = api.get_ai_index_status()
+            self._write_chunk(snapshot)
+            if job.finished:
+                self._write_chunk({'done': True, 'state': job.state})
+                return
+            time.sleep(interval)
+
+    def _do_stream(self):
+        try:
+            payload = self._read_json() or {}
+            method = payload.get('method')
+            params = payload.get('params') or {}
+        except (ValueError, AttributeError):
+            return self._send_json(400, {'error': 'Invalid request body'})
+
+        api = self.server.api
+        batch = int(params.get('batch', 500))
+        compact = bool(params.get('compact', False))
+        if method == 'scan_source':
+            folder = params.get('folder_path', '')
+            if not os.path.isdir(folder):
+                return self._send_json(400, {'error': 'Invalid folder'})
+            producer = lambda: self._stream_records(api._iter_source_files(folder), batch, compact)
+        elif method == 'scan_organized_files':
+            root = params.get('root_path', '')
+            if not os.path.isdir(root):
+                return self._send_json(400, {'error': 'Invalid folder'})
+            producer = lambda: self._stream_records(api._iter_organized_files(root), batch, compact)
+        elif method == 'watch_job':
+            producer = lambda: self._watch_job(params.get('job_id'), float(params.get('interval', 0.5)))
+        else:
+            return self._send_json(404, {'error': f"Not a streaming method: {method}"})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            producer()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        except Exception as e:
+            self._write_chunk({'error': str(e)})
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
+def create_server(api=None, host='127.0.0.1', port=8765, workers=8, backlog=32, token=None):
+    """Build (but don't start) a service around an existing or new RishFlowAPI; without a
+    token one is generated (server.token)"""
+    if not token:
+        token = secrets.token_urlsafe(32)
+    if api is None:
+        from app import RishFlowAPI
+        api = RishFlowAPI()
+    return PooledHTTPServer((host, port), RPCHandler, api, workers=workers, backlog=backlog, token=token)
+
+
+def serve(host='127.0.0.1', port=8765, workers=8, backlog=32, token=None):
+    server = create_server(host=host, port=port, workers=workers, backlog=backlog, token=token)
+    print(f"[service] RishFlow listening on http://{host}:{server.server_address[1]} ({workers} workers)")
+    if not token:
+        print(f"[service] X-RishFlow-Token: {server.token}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='RishFlow local JSON-RPC service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--backlog', type=int, default=32)
+    parser.add_argument('--token', default=os.environ.get('RISHFLOW_TOKEN'),
+                        help='require this value in the X-RishFlow-Token header (default: $RISHFLOW_TOKEN, '
+                             'else a random token printed at startup)')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.backlog, args.token)
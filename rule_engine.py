@@ -0,0 +1,297 @@
+"""
+RishFlow v2.0 - File Rule Engine
+One place that decides what kind of file something is, for the scanners (scan_source,
+get_folder_stats, scan_organized_files), the AI sorter's dispatch and the organize fallback.
+
+A rule is a dict; every condition present must hold, first matching rule wins, and user
+rules are checked before the built-in ones:
+
+    {"type": "document", "folder": "Finance",          # result
+     "ext": [".pdf", ".xlsx"],                         # extension (case-insensitive)
+     "name": "*invoice*"  or  "regex": "^INV-\\d+",    # glob / regex on the file name
+     "min_size": 0, "max_size": 1048576,               # bytes
+     "min_age_days": 30, "max_age_days": 365,          # by mtime
+     "mime": "application/pdf" or "image/*"}           # sniffed from content
+
+Rules are compiled into an extension -> rule hash (the common, name-only case is a single
+dict lookup), one combined regex over the glob rules plus each user regex compiled on its
+own (inline flags, named groups and back-references stay valid) to reject names no name
+rule can match, and short per-extension candidate lists for rules that need stat()/MIME.
+"""
+
+import mimetypes
+import os
+import re
+import threading
+import time
+
+BUILTIN_RULES = [
+    {'type': 'image', 'folder': 'Images',
+     'ext': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg']},
+    {'type': 'document', 'folder': 'Documents',
+     'ext': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xlsx']},
+    {'type': 'code', 'folder': 'Code',
+     'ext': ['.py', '.js', '.ts', '.cpp', '.c', '.h', '.java', '.html', '.css', '.scss', '.json', '.xml']},
+    {'type': 'video', 'folder': 'Videos', 'ext': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm']},
+    {'type': 'audio', 'folder': 'Audio', 'ext': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a']},
+    {'type': 'archive', 'folder': 'Archives', 'ext': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2']},
+    {'type': 'executable', 'folder': 'Executables', 'ext': ['.exe', '.msi', '.deb', '.rpm', '.dmg', '.app']},
+]
+
+_UNDECIDED = object()
+_KEYS = {'type', 'folder', 'ext', 'name', 'regex', 'min_size', 'max_size', 'min_age_days', 'max_age_days', 'mime'}
+
+
+def split_ext(name):
+    """os.path.splitext(name)[1].lower() for a bare file name, without the general path handling"""
+    i = name.rfind('.')
+    if i <= 0 or (name[0] == '.' and not name[:i].strip('.')):
+        return ''
+    return name[i:].lower()
+
+
+def glob_to_regex(glob):
+    """Regex for a file-name glob, for re.search on the lowercased name: a leading/trailing '*'
+    just drops the anchor instead of becoming a '.*' the engine would backtrack through"""
+    core = glob.lower().strip('*')
+    out = [] if glob.startswith('*') else [r'\A']
+    i = 0
+    while i < len(core):
+        c = core[i]
+        if c == '*':
+            out.append('.*')
+        elif c == '?':
+            out.append('.')
+        elif c == '[':
+            j = i + 1
+            if core[j:j + 1] == '!':
+                j += 1
+            if core[j:j + 1] == ']':
+                j += 1
+            j = core.find(']', j)
+            if j < 0:
+                out.append(r'\[')
+            else:
+                body = core[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', r'\\') + ']')
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    if not glob.endswith('*') or not core:
+        out.append(r'\Z')
+    return '(?s:' + ''.join(out) + ')'
+
+
+def guess_mime(name):
+    return mimetypes.guess_type(name)[0] or ''
+
+
+def sniff_mime(path):
+    from content_sniffer import mime_of
+    return mime_of(path)
+
+
+def _name_hit(combined, name, lower):
+    globs, regexes = combined
+    return bool((globs is not None and globs(lower)) or any(search(name) for search in regexes))
+
+
+class Rule:
+    __slots__ = ('index', 'type', 'folder', 'user', 'exts', 'pattern', 'fold', 'min_size', 'max_size',
+                 'min_age', 'max_age', 'mime', 'spec')
+
+    def __init__(self, index, spec, user):
+        unknown = set(spec) - _KEYS
+        if unknown:
+            raise ValueError(f"Rule {index}: unknown field(s) {', '.join(sorted(unknown))}")
+        if not spec.get('type') and not spec.get('folder'):
+            raise ValueError(f"Rule {index}: needs a 'type' or a 'folder'")
+        if spec.get('name') and spec.get('regex'):
+            raise ValueError(f"Rule {index}: use either 'name' (glob) or 'regex', not both")
+        self.index = index
+        self.spec = dict(spec)
+        self.user = user
+        self.type = spec.get('type') or 'other'
+        self.folder = spec.get('folder')
+        exts = spec.get('ext')
+        if isinstance(exts, str):
+            exts = [exts]
+        self.exts = {('.' + e.lstrip('.')).lower() for e in exts} if exts else None
+        if spec.get('name'):
+            self.pattern = glob_to_regex(spec['name'])   # globs ignore case
+        elif spec.get('regex'):
+            try:
+                re.compile(spec['regex'])
+            except (re.error, TypeError) as e:
+                raise ValueError(f"Rule {index}: bad regex {spec['regex']!r}: {e}")
+            self.pattern = spec['regex']        # searched on its own, like re.search
+        else:
+            self.pattern = None
+        self.fold = bool(spec.get('name'))
+        self.min_size = spec.get('min_size')
+        self.max_size = spec.get('max_size')
+        self.min_age = spec.get('min_age_days')
+        self.max_age = spec.get('max_age_days')
+        self.mime = spec.get('mime')
+
+    @property
+    def needs_stat(self):
+        return any(v is not None for v in (self.min_size, self.max_size, self.min_age, self.max_age))
+
+    @property
+    def simple(self):
+        """Decided by the extension alone"""
+        return self.pattern is None and not self.needs_stat and not self.mime
+
+    def check(self, name, path, st, now, mime_of):
+        """Conditions beyond ext/name. st is a stat result or None (fetched lazily via path)"""
+        if self.needs_stat:
+            if st is None:
+                if path is None:
+                    return False, st
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    return False, st
+            if self.min_size is not None and st.st_size < self.min_size:
+                return False, st
+            if self.max_size is not None and st.st_size > self.max_size:
+                return False, st
+            age = (now - st.st_mtime) / 86400
+            if self.min_age is not None and age < self.min_age:
+                return False, st
+            if self.max_age is not None and age > self.max_age:
+                return False, st
+        if self.mime:
+            mime = mime_of(path) if path is not None else guess_mime(name)
+            if self.mime.endswith('/*'):
+                if not mime.startswith(self.mime[:-1]):
+                    return False, st
+            elif mime != self.mime:
+                return False, st
+        return True, st
+
+
+class RuleEngine:
+    """Compiled rule set. match() is thread-safe; set_user_rules() swaps the compiled tables."""
+
+    def __init__(self, user_rules=None, mime_of=None):
+        # MIME rules sniff the file's first bytes; bare names fall back to the extension
+        self.mime_of = mime_of or sniff_mime
+        self._lock = threading.Lock()
+        self.set_user_rules(user_rules or [])
+
+    def set_user_rules(self, user_rules):
+        """Validate + compile; raises ValueError and keeps the previous rules on bad input"""
+        rules = [Rule(i, spec, True) for i, spec in enumerate(user_rules)]
+        rules += [Rule(len(rules) + i, spec, False) for i, spec in enumerate(BUILTIN_RULES)]
+
+        anywhere = [r for r in rules if r.exts is None]   # candidates for every extension
+        by_ext = {}
+        for r in rules:
+            for e in r.exts or ():
+                by_ext.setdefault(e, []).append(r)
+        candidates = {e: sorted(rs + anywhere, key=lambda r: r.index) for e, rs in by_ext.items()}
+        # extension decides on its own when its first candidate has no further conditions
+        fast = {e: rs[0] for e, rs in candidates.items() if rs[0].simple}
+
+        named = [r for r in rules if r.pattern is not None]
+        patterns = {r.index: re.compile(r.pattern).search for r in named}
+        # one search rejects a name for every glob rule at once, over the lowercased name
+        # (case-insensitive regexes are several times slower in re). User regexes are searched
+        # one by one over the name as is: joined with '|' a valid regex can stop compiling
+        # (inline global flags, repeated group names) or change meaning (numbered back-references).
+        globs = '|'.join(r.pattern for r in named if r.fold)
+        regexes = [patterns[r.index] for r in named if not r.fold]
+        combined = (re.compile(globs).search if globs else None, regexes)
+        if combined == (None, []):
+            combined = None
+
+        # answer for names the combined regex rejects, when the rules left after dropping the
+        # name rules start with one decided by extension alone (None: nothing left to match)
+        def unnamed(rs):
+            rest = [r for r in rs if r.pattern is None]
+            if not rest:
+                return None
+            return rest[0] if rest[0].simple else _UNDECIDED
+        unnamed_by_ext = {e: unnamed(rs) for e, rs in candidates.items() if e not in fast}
+        unnamed_default = unnamed(anywhere)
+
+        with self._lock:
+            self.rules = rules
+            self.user_rules = [dict(s) for s in user_rules]
+            # swapped as one tuple so a concurrent match() never sees half-updated tables
+            self._tables = (fast, candidates, anywhere, combined, patterns, unnamed_by_ext, unnamed_default)
+
+    def match(self, name, path=None, st=None):
+        """First rule matching the file name (and stat/MIME when a rule needs them), or None"""
+        fast, candidates, anywhere, combined, patterns, unnamed_by_ext, unnamed_default = self._tables
+        ext = split_ext(name)
+        rule = fast.get(ext)
+        if rule is not None:
+            return rule
+        lower = name.lower()
+        name_hit = combined is not None and _name_hit(combined, name, lower)
+        if not name_hit:
+            rule = unnamed_by_ext.get(ext, unnamed_default)
+            if rule is not _UNDECIDED:
+                return rule
+        candidates = candidates.get(ext, anywhere)
+        now = time.time()
+        for r in candidates:
+            if r.pattern is not None and not (name_hit and patterns[r.index](lower if r.fold else name)):
+                continue
+            ok, st = r.check(name, path, st, now, self.mime_of)
+            if ok:
+                return r
+        return None
+
+    def file_type(self, name, path=None, st=None, default='other'):
+        rule = self.match(name, path, st)
+        return rule.type if rule is not None else default
+
+    def file_types(self, names, default='other'):
+        """file_type over many bare names (no stat/MIME rules) - the scanners' hot loop"""
+        fast, _, _, combined, _, unnamed_by_ext, unnamed_default = self._tables
+        out = []
+        for name in names:
+            ext = split_ext(name)
+            rule = fast.get(ext)
+            if rule is None:
+                if combined is None or not _name_hit(combined, name, name.lower()):
+                    rule = unnamed_by_ext.get(ext, unnamed_default)
+                    if rule is _UNDECIDED:
+                        rule = self.match(name)
+                else:
+                    rule = self.match(name)
+            out.append(rule.type if rule is not None else default)
+        return out
+
+    def folder_for(self, name, path=None, st=None, default='Other'):
+        rule = self.match(name, path, st)
+        return rule.folder if rule is not None and rule.folder else default
+
+    def builtin_for(self, file_type):
+        """Built-in rule for a type (used when content sniffing decides the type), or None"""
+        return next((r for r in self.rules if not r.user and r.type == file_type), None)
+
+    def extensions(self, file_type):
+        """Extensions decided as file_type by extension alone (for callers that need the set itself)"""
+        return {e for e, r in self._tables[0].items() if r.type == file_type}
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_rules():
+    """Process-wide engine (built-in rules until the app loads the user's)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RuleEngine()
+    return _engine
@@ -0,0 +1,374 @@
+"""
+RishFlow v2.0 - Semantic Index
+Offline semantic search over the text the AI indexer extracts: documents are split into
+overlapping word chunks, embedded on the CPU, and stored as a memory-mapped float16 matrix
+behind an IVF (inverted file) index, so a query touches the centroids plus a few lists.
+
+Embedding backends are pluggable (register_embedder). The default, 'hashing-lsa', needs
+nothing beyond numpy and no network: words are feature-hashed into a TF-IDF vector and
+projected onto the top singular vectors of a sample of the corpus (LSA), which is
+deterministic for a given corpus.
+
+Layout (one directory per indexed folder under INDEX_ROOT):
+  meta.json        backend, dims, IVF size, the (path, mtime) list the index was built from
+  vectors.npy      float16 chunk vectors in IVF-list order (memory-mapped)
+  centroids.npy    IVF centroids; list_ptr.npy: row range of each list
+  chunk_doc.npy    document of each row; snippets blob/offsets: text preview of each row
+  embedder/        backend state (for hashing-lsa: idf.npy, components.npy)
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+INDEX_ROOT = os.path.join('.rishflow_index', 'semantic')
+CHUNK_WORDS = 160
+CHUNK_OVERLAP = 32
+SNIPPET_CHARS = 240
+FIT_SAMPLE = 20000         # chunks the embedder is fitted on
+KMEANS_SAMPLE = 65536
+KMEANS_ITERS = 8
+EMBED_BATCH = 4096
+TOKEN_RE = re.compile(r'[a-z0-9]{2,}')
+_WORD_RE = re.compile(r'\S+')
+
+
+# ---------- embedders ----------
+
+def _rows_dot(indptr, indices, vals, matrix, block=2048):
+    """CSR (indptr, indices, vals) @ dense `matrix`, row block by row block"""
+    n = len(indptr) - 1
+    out = np.zeros((n, matrix.shape[1]), dtype=np.float32)
+    for lo in range(0, n, block):
+        hi = min(n, lo + block)
+        a, b = indptr[lo], indptr[hi]
+        if a == b:
+            continue
+        contrib = vals[a:b, None] * np.asarray(matrix[indices[a:b]], dtype=np.float32)
+        contrib = np.vstack([contrib, np.zeros((1, contrib.shape[1]), np.float32)])   # trailing empty rows
+        sums = np.add.reduceat(contrib, indptr[lo:hi] - a, axis=0)
+        sums[indptr[lo:hi] == indptr[lo + 1:hi + 1]] = 0    # reduceat leaves empty rows non-zero
+        out[lo:hi] = sums
+    return out
+
+
+def _cols_dot(indptr, indices, vals, matrix, n_features):
+    """CSR.T @ dense `matrix` (one bincount per output column)"""
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    out = np.empty((n_features, matrix.shape[1]), dtype=np.float32)
+    for j in range(matrix.shape[1]):
+        out[:, j] = np.bincount(indices, weights=vals * matrix[rows, j], minlength=n_features)
+    return out
+
+
+def _orth(m):
+    """Orthonormal basis of the columns of a tall matrix via its small Gram matrix
+    (much cheaper than QR when one side is n_features long)"""
+    w, v = np.linalg.eigh((m.T @ m).astype(np.float64))
+    keep = w > w.max() * 1e-8
+    return (m @ (v[:, keep] / np.sqrt(w[keep]))).astype(np.float32)
+
+
+class HashingLSA:
+    """Feature-hashed TF-IDF projected onto `dim` LSA components (randomized SVD)"""
+
+    name = 'hashing-lsa'
+
+    def __init__(self, dim=128, n_features=1 << 16):
+        self.dim = dim
+        self.n_features = n_features
+        self.idf = None
+        self.components = None      # n_features x dim
+        self._memo = {}
+
+    def _feature(self, token):
+        h = zlib.crc32(token.encode('utf-8'))
+        return h & (self.n_features - 1), (1.0 if h & 0x80000000 else -1.0)
+
+    def _sparse(self, texts):
+        """Rows of signed, log-scaled term counts as CSR arrays (idf applied once fitted)"""
+        memo = self._memo
+        if len(memo) > 1_000_000:
+            memo.clear()
+        indptr, indices, vals = [0], [], []
+        for text in texts:
+            for token, tf in Counter(TOKEN_RE.findall(text.lower())).items():
+                f = memo.get(token)
+                if f is None:
+                    f = memo[token] = self._feature(token)
+                indices.append(f[0])
+                vals.append(f[1] * (1.0 + math.log(tf)))
+            indptr.append(len(indices))
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        vals = np.asarray(vals, dtype=np.float32)
+        if self.idf is not None and len(vals):
+            vals *= self.idf[indices]
+        norms = np.sqrt(np.add.reduceat(np.append(vals ** 2, np.float32(0)), indptr[:-1]))
+        norms[np.diff(indptr) == 0] = 1.0
+        vals /= np.repeat(np.maximum(norms, 1e-12), np.diff(indptr)).astype(np.float32)
+        return indptr, indices, vals
+
+    def fit(self, texts, seed=0):
+        texts = list(texts)
+        indptr, indices, _ = self._sparse(texts)
+        df = np.bincount(indices, minlength=self.n_features)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        indptr, indices, vals = self._sparse(texts)
+
+        # randomized SVD (Halko et al.) with two power iterations
+        rng = np.random.default_rng(seed)
+        r = min(self.dim + 10, len(texts))
+        y = _rows_dot(indptr, indices, vals, rng.standard_normal((self.n_features, r)).astype(np.float32))
+        q = _orth(y)
+        for _ in range(2):
+            z = _orth(_cols_dot(indptr, indices, vals, q, self.n_features))
+            q = _orth(_rows_dot(indptr, indices, vals, z))
+        bt = _cols_dot(indptr, indices, vals, q, self.n_features)      # (q.T @ X).T
+        # right singular vectors of q.T @ X from the eigenvectors of its r x r Gram matrix
+        w, u = np.linalg.eigh((bt.T @ bt).astype(np.float64))
+        order = np.argsort(w)[::-1]
+        w, u = w[order], u[:, order]
+        keep = max(1, min(self.dim, int((w > w[0] * 1e-8).sum())))
+        self.components = np.ascontiguousarray(bt @ (u[:, :keep] / np.sqrt(w[:keep])), dtype=np.float32)
+        self.dim = keep
+        return self
+
+    def embed(self, texts):
+        """L2-normalised float32 vectors (zero rows for texts with no known words)"""
+        v = _rows_dot(*self._sparse(texts), self.components)
+        norms = np.linalg.norm(v, axis=1, keepdims=True)
+        return v / np.maximum(norms, 1e-12)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'idf.npy'), self.idf)
+        np.save(os.path.join(path, 'components.npy'), self.components)
+        with open(os.path.join(path, 'config.json'), 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'n_features': self.n_features}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'config.json'), 'r', encoding='utf-8') as f:
+            cfg = json.load(f)
+        emb = cls(cfg['dim'], cfg['n_features'])
+        emb.idf = np.load(os.path.join(path, 'idf.npy'))
+        emb.components = np.load(os.path.join(path, 'components.npy'), mmap_mode='r')
+        return emb
+
+
+EMBEDDERS = {HashingLSA.name: HashingLSA}
+
+
+def register_embedder(name, cls):
+    """Add a backend: cls() -> object with dim, fit(texts), embed(texts) -> normalised float32
+    rows, save(path) and classmethod load(path)"""
+    EMBEDDERS[name] = cls
+
+
+# ---------- chunking ----------
+
+def chunk_text(text, words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """[(start, end)] character spans of overlapping `words`-word windows"""
+    spans = [m.span() for m in _WORD_RE.finditer(text)]
+    if not spans:
+        return []
+    step = max(1, words - overlap)
+    out = []
+    for i in range(0, len(spans), step):
+        window = spans[i:i + words]
+        out.append((window[0][0], window[-1][1]))
+        if i + words >= len(spans):
+            break
+    return out
+
+
+def _kmeans(vectors, k, seed=0):
+    """Spherical k-means centroids (float32, unit length) on a sample of `vectors`"""
+    rng = np.random.default_rng(seed)
+    sample = vectors if len(vectors) <= KMEANS_SAMPLE else \
+        vectors[np.sort(rng.choice(len(vectors), KMEANS_SAMPLE, replace=False))]
+    sample = np.asarray(sample, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(KMEANS_ITERS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for j in range(sample.shape[1]):
+            centroids[:, j] = np.bincount(assign, weights=sample[:, j], minlength=k)
+        empty = np.linalg.norm(centroids, axis=1) < 1e-9
+        if empty.any():     # re-seed empty lists
+            centroids[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+class SemanticIndex:
+    """IVF index over float16 chunk vectors; only the probed lists are read at query time"""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = None
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def for_folder(cls, folder_path, root=INDEX_ROOT):
+        key = hashlib.sha1(os.path.abspath(folder_path).encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+        return cls(os.path.join(root, key))
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @property
+    def size(self):
+        return self.meta['chunks'] if self.meta else 0
+
+    def load(self):
+        try:
+            with open(self._file('meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = {k: np.load(self._file(f'{k}.npy'), mmap_mode='r')
+                      for k in ('vectors', 'chunk_doc', 'list_ptr', 'snip_blob', 'snip_offsets')}
+            arrays['centroids'] = np.load(self._file('centroids.npy'))
+            embedder = EMBEDDERS[meta['backend']].load(self._file('embedder'))
+        except (OSError, ValueError, KeyError):
+            return False
+        with self._lock:
+            self.meta, self.arrays, self.embedder = meta, arrays, embedder
+        return True
+
+    def is_current(self, docs):
+        """True when the index was built from exactly these (path, mtime) documents"""
+        return self.meta is not None and self.meta['docs'] == [[p, m] for p, m, _ in docs]
+
+    def build(self, docs, backend='hashing-lsa', checkpoint=None, seed=0):
+        """Index `docs` = [(path, mtime, text)]; replaces the previous index for this folder"""
+        docs = [(p, m, t) for p, m, t in docs if t]
+        checkpoint = checkpoint or (lambda: None)
+        chunk_doc, chunk_texts = [], []
+        for i, (_, _, text) in enumerate(docs):
+            for a, b in chunk_text(text):
+                chunk_doc.append(i)
+                chunk_texts.append(text[a:b])
+        if not chunk_texts:
+            return self._clear()
+
+        rng = np.random.default_rng(seed)
+        sample = chunk_texts if len(chunk_texts) <= FIT_SAMPLE else \
+            [chunk_texts[i] for i in np.sort(rng.choice(len(chunk_texts), FIT_SAMPLE, replace=False))]
+        embedder = EMBEDDERS[backend]().fit(sample)
+        checkpoint()
+        vectors = np.empty((len(chunk_texts), embedder.dim), dtype=np.float16)
+        for lo in range(0, len(chunk_texts), EMBED_BATCH):
+            checkpoint()
+            vectors[lo:lo + EMBED_BATCH] = embedder.embed(chunk_texts[lo:lo + EMBED_BATCH])
+        snippets = [' '.join(t[:SNIPPET_CHARS].split()) for t in chunk_texts]
+        return self.write(docs, embedder, backend, vectors, np.asarray(chunk_doc, dtype=np.int32), snippets, seed)
+
+    def write(self, docs, embedder, backend, vectors, chunk_doc, snippets, seed=0):
+        """Cluster `vectors` into IVF lists and write the index (rows stored list by list)"""
+        n = len(vectors)
+        nlist = max(1, min(4096, int(2 * np.sqrt(n)), n))
+        centroids = _kmeans(vectors, nlist, seed)
+        assign = np.empty(n, dtype=np.int32)
+        for lo in range(0, n, EMBED_BATCH * 4):
+            block = np.asarray(vectors[lo:lo + EMBED_BATCH * 4], dtype=np.float32)
+            assign[lo:lo + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assign, kind='stable')
+        list_ptr = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=list_ptr[1:])
+
+        tmp = self.path + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        out = np.lib.format.open_memmap(os.path.join(tmp, 'vectors.npy'), mode='w+', dtype=np.float16,
+                                        shape=(n, vectors.shape[1]))
+        for lo in range(0, n, EMBED_BATCH * 4):
+            out[lo:lo + EMBED_BATCH * 4] = vectors[order[lo:lo + EMBED_BATCH * 4]]
+        out.flush()
+        del out
+        enc = [snippets[i].encode('utf-8', 'surrogateescape') for i in order]
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in enc], out=offsets[1:])
+        np.save(os.path.join(tmp, 'snip_blob.npy'), np.frombuffer(b''.join(enc), dtype=np.uint8))
+        np.save(os.path.join(tmp, 'snip_offsets.npy'), offsets)
+        np.save(os.path.join(tmp, 'chunk_doc.npy'), np.asarray(chunk_doc)[order].astype(np.int32))
+        np.save(os.path.join(tmp, 'centroids.npy'), centroids)
+        np.save(os.path.join(tmp, 'list_ptr.npy'), list_ptr)
+        embedder.save(os.path.join(tmp, 'embedder'))
+        meta = {'backend': backend, 'dim': int(vectors.shape[1]), 'chunks': n, 'nlist': nlist,
+                'docs': [[p, m] for p, m, _ in docs]}
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        with self._lock:
+            self.meta = None
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.replace(tmp, self.path)
+        self.load()
+        return {'chunks': n, 'documents': len(docs), 'lists': nlist, 'dim': meta['dim']}
+
+    def _clear(self):
+        with self._lock:
+            self.meta = None
+            shutil.rmtree(self.path, ignore_errors=True)
+        return {'chunks': 0, 'documents': 0}
+
+    def search(self, query, limit=20, nprobe=None):
+        """Best chunk per document: [{'path', 'name', 'score', 'snippet'}], highest score first"""
+        with self._lock:
+            if not self.meta or not query.strip():
+                return []
+            meta, arrays, embedder = self.meta, self.arrays, self.embedder
+        q = embedder.embed([query])[0]
+        if not q.any():
+            return []
+        centroids, list_ptr = arrays['centroids'], arrays['list_ptr']
+        nlist = len(centroids)
+        nprobe = min(nlist, nprobe or max(8, nlist // 64))
+        probe = np.argpartition(-(centroids @ q), nprobe - 1)[:nprobe] if nprobe < nlist else np.arange(nlist)
+        rows = np.concatenate([np.arange(list_ptr[c], list_ptr[c + 1]) for c in np.sort(probe)])
+        if not len(rows):
+            return []
+        scores = np.asarray(arrays['vectors'][rows], dtype=np.float32) @ q
+        docs = np.asarray(arrays['chunk_doc'][rows])
+        # several chunks per document: keep each document's best one
+        k = min(len(rows), limit * 8)
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top])]
+        results, seen = [], set()
+        blob, offsets = arrays['snip_blob'], arrays['snip_offsets']
+        for i in top:
+            d = int(docs[i])
+            if d in seen:
+                continue
+            seen.add(d)
+            r = int(rows[i])
+            path = meta['docs'][d][0]
+            results.append({'path': path, 'name': os.path.basename(path), 'score': round(float(scores[i]), 4),
+                            'snippet': bytes(blob[offsets[r]:offsets[r + 1]]).decode('utf-8', 'surrogateescape')})
+            if len(results) >= limit:
+                break
+        return results
+
+
+def fuse(*rankings, k=60):
+    """Reciprocal-rank fusion of result lists (dicts with 'path'); the first list's entry is kept
+    for each path, with its snippet filled from a later list when empty"""
+    scores, entries = {}, {}
+    for ranking in rankings:
+        for rank, r in enumerate(ranking):
+            scores[r['path']] = scores.get(r['path'], 0.0) + 1.0 / (k + rank + 1)
+            if r['path'] not in entries:
+                entries[r['path']] = dict(r)
+            elif not entries[r['path']].get('snippet') and r.get('snippet'):
+                entries[r['path']]['snippet'] = r['snippet']
+    order = sorted(scores, key=scores.get, reverse=True)
+    return [dict(entries[p], score=round(scores[p], 5)) for p in order]
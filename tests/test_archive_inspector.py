@@ -0,0 +1,65 @@
+import gzip
+import io
+import tarfile
+import zipfile
+
+from ai_sorter import AISmartSorter
+from archive_inspector import MAX_SAMPLE_NAMES, folder_for, inspect_archive
+
+
+def _tar(path, members, mode):
+    with tarfile.open(path, mode) as tf:
+        for name, data in members:
+            ti = tarfile.TarInfo(name)
+            ti.size = len(data)
+            tf.addfile(ti, io.BytesIO(data))
+
+
+def test_routes_archives_by_member_types(tmp_path):
+    photos = tmp_path / 'holiday.zip'
+    with zipfile.ZipFile(photos, 'w') as zf:
+        for i in range(30):
+            zf.writestr(f'DCIM/img{i}.jpg', b'\xff\xd8' * 100)
+        zf.writestr('DCIM/readme.txt', 'hi')
+    info = inspect_archive(str(photos))
+    assert info['format'] == 'zip' and info['files'] == 31 and info['uncompressed_size'] == 6002
+    assert info['types']['image'] == {'count': 30, 'size': 6000} and len(info['sample']) == MAX_SAMPLE_NAMES
+    assert folder_for(info) == 'Archives/Images'
+
+    src = tmp_path / 'project.tar.gz'
+    _tar(src, [(f'proj/m{i}.py', b'import os\n' * 50) for i in range(5)] + [('proj/logo.png', b'x')], 'w:gz')
+    info = inspect_archive(str(src))
+    assert info['format'] == 'gz' and info['dominant'] == 'code' and not info['partial']
+    assert AISmartSorter().classify_file(str(src)) == 'Archives/Code'
+
+    mixed = tmp_path / 'misc.tar'
+    _tar(mixed, [('a.jpg', b'1'), ('b.pdf', b'2'), ('c.mp3', b'3')], 'w')
+    assert folder_for(inspect_archive(str(mixed))) == 'Archives'
+
+    single = tmp_path / 'report.pdf.gz'
+    with gzip.open(single, 'wb') as f:
+        f.write(b'%PDF-1.4' + b'\0' * 1000)
+    info = inspect_archive(str(single))
+    assert info['types'] == {'document': {'count': 1, 'size': 1008}} and folder_for(info) == 'Archives/Documents'
+
+    (tmp_path / 'fake.zip').write_text('not really a zip')
+    assert AISmartSorter().classify_file(str(tmp_path / 'fake.zip')) == 'Archives'
+
+
+def test_compressed_tar_stops_before_decompressing_past_budget(tmp_path, monkeypatch):
+    import archive_inspector
+
+    read = []
+
+    class CountingGzip(gzip.GzipFile):
+        def read(self, size=-1):
+            data = super().read(size)
+            read.append(len(data))
+            return data
+
+    monkeypatch.setattr(archive_inspector, 'MAX_STREAM_BYTES', 1 << 20)
+    monkeypatch.setitem(archive_inspector._OPENERS, 'gz', CountingGzip)
+    big = tmp_path / 'footage.tar.gz'
+    _tar(big, [('a.py', b'x'), ('clip.mp4', b'\0' * (8 << 20)), ('b.py', b'y')], 'w:gz')
+    info = inspect_archive(str(big))
+    assert info['partial'] and info['files'] == 2 and sum(read) < 1 << 20
@@ -0,0 +1,47 @@
+import pytest
+
+from ai_sorter import AISmartSorter
+
+
+class FakeOCR:
+    available = True
+    empty = {'text': [''], 'conf': [-1]}
+
+    def image_to_data(self, image, psm=3):
+        return self.empty
+
+    def batch(self, images, kind='string', psm=6, whitelist=None):
+        return [self.empty for _ in images]
+
+
+def test_batch_matches_per_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cv2 = pytest.importorskip('cv2')
+    np = pytest.importorskip('numpy')
+    flat = np.full((120, 160, 3), (40, 90, 200), np.uint8)
+    checker = (np.indices((120, 160)).sum(axis=0) // 4 % 2 * 255).astype(np.uint8)
+    cv2.imwrite(str(tmp_path / 'flat.png'), flat)
+    cv2.imwrite(str(tmp_path / 'grid.png'), cv2.cvtColor(checker, cv2.COLOR_GRAY2BGR))
+    cv2.imwrite(str(tmp_path / 'grid2.jpg'), cv2.cvtColor(checker[:100], cv2.COLOR_GRAY2BGR))
+    (tmp_path / 'broken.png').write_bytes(b'\x89PNG\r\n\x1a\n truncated')
+    (tmp_path / 'notes.txt').write_text('project report')
+
+    sorter = AISmartSorter(ocr=FakeOCR())
+    paths = [tmp_path / n for n in ('flat.png', 'notes.txt', 'grid.png', 'broken.png', 'grid2.jpg')]
+    batch = sorter.classify_files(paths, batch_size=2)
+    assert batch == [sorter.classify_file(p) for p in paths]
+    assert batch[0] == 'Images/Photos' and batch[2] == 'Images/Screenshots' and batch[3] == 'Images/Others'
+
+
+def test_unreadable_image_only_fails_itself(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cv2 = pytest.importorskip('cv2')
+    np = pytest.importorskip('numpy')
+    checker = (np.indices((120, 160)).sum(axis=0) // 4 % 2 * 255).astype(np.uint8)
+    cv2.imwrite(str(tmp_path / 'grid.png'), cv2.cvtColor(checker, cv2.COLOR_GRAY2BGR))
+    # vanished between listing and decode: the metadata stat raises for this file only
+    paths = [tmp_path / 'gone.png', tmp_path / 'grid.png']
+
+    sorter = AISmartSorter(ocr=FakeOCR())
+    assert sorter._decode_reduced(paths[0]) == (None, 1)
+    assert sorter.classify_image_batch(paths) == ['Images/Others', 'Images/Screenshots']
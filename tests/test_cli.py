@@ -0,0 +1,33 @@
+import json
+
+import rishflow_cli
+
+
+def _run(capsys, *argv):
+    code = rishflow_cli.main(list(argv))
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_organize_and_revert_headless(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'a.txt').write_text('a')
+    (src / 'b.jpg').write_text('b')
+    state = str(tmp_path / 'state')
+
+    code, out = _run(capsys, '--state-dir', state, 'organize', str(src), str(tmp_path / 'out'))
+    assert code == 0
+    assert out['status']['phase'] == 'completed' and out['status']['done'] == 2
+    assert (tmp_path / 'out' / 'TXT' / 'a.txt').exists()
+
+    code, out = _run(capsys, '--state-dir', state, 'revert')
+    assert code == 0 and out['count'] == 2
+    assert (src / 'a.txt').exists() and (src / 'b.jpg').exists()
+    assert not (tmp_path / 'out').exists()  # emptied category folders and root pruned
+
+
+def test_errors_set_exit_code(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    code, out = _run(capsys, 'scan', str(tmp_path / 'missing'))
+    assert code == 1 and out['error']
@@ -0,0 +1,61 @@
+import io
+import zipfile
+
+from ai_sorter import AISmartSorter
+from content_sniffer import sniff_bytes, sniff_many, type_for_mime
+
+
+def _docx_bytes():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr('[Content_Types].xml', '<Types/>')
+        zf.writestr('word/document.xml', '<w:document/>')
+    return buf.getvalue()
+
+
+def test_signatures():
+    cases = {
+        b'\xff\xd8\xff\xe0\x00\x10JFIF': 'image/jpeg',
+        b'%PDF-1.7\n': 'application/pdf',
+        b'\x00\x00\x00\x18ftypisom': 'video/mp4',
+        b'RIFF\x00\x00\x00\x00WEBPVP8 ': 'image/webp',
+        b'\x7fELF\x02\x01\x01': 'application/x-executable',
+        b'Dear Sir,\nplease find the invoice.\n': 'text/plain',
+        '﻿hello'.encode('utf-16'): 'text/plain',
+        b'\x00\x13\x9a\x01\x00\xff\x00': 'application/octet-stream',
+    }
+    for head, mime in cases.items():
+        assert sniff_bytes(head) == mime, head
+    assert type_for_mime(sniff_bytes(_docx_bytes())) == 'document'
+
+
+def test_sorter_routes_by_content(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'scan').write_bytes(b'%PDF-1.4\n%%EOF\n')            # no extension
+    (tmp_path / 'report.pdf').write_bytes(b'\x7fELF\x02\x01\x01' + b'\x00' * 64)
+    (tmp_path / 'notes').write_text('project proposal draft')
+
+    sorter = AISmartSorter()
+    paths = [tmp_path / n for n in ('scan', 'report.pdf', 'notes')]
+    assert sniff_many(paths, workers=1) == ['application/pdf', 'application/x-executable', 'text/plain']
+    results = sorter.classify_files(paths)
+    assert results[0].startswith('Documents/')
+    assert results[1] == 'Executables'                 # binary never reaches the PDF/OCR path
+    assert results[2] == 'Documents/Reports/notes'     # extension-less text read as a document
+
+
+def test_ooxml_recognised_from_central_directory(tmp_path, monkeypatch):
+    import os
+    monkeypatch.chdir(tmp_path)
+    # parts in the order some writers use: a large thumbnail pushes word/ out of the first 4 KB
+    with zipfile.ZipFile(tmp_path / 'report.docx', 'w') as zf:
+        zf.writestr('[Content_Types].xml', '<Types/>')
+        zf.writestr('_rels/.rels', '<Relationships/>')
+        zf.writestr('docProps/thumbnail.jpeg', os.urandom(20000))
+        zf.writestr('word/document.xml', '<w:document/>')
+    with zipfile.ZipFile(tmp_path / 'backup.zip', 'w') as zf:
+        zf.writestr('excel_xl/data.txt', 'not a workbook')
+
+    assert type_for_mime(sniff_many([tmp_path / 'report.docx'])[0]) == 'document'
+    assert sniff_many([tmp_path / 'backup.zip']) == ['application/zip']
+    assert AISmartSorter().classify_file(tmp_path / 'report.docx').startswith('Documents')
@@ -0,0 +1,74 @@
+import os
+
+from app import RishFlowAPI
+from dedupe_actions import DedupeEngine, undo
+from duplicate_finder import DuplicateFinder
+
+
+def _dupes(tmp_path):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    for name in ('a.jpg', 'b.jpg', 'c.jpg'):
+        (folder / name).write_bytes(b'same bytes' * 1000)
+    os.utime(folder / 'b.jpg', (1_000_000, 1_000_000))
+    (folder / 'other.txt').write_text('unique')
+    return folder, DuplicateFinder().find_duplicates(str(folder))
+
+
+def test_links_reverify_and_undo(tmp_path):
+    folder, groups = _dupes(tmp_path)
+    groups[0]['keep'] = str(folder / 'a.jpg')
+    (folder / 'c.jpg').write_bytes(b'edited since the scan' * 500)     # same size, new content
+    journal = str(tmp_path / 'dedupe.jsonl')
+    summary = DedupeEngine('auto', journal_path=journal).run(groups)
+
+    assert summary['done'] == 1 and summary['skipped'] == {'changed': 1}
+    assert summary['bytes_reclaimed'] == 10000
+    assert os.path.samefile(folder / 'a.jpg', folder / 'b.jpg') or summary['methods'] == {'reflink': 1}
+    assert (folder / 'b.jpg').read_bytes() == b'same bytes' * 1000
+
+    assert undo(journal)['restored'] == 1
+    assert not os.path.samefile(folder / 'a.jpg', folder / 'b.jpg')
+    assert os.path.getmtime(folder / 'b.jpg') == 1_000_000 and not os.path.exists(journal)
+
+
+def test_quarantine_and_revert_through_api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder, groups = _dupes(tmp_path)
+    api = RishFlowAPI()
+    summary = api.dedupe_files(groups=groups, action='quarantine', keep='oldest')
+    assert summary['done'] == 2 and sorted(os.listdir(folder)) == ['b.jpg', 'other.txt']
+    assert api.revert_dedupe()['restored'] == 2
+    assert sorted(os.listdir(folder)) == ['a.jpg', 'b.jpg', 'c.jpg', 'other.txt']
+    assert not os.path.exists(tmp_path / '.rishflow_quarantine')
+    assert 'error' in api.dedupe_files(groups=groups, action='delete')
+
+
+def test_each_undo_reverts_one_earlier_run(tmp_path):
+    folder, groups = _dupes(tmp_path)
+    journal, quarantine = str(tmp_path / 'dedupe.jsonl'), str(tmp_path / 'q')
+    first = DedupeEngine('quarantine', quarantine_dir=quarantine, journal_path=journal).run(
+        [dict(groups[0], files=[str(folder / 'b.jpg'), str(folder / 'a.jpg')])])
+    second = DedupeEngine('quarantine', quarantine_dir=quarantine, journal_path=journal).run(groups, keep='oldest')
+    assert first['run_id'] != second['run_id'] and sorted(os.listdir(folder)) == ['b.jpg', 'other.txt']
+
+    assert undo(journal) == {'restored': 1, 'failed': 0, 'run_id': second['run_id']}
+    assert sorted(os.listdir(folder)) == ['b.jpg', 'c.jpg', 'other.txt']
+    assert undo(journal)['run_id'] == first['run_id']
+    assert sorted(os.listdir(folder)) == ['a.jpg', 'b.jpg', 'c.jpg', 'other.txt']
+    assert not os.path.exists(journal) and not os.path.exists(quarantine)
+
+
+def test_organize_skips_identical_files_at_destination(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src, dest = tmp_path / 'in', tmp_path / 'out'
+    (dest / 'TXT').mkdir(parents=True)
+    src.mkdir()
+    (src / 'same.txt').write_text('hello')
+    (dest / 'TXT' / 'same.txt').write_text('hello')
+    (src / 'new.txt').write_text('world')
+    api = RishFlowAPI()
+    api._organize_files(str(src), str(dest), 'File Extension', skip_identical=True)
+
+    assert os.listdir(src) == ['same.txt'] and api._organize_meta['identical'] == 1
+    assert sorted(os.listdir(dest / 'TXT')) == ['new.txt', 'same.txt']
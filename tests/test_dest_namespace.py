@@ -0,0 +1,60 @@
+import os
+
+from app import RishFlowAPI
+from dest_namespace import DestinationNamespace
+
+
+def test_claims_suffix_collisions_without_reprobing(tmp_path):
+    (tmp_path / 'report.pdf').write_text('old')
+    (tmp_path / 'report (1).pdf').write_text('older')
+    ns = DestinationNamespace(case_insensitive=True)
+    d = str(tmp_path)
+
+    assert ns.claim('x', os.path.join(d, 'report.pdf')) == os.path.join(d, 'report (2).pdf')
+    assert ns.claim('y', os.path.join(d, 'REPORT.pdf')) == os.path.join(d, 'REPORT (3).pdf')
+    assert ns.claim('z', os.path.join(d, 'new.pdf')) == os.path.join(d, 'new.pdf')
+    (tmp_path / 'appeared.pdf').write_text('listed once, so not seen')
+    assert ns.claim('w', os.path.join(d, 'appeared.pdf')) == os.path.join(d, 'appeared.pdf')
+    ns.release(os.path.join(d, 'new.pdf'))
+    assert os.path.join(d, 'new.pdf') not in ns and ns.renamed == 2
+
+
+def test_organize_never_overwrites_existing_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src, dest = tmp_path / 'in', tmp_path / 'out'
+    (dest / 'TXT').mkdir(parents=True)
+    src.mkdir()
+    (dest / 'TXT' / 'notes.txt').write_text('keep me')
+    (src / 'notes.txt').write_text('incoming')
+    api = RishFlowAPI()
+    api._organize_files(str(src), str(dest), 'File Extension')
+
+    assert (dest / 'TXT' / 'notes.txt').read_text() == 'keep me'
+    assert (dest / 'TXT' / 'notes (1).txt').read_text() == 'incoming'
+    assert api._organize_meta['renamed'] == 1 and os.listdir(src) == []
+    assert api.revert_last()['count'] == 1 and (src / 'notes.txt').read_text() == 'incoming'
+
+
+def test_resume_recovers_suffixed_move_from_intent(tmp_path, monkeypatch):
+    from organize_jobs import OrganizeJob
+
+    monkeypatch.chdir(tmp_path)
+    src, dest = tmp_path / 'in', tmp_path / 'out'
+    (dest / 'TXT').mkdir(parents=True)
+    src.mkdir()
+    (dest / 'TXT' / 'x.txt').write_text('already there')
+    (src / 'x.txt').write_text('incoming')
+    job = OrganizeJob.create(str(src), str(dest), 'File Extension')
+    job.set_plan([(str(src / 'x.txt'), str(dest / 'TXT' / 'x.txt'), 'TXT')])
+    # crash between the move and its journal line
+    job.record_intent(str(src / 'x.txt'), str(dest / 'TXT' / 'x (1).txt'))
+    os.rename(src / 'x.txt', dest / 'TXT' / 'x (1).txt')
+    job.close()
+
+    api = RishFlowAPI()
+    assert api.resume_organizing(job.job_id)['status'] == 'resumed'
+    api.organizer_thread.join(10)
+    assert OrganizeJob.load(job.job_id).completed == {str(src / 'x.txt'): str(dest / 'TXT' / 'x (1).txt')}
+    assert api.revert_last()['count'] == 1
+    assert (src / 'x.txt').read_text() == 'incoming'
+    assert (dest / 'TXT' / 'x.txt').read_text() == 'already there'
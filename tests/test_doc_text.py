@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from ai_sorter import AISmartSorter
+from doc_text import DocumentText, cache_path_for
+from synth_tree import _write_pdf
+
+
+class NoOCR:
+    available = False
+
+    def batch(self, *a, **k):
+        raise AssertionError('embedded text must not be OCR\'d')
+
+
+def _docx(path, paragraphs):
+    w = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    body = ''.join(f'<w:p><w:r><w:t>{p}</w:t></w:r></w:p>' for p in paragraphs)
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('word/document.xml', f'<w:document xmlns:w="{w}"><w:body>{body}</w:body></w:document>')
+
+
+def test_formats_read_embedded_text(tmp_path):
+    dt = DocumentText(cache_dir=str(tmp_path / 'cache'), ocr=NoOCR())
+    _docx(tmp_path / 'a.docx', ['Quarterly', 'project report'])
+    _write_pdf(str(tmp_path / 'b.pdf'), ['Invoice 2024-03-01', 'Total 12.50'])
+    (tmp_path / 'c.rtf').write_text(r'{\rtf1{\fonttbl{\f0 Arial;}}{\*\generator x;}Resume of Jane\par Skills}')
+    ns = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+    with zipfile.ZipFile(tmp_path / 'd.odt', 'w') as zf:
+        zf.writestr('content.xml', f'<r xmlns:text="{ns}"><text:h>Payment</text:h><text:p>due <text:span>now</text:span></text:p></r>')
+
+    assert dt.text(str(tmp_path / 'a.docx')) == 'Quarterly\nproject report'
+    assert 'Invoice 2024-03-01' in dt.text(str(tmp_path / 'b.pdf'))
+    assert dt.text(str(tmp_path / 'c.rtf')) == 'Resume of Jane\nSkills'
+    assert dt.text(str(tmp_path / 'd.odt')) == 'Payment\ndue now'
+
+
+def test_sorter_and_index_share_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write_pdf('inv.pdf', ['Payment receipt 2024-03-01'])
+    sorter = AISmartSorter(ocr=NoOCR())
+    assert sorter.classify_document(tmp_path / 'inv.pdf').startswith('Documents/Receipts/')
+
+    with open(cache_path_for('inv.pdf'), encoding='utf-8') as f:
+        entry = json.load(f)
+    assert entry['source'] == 'text' and entry['truncated'] is False
+
+    # a complete classification read satisfies the index; no second parse
+    calls = []
+    monkeypatch.setattr('doc_text.read_pdf', lambda *a: calls.append(a))
+    assert DocumentText().lookup('inv.pdf', max_pages=20, max_chars=None) is not None
+
+    # legacy index entries ({mtime, text}) still serve classification
+    legacy = {'mtime': os.path.getmtime('inv.pdf'), 'text': 'old report'}
+    with open(cache_path_for('inv.pdf'), 'w', encoding='utf-8') as f:
+        json.dump(legacy, f)
+    assert sorter.classify_document(tmp_path / 'inv.pdf') == 'Documents/Reports/inv'
+    assert calls == []
@@ -0,0 +1,70 @@
+import json
+
+from app import RishFlowAPI
+from file_catalog import FileCatalog
+
+
+def _catalog():
+    cat = FileCatalog()
+    cat.add('/r/Images', 'b.jpg', 10, 2.0, 'image', 'Images')
+    cat.add('/r/Docs', 'A.pdf', 30, 1.0, 'document', 'Docs')
+    cat.add('/r', 'c.txt', 20, 3.0, 'file')
+    return cat
+
+
+def test_columns_sort_filter_aggregate_and_wire():
+    cat = _catalog()
+    assert cat.sort('name').tolist() == [1, 0, 2]
+    assert cat.sort('size', descending=True).tolist() == [1, 2, 0]
+    assert cat.sort('category').tolist() == [2, 1, 0]          # '' < 'Docs' < 'Images'
+    assert cat.filter(min_size=15).tolist() == [1, 2]
+    assert cat.filter(types=['image', 'nope'], under='/r').tolist() == [0]
+    assert cat.filter(name_contains='PDF').tolist() == [1]
+    assert cat.aggregate('type') == {'image': {'count': 1, 'size': 10}, 'document': {'count': 1, 'size': 30},
+                                     'file': {'count': 1, 'size': 20}}
+    assert cat.largest(2).tolist() == [1, 2]
+
+    wire = json.loads(json.dumps(cat.encode([2, 1])))
+    assert wire['count'] == 2 and wire['dirs'] == ['/r/Docs', '/r']     # only the tables rows use
+    assert FileCatalog.decode(wire).to_records() == cat.to_records([2, 1])
+    assert cat.record(2) == {'name': 'c.txt', 'path': '/r/c.txt', 'size': 20, 'modified': 3.0, 'type': 'file'}
+
+
+def test_browse_files_pages_sorted_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / 'Sorted'
+    (root / 'Images').mkdir(parents=True)
+    for i in range(5):
+        (root / 'Images' / f'img{i}.jpg').write_bytes(b'x' * (i + 1))
+    (root / 'loose.txt').write_text('hi')
+    api = RishFlowAPI()
+
+    full = api.scan_organized_files(str(root))['files']
+    compact = FileCatalog.decode(api.scan_organized_files(str(root), compact=True)['catalog'])
+    assert sorted(compact.to_records(), key=lambda r: r['path']) == sorted(full, key=lambda r: r['path'])
+
+    page = api.browse_files(str(root), sort_by='size', descending=True, filters={'types': ['image']}, limit=2)
+    assert page['total'] == 5 and page['by_category'] == {'Images': {'count': 5, 'size': 15}}
+    assert FileCatalog.decode(page['catalog']).names() == ['img4.jpg', 'img3.jpg']
+    assert 'error' in api.browse_files(str(root), filters={'bogus': 1})
+
+
+def test_browse_catalog_follows_app_moves_and_stays_bounded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src, root = tmp_path / 'in', tmp_path / 'Sorted'
+    src.mkdir()
+    root.mkdir()
+    (src / 'a.txt').write_text('a')
+    (root / 'loose.txt').write_text('keeps the root from being pruned on revert')
+    api = RishFlowAPI()
+    assert api.browse_files(str(root))['total'] == 1
+
+    api._organize_files(str(src), str(root), 'File Extension')
+    assert api.browse_files(str(root))['total'] == 2
+    api.revert_last()
+    assert api.browse_files(str(root))['total'] == 1
+
+    for name in ('x', 'y', 'z'):
+        (tmp_path / name).mkdir()
+        api.browse_files(str(tmp_path / name))
+    assert list(api._catalogs) == [str(tmp_path / 'y'), str(tmp_path / 'z')]
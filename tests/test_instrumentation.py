@@ -0,0 +1,37 @@
+import os
+
+from instrumentation import Instrumentation
+from job_manager import JobManager
+
+
+def test_percentiles_and_disabled_noop():
+    inst = Instrumentation(enabled=False)
+    with inst.span('op'):
+        pass
+    inst.record('op', 1.0)
+    assert inst.summary()['operations'] == {}
+
+    inst.enabled = True
+    for ms in range(1, 101):
+        inst.record('op', ms / 1000)
+    inst.count('hits', 3)
+    op = inst.summary()['operations']['op']
+    assert op['count'] == 100
+    assert abs(op['p50_ms'] - 50.5) < 0.01
+    assert 94 < op['p95_ms'] < 96 and 98 < op['p99_ms'] <= 100
+    assert op['max_ms'] == 100.0
+    assert inst.summary()['counters'] == {'hits': 3}
+
+
+def test_profile_next_job_writes_capture(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = JobManager()
+    manager.profile_next(kind='index')
+
+    _, result = manager.run('dedupe', lambda job: sum(range(1000)))
+    assert manager.list_jobs()[0]['profile'] is None  # armed for 'index' only
+
+    job, result = manager.run('index', lambda job: sum(range(1000)))
+    assert result == sum(range(1000))
+    assert job.profile.endswith('.prof') and os.path.exists(job.profile)
+    assert os.path.exists(job.profile[:-len('.prof')] + '.txt')
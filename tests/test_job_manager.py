@@ -0,0 +1,133 @@
+import threading
+import time
+
+from job_manager import JobManager
+
+
+def _wait_for(pred, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if pred():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _looping_job(counter, stop):
+    def run(job):
+        while not stop.is_set():
+            job.checkpoint()
+            counter.append(1)
+            time.sleep(0.005)
+        return len(counter)
+    return run
+
+
+def test_cancel_stops_job_at_checkpoint():
+    manager = JobManager()
+    counter, stop = [], threading.Event()
+    job = manager.submit('test', _looping_job(counter, stop))
+    assert _wait_for(lambda: counter)
+
+    assert manager.cancel(job.job_id)
+    job.thread.join(5)
+    assert job.state == 'cancelled'
+    assert manager.list_jobs()[0]['state'] == 'cancelled'
+
+
+def test_pause_blocks_until_resumed():
+    manager = JobManager()
+    counter, stop = [], threading.Event()
+    job = manager.submit('test', _looping_job(counter, stop))
+    assert _wait_for(lambda: counter)
+
+    manager.pause(job.job_id)
+    assert _wait_for(lambda: job.state == 'paused')
+    seen = len(counter)
+    time.sleep(0.1)
+    assert len(counter) == seen
+
+    manager.resume(job.job_id)
+    assert _wait_for(lambda: len(counter) > seen)
+    stop.set()
+    job.thread.join(5)
+    assert job.state == 'completed'
+
+
+def test_lower_priority_job_waits_for_higher():
+    manager = JobManager()
+    low_counter, high_counter, stop = [], [], threading.Event()
+    high = manager.submit('high', _looping_job(high_counter, stop), priority=10)
+    assert _wait_for(lambda: high_counter)
+    low = manager.submit('low', _looping_job(low_counter, threading.Event()), priority=0)
+
+    assert _wait_for(lambda: low.state == 'waiting')
+    assert not low_counter
+
+    stop.set()
+    high.thread.join(5)
+    assert _wait_for(lambda: low_counter)
+    manager.cancel(low.job_id)
+    low.thread.join(5)
+
+
+def test_run_inline_registers_job():
+    manager = JobManager()
+    job, result = manager.run('inline', lambda job: 42)
+    assert result == 42 and job.state == 'completed'
+
+
+def test_scheduler_limits_concurrent_jobs_and_admits_by_priority():
+    from io_scheduler import IOScheduler
+
+    manager = JobManager(scheduler=IOScheduler({'max_concurrent_jobs': 1, 'idle_only_when_active': False,
+                                                'idle_only_on_battery': False}))
+    order, release = [], threading.Event()
+
+    def blocker(job):
+        order.append(job.kind)
+        release.wait(5)
+
+    first = manager.submit('first', blocker, priority=0)
+    assert _wait_for(lambda: order == ['first'])
+    low = manager.submit('low', lambda job: order.append('low'), priority=0)
+    time.sleep(0.05)
+    high = manager.submit('high', lambda job: order.append('high'), priority=5)
+    assert _wait_for(lambda: high.state == 'queued' and low.state == 'queued')
+
+    release.set()
+    for job in (first, low, high):
+        job.thread.join(5)
+    assert order == ['first', 'high', 'low']
+
+
+def test_idle_only_mode_defers_background_jobs_but_not_inline_calls(monkeypatch):
+    import io_scheduler
+    from io_scheduler import IOScheduler
+
+    monkeypatch.setattr(io_scheduler, 'user_idle_seconds', lambda: 0.0)
+    monkeypatch.setattr(io_scheduler, 'on_battery', lambda: True)
+    manager = JobManager(scheduler=IOScheduler())
+    counter = []
+    bg = manager.submit('index', _looping_job(counter, threading.Event()), priority=0)
+    assert _wait_for(lambda: bg.state == 'deferred') and not counter
+
+    job, result = manager.run('dedupe', lambda job: job.checkpoint() or 'done', priority=5)
+    assert result == 'done' and job.state == 'completed'
+    manager.cancel(bg.job_id)
+    bg.thread.join(5)
+
+
+def test_unlimited_scheduler_charges_without_stat(monkeypatch, tmp_path):
+    import io_scheduler
+    from io_scheduler import IOScheduler
+
+    calls = []
+    monkeypatch.setattr(io_scheduler, 'device_of', lambda p: calls.append(p) or 1)
+    scheduler = IOScheduler()
+    assert scheduler.reserve(str(tmp_path / 'a'), 1 << 20) == 0.0 and not calls
+
+    scheduler.configure({'default': {'bytes_per_sec': 1 << 30, 'iops': None}})
+    for name in ('a', 'b', 'c'):
+        scheduler.reserve(str(tmp_path / name), 4096)
+    assert calls == [str(tmp_path)]
@@ -0,0 +1,64 @@
+import job_progress
+from job_progress import JobProgress
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_eta_from_phase_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_progress.time, 'perf_counter', clock)
+    pushed = []
+    progress = JobProgress('j1', push=pushed.append)
+    clock.now += 5                                   # setup time is not part of the phase rate
+    progress.start_phase('moving', files_total=100, bytes_total=1000)
+    clock.now += 10
+    progress.advance(files=25, nbytes=250)
+    snap = progress.snapshot()
+    assert snap['files_per_s'] == 2.5 and snap['bytes_per_s'] == 25.0
+    assert snap['eta_seconds'] == 30.0                # 75 files left at 2.5 files/s
+    assert snap['elapsed'] == 15.0 and snap['phase_elapsed'] == 10.0
+    assert pushed[-1]['phase'] == 'moving'
+
+    progress.advance(files=100)                      # overshoot never gives a negative ETA
+    assert progress.snapshot()['eta_seconds'] == 0.0
+
+
+def test_nested_stages_are_exclusive(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_progress.time, 'perf_counter', clock)
+    progress = JobProgress('j2')
+    with progress.stage('classify'):
+        clock.now += 1
+        with progress.stage('ocr'):
+            clock.now += 3
+        clock.now += 2
+        with progress.stage('ocr'):
+            clock.now += 0.5
+    snap = progress.snapshot()
+    assert snap['stage_seconds'] == {'classify': 3.0, 'ocr': 3.5}
+    assert snap['stage_calls'] == {'classify': 1, 'ocr': 2}
+
+
+def test_zero_elapsed_and_zero_total(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_progress.time, 'perf_counter', clock)
+    progress = JobProgress('j3')
+    progress.start_phase('scanning', files_total=10)
+    snap = progress.snapshot()                       # no time has passed and nothing is done
+    assert snap['files_per_s'] == 0 and snap['eta_seconds'] is None
+
+    progress.start_phase('scanning')                 # unknown total: rate but no ETA
+    clock.now += 2
+    progress.advance(files=4)
+    snap = progress.snapshot()
+    assert snap['files_per_s'] == 2.0 and snap['eta_seconds'] is None
+
+    progress.finish()                                # finished jobs stop the clock
+    clock.now += 50
+    assert progress.snapshot()['elapsed'] == 2.0
@@ -0,0 +1,88 @@
+import os
+import struct
+import wave
+
+from PIL import Image
+
+from app import RishFlowAPI
+from media_metadata import MediaMetadata, folder_for, read_metadata
+
+
+def _box(kind, body):
+    return struct.pack('>I', 8 + len(body)) + kind + body
+
+
+def _full(kind, body):
+    return _box(kind, b'\0\0\0\0' + body)
+
+
+def _mp4(path, width, height, seconds):
+    mvhd = _full(b'mvhd', struct.pack('>IIII', 3700000000, 3700000000, 600, 600 * seconds) + b'\0' * 80)
+    tkhd = _full(b'tkhd', b'\0' * 72 + struct.pack('>II', width << 16, height << 16))
+    # moov after a large mdat, as cameras write it: reached by seeking, not reading
+    path.write_bytes(_box(b'ftyp', b'isom\0\0\0\0isom') + _box(b'mdat', b'\0' * 500_000)
+                     + _box(b'moov', mvhd + _box(b'trak', tkhd)))
+
+
+def test_header_fields_for_photos_video_and_audio(tmp_path):
+    exif = Image.Exif()
+    exif[0x010F], exif[0x0110] = 'Canon', 'Canon EOS R5'
+    exif.get_ifd(0x8769)[0x9003] = '2021:07:04 10:20:30'
+    Image.new('RGB', (4000, 3000)).save(tmp_path / 'a.jpg', exif=exif)
+    meta = read_metadata(str(tmp_path / 'a.jpg'))
+    assert meta['camera'] == 'Canon EOS R5' and (meta['width'], meta['height']) == (4000, 3000)
+    assert folder_for('Capture Date', meta, os.stat(tmp_path / 'a.jpg')) == '2021-07-04'
+    assert folder_for('Resolution', meta, None) == '12-24 MP'
+
+    _mp4(tmp_path / 'clip.mov', 1920, 1080, 95)
+    meta = read_metadata(str(tmp_path / 'clip.mov'))
+    assert meta['kind'] == 'video' and meta['duration'] == 95 and meta['height'] == 1080
+    assert folder_for('Resolution', meta, None) == '1080p' and folder_for('Duration', meta, None) == '1-5 min'
+
+    text = b'\x03Artist'
+    frame = b'TPE1' + struct.pack('>I', len(text)) + b'\0\0' + text
+    cbr = (bytes([0xFF, 0xFB, 0x90, 0x00]) + b'\0' * 413) * 1000        # 128 kbps MPEG-1 layer III
+    (tmp_path / 'song.mp3').write_bytes(b'ID3\x03\x00\x00' + bytes([0, 0, 0, len(frame)]) + frame + cbr)
+    meta = read_metadata(str(tmp_path / 'song.mp3'))
+    assert meta['artist'] == 'Artist' and abs(meta['duration'] - 26.06) < 0.01
+
+    with wave.open(str(tmp_path / 'tone.wav'), 'wb') as w:
+        w.setnchannels(1), w.setsampwidth(2), w.setframerate(8000)
+        w.writeframes(b'\0' * 48000)
+    assert read_metadata(str(tmp_path / 'tone.wav')) == {'kind': 'audio', 'duration': 3.0}
+    (tmp_path / 'notes.txt').write_text('not media')
+    assert read_metadata(str(tmp_path / 'notes.txt')) == {}
+
+    reader = MediaMetadata()
+    paths = [str(tmp_path / n) for n in ('a.jpg', 'clip.mov', 'song.mp3', 'tone.wav', 'notes.txt')]
+    assert reader.read_many(paths)[paths[1]]['width'] == 1920 and len(reader._cache) == 5
+
+
+def test_organize_by_resolution(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src, dest = tmp_path / 'in', tmp_path / 'out'
+    src.mkdir()
+    _mp4(src / 'uhd.mp4', 3840, 2160, 10)
+    _mp4(src / 'hd.mp4', 1280, 720, 10)
+    (src / 'readme.txt').write_text('hi')
+    RishFlowAPI()._organize_files(str(src), str(dest), 'Resolution')
+    assert sorted(os.listdir(dest)) == ['4K', '720p', 'Unknown Resolution']
+
+
+def test_numeric_make_and_model_are_ignored(tmp_path, monkeypatch):
+    # IFD0 with Make as SHORT and Model as LONG instead of ASCII
+    ifd = struct.pack('<H', 2) + struct.pack('<HHII', 0x010F, 3, 1, 7) + struct.pack('<HHII', 0x0110, 4, 1, 9)
+    tiff = b'II*\0' + struct.pack('<I', 8) + ifd + b'\0\0\0\0'
+    app1 = b'Exif\0\0' + tiff
+    sof = b'\xff\xc0' + struct.pack('>HBHHB', 8, 8, 480, 640, 0)
+    (tmp_path / 'in').mkdir()
+    (tmp_path / 'in' / 'odd.jpg').write_bytes(b'\xff\xd8\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1
+                                              + sof + b'\xff\xd9')
+    meta = read_metadata(str(tmp_path / 'in' / 'odd.jpg'))
+    assert 'camera' not in meta and (meta['width'], meta['height']) == (640, 480)
+
+    monkeypatch.chdir(tmp_path)
+    api = RishFlowAPI()
+    api._organize_files(str(tmp_path / 'in'), str(tmp_path / 'out'), 'Camera Model')
+    assert os.listdir(tmp_path / 'out') == ['Unknown Camera']
+    assert 'metadata' in api.get_media_metadata([str(tmp_path / 'out' / 'Unknown Camera' / 'odd.jpg')])
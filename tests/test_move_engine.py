@@ -0,0 +1,72 @@
+import os
+
+from move_engine import MoveEngine, copy_file, prune_empty_dirs
+
+
+def _make(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_same_device_uses_rename(tmp_path):
+    src = tmp_path / 'src' / 'a.txt'
+    dest = tmp_path / 'dest' / 'Docs' / 'a.txt'
+    _make(str(src), b'hello')
+
+    res = MoveEngine().move(str(src), str(dest))
+
+    assert res['ok'] and res['method'] == 'rename'
+    assert not src.exists()
+    assert dest.read_bytes() == b'hello'
+
+
+def test_cross_device_copies_verifies_and_removes_source(tmp_path, monkeypatch):
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    pairs = []
+    for i in range(6):
+        src = tmp_path / 'src' / f'f{i}.bin'
+        _make(str(src), data)
+        pairs.append((str(src), str(tmp_path / 'dest' / 'Other' / f'f{i}.bin')))
+
+    engine = MoveEngine(max_workers=2, verify='hash')
+    monkeypatch.setattr(engine, 'same_device', lambda s, d: False)
+    seen = []
+    results = engine.move_many(pairs, on_result=seen.append)
+
+    assert len(results) == len(seen) == 6
+    assert all(r['ok'] and r['method'] == 'copy' for r in results)
+    for src, dest in pairs:
+        assert not os.path.exists(src)
+        assert not os.path.exists(dest + '.rishflow-part')
+        with open(dest, 'rb') as f:
+            assert f.read() == data
+
+    report = engine.get_throughput()
+    assert sum(d['files'] for d in report) == 6
+    assert sum(d['bytes'] for d in report) == 6 * len(data)
+
+
+def test_failed_move_keeps_source(tmp_path):
+    src = tmp_path / 'missing.txt'
+    res = MoveEngine().move(str(src), str(tmp_path / 'dest' / 'missing.txt'))
+    assert not res['ok'] and res['error']
+
+
+def test_copy_file_handles_empty_file(tmp_path):
+    src = tmp_path / 'empty'
+    src.write_bytes(b'')
+    assert copy_file(str(src), str(tmp_path / 'copy')) == 0
+    assert (tmp_path / 'copy').read_bytes() == b''
+
+
+def test_prune_empty_dirs_bottom_up(tmp_path):
+    _make(str(tmp_path / 'out' / 'A' / 'x' / 'Thumbs.db'), b'')
+    _make(str(tmp_path / 'out' / 'B' / 'keep.txt'), b'k')
+    os.makedirs(tmp_path / 'out' / 'A' / 'y')
+
+    removed = prune_empty_dirs([str(tmp_path / 'out' / 'A' / 'x'), str(tmp_path / 'out' / 'A' / 'y'),
+                                str(tmp_path / 'out' / 'B')])
+    assert sorted(os.path.relpath(d, tmp_path) for d in removed) == [
+        os.path.join('out', 'A'), os.path.join('out', 'A', 'x'), os.path.join('out', 'A', 'y')]
+    assert os.listdir(tmp_path / 'out') == ['B']
@@ -0,0 +1,33 @@
+import os
+
+from name_index import NameIndex
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+
+
+def test_fuzzy_search_and_incremental_updates(tmp_path):
+    root = tmp_path / 'Sorted'
+    for rel in ('Documents/invoice_2024.pdf', 'Documents/report_final.docx', 'Images/holiday_photo.jpg'):
+        _touch(str(root / rel))
+    index = NameIndex(str(tmp_path / 'idx'))
+    assert index.build([str(root)])['files'] == 3
+
+    assert index.search('invoce')[0]['name'] == 'invoice_2024.pdf'          # typo
+    assert index.search('HOLI')[0]['name'] == 'holiday_photo.jpg'
+    assert {r['name'] for r in index.search('documents')} == {'invoice_2024.pdf', 'report_final.docx'}
+    assert index.search('x') == []
+
+    old, new = str(root / 'Documents/invoice_2024.pdf'), str(root / 'Finance/invoice_2024.pdf')
+    _touch(new)
+    os.remove(old)
+    index.update(added=[new, '/elsewhere/not_indexed.txt'], removed=[old])
+    assert [r['path'] for r in index.search('invoice')] == [new]
+
+    reopened = NameIndex(str(tmp_path / 'idx'))                              # journal replayed
+    assert [r['path'] for r in reopened.search('invoice')] == [new]
+    assert reopened.search('invoice', under=str(root / 'Images')) == []
+    reopened.compact()
+    assert reopened.stats()['journal_docs'] == 0 and reopened.size == 3
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from ocr_service import OCRError, OCRService, _parse_tsv, image_format
+
+
+def test_parse_tsv_splits_pages():
+    tsv = ('level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n'
+           '1\t1\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t\n'
+           '5\t1\t1\t1\t1\t1\t1\t1\t10\t10\t91.5\tInvoice\n'
+           '1\t2\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t\n'
+           '5\t2\t1\t1\t1\t1\t1\t1\t10\t10\t12\tx\n')
+    pages = _parse_tsv(tsv)
+    assert pages[1] == {'text': ['', 'Invoice'], 'conf': [-1, 91]}
+    assert pages[2]['conf'] == [-1, 12]
+
+
+def test_rejects_non_images_before_queueing(tmp_path):
+    doc = tmp_path / 'a.docx'
+    doc.write_bytes(b'PK\x03\x04 not an image')
+    png = tmp_path / 'b.png'
+    png.write_bytes(b'\x89PNG\r\n\x1a\n' + b'\x00' * 16)
+    assert image_format(str(doc)) is None
+    assert image_format(str(png)) == 'png'
+
+    svc = OCRService(cache_dir=str(tmp_path / 'cache'), backend='cli')
+    with pytest.raises(OCRError):
+        svc.submit(str(doc))
+
+
+def test_cache_short_circuits_backend(tmp_path):
+    np = pytest.importorskip('numpy')
+    svc = OCRService(cache_dir=str(tmp_path / 'cache'), backend='cli')
+    img = np.zeros((8, 8), dtype=np.uint8)
+    req = svc._prepare(img, 'string', 6, None)
+    os.remove(req.path)  # temp PNG spilled for the CLI backend
+    svc._cache_put(req.key, 'cached text')
+
+    fresh = OCRService(cache_dir=str(tmp_path / 'cache'), backend='cli')
+    assert fresh.image_to_string(img) == 'cached text'  # served from disk, no worker started
+    assert fresh._dispatcher is None
+
+
+def test_crashed_batch_retries_unfinished_pages_and_caches_nothing_padded(tmp_path, monkeypatch):
+    import subprocess
+    from types import SimpleNamespace
+
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        with open(cmd[1], encoding='utf-8') as f:
+            paths = f.read().split()
+        calls.append(len(paths))
+        if len(paths) > 1:      # the batch dies after its first page
+            return SimpleNamespace(returncode=139, stdout=b'first\n\f', stderr=b'Segmentation fault')
+        if paths[0].endswith('bad.png'):
+            return SimpleNamespace(returncode=1, stdout=b'', stderr=b'cannot read')
+        return SimpleNamespace(returncode=0, stdout=b'alone\n\f', stderr=b'')
+
+    monkeypatch.setattr(subprocess, 'run', fake_run)
+    svc = OCRService(cache_dir=str(tmp_path / 'cache'), backend='cli')
+    reqs = []
+    for i, name in enumerate(('a.png', 'b.png', 'bad.png')):
+        (tmp_path / name).write_bytes(b'\x89PNG\r\n\x1a\n' + bytes([i]) * 16)
+        reqs.append(svc._prepare(str(tmp_path / name), 'string', 6, None))
+    svc._run_group(reqs)
+
+    assert calls == [3, 1, 1]
+    assert [r.future.result() for r in reqs[:2]] == ['first\n', 'alone\n']
+    with pytest.raises(OCRError):
+        reqs[2].future.result()
+    assert svc._cache_get(reqs[1].key) == 'alone\n' and svc._cache_get(reqs[2].key) is None
+
+
+def test_failed_start_releases_the_pool(tmp_path, monkeypatch):
+    import sys
+    from types import SimpleNamespace
+
+    def missing_lang(**kwargs):
+        raise RuntimeError('Failed to init API, possibly an invalid tessdata path')
+
+    monkeypatch.setitem(sys.modules, 'tesserocr', SimpleNamespace(PyTessBaseAPI=missing_lang))
+    svc = OCRService(cache_dir=str(tmp_path / 'cache'), backend='tesserocr')
+    with pytest.raises(RuntimeError):
+        svc._start()
+    assert svc._pool is None and svc._apis is None and svc._dispatcher is None
@@ -0,0 +1,37 @@
+import os
+
+from organize_jobs import OrganizeJob
+
+
+def test_checkpoint_replays_classifications_and_moves(tmp_path):
+    jobs_dir = str(tmp_path / 'jobs')
+    src = tmp_path / 'a.txt'
+    src.write_text('x')
+    st = os.stat(src)
+
+    job = OrganizeJob.create(str(tmp_path), str(tmp_path / 'out'), 'File Extension', jobs_dir=jobs_dir)
+    job.record_classification(str(src), st, 'TXT')
+    job.set_plan([(str(src), str(tmp_path / 'out' / 'TXT' / 'a.txt'), 'TXT'),
+                  (str(tmp_path / 'b.txt'), str(tmp_path / 'out' / 'TXT' / 'b.txt'), 'TXT')])
+    job.record_move(str(src), str(tmp_path / 'out' / 'TXT' / 'a.txt'))
+    job.close()
+
+    # a crash can leave a torn last journal line behind
+    with open(job.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"t": "m", "src"')
+
+    loaded = OrganizeJob.load(job.job_id, jobs_dir=jobs_dir)
+    assert loaded.status == 'moving'
+    assert loaded.cached_folder(str(src), st) == 'TXT'
+    assert [p[0] for p in loaded.remaining()] == [str(tmp_path / 'b.txt')]
+    assert loaded.summary()['done'] == 1
+
+
+def test_cached_folder_ignores_changed_files(tmp_path):
+    src = tmp_path / 'a.txt'
+    src.write_text('x')
+    job = OrganizeJob.create(str(tmp_path), str(tmp_path), 'AI', jobs_dir=str(tmp_path / 'jobs'))
+    job.record_classification(str(src), os.stat(src), 'Documents')
+
+    src.write_text('changed contents')
+    assert job.cached_folder(str(src), os.stat(src)) is None
@@ -0,0 +1,44 @@
+from app import RishFlowAPI
+
+
+def test_query_cache_and_snippet_offsets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / 'a.txt').write_text('filler ' * 40 + 'Quarterly INVOICE total\nnext line')
+    api = RishFlowAPI()
+    api.index_for_ai(str(docs), semantic=False)
+
+    first = api.query_ai(str(docs), 'invoice')['results']
+    start, length = first[0]['match']
+    assert first[0]['snippet'][start:start + length] == 'INVOICE'
+    assert api.query_ai(str(docs), 'INVOICE')['results'] == first    # served from the cache
+    assert len(api._query_cache) == 1
+
+    (docs / 'b.txt').write_text('another invoice')
+    assert len(api.query_ai(str(docs), 'invoice')['results']) == 1   # not indexed yet
+    api.index_for_ai(str(docs), semantic=False)                       # new generation
+    assert {r['name'] for r in api.query_ai(str(docs), 'invoice')['results']} == {'a.txt', 'b.txt'}
+
+
+def test_cancel_during_semantic_build_is_a_clean_cancel(tmp_path, monkeypatch):
+    from job_manager import JobCancelled
+    from semantic_index import SemanticIndex
+
+    monkeypatch.chdir(tmp_path)
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / 'a.txt').write_text('first invoice')
+    api = RishFlowAPI()
+    api.index_for_ai(str(docs), semantic=False)
+    assert len(api.query_ai(str(docs), 'invoice')['results']) == 1
+
+    def cancelled(self, docs, checkpoint=None):
+        raise JobCancelled('index')
+
+    monkeypatch.setattr(SemanticIndex, 'build', cancelled)
+    (docs / 'b.txt').write_text('second invoice')
+    result = api.index_for_ai(str(docs))
+    assert result['cancelled'] and 'error' not in result
+    assert not api.get_ai_index_status()['in_progress']
+    assert len(api.query_ai(str(docs), 'invoice')['results']) == 2     # cache follows the new index
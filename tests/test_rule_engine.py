@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from ai_sorter import AISmartSorter
+from rule_engine import RuleEngine, split_ext
+
+
+def test_builtin_types_and_ext_parsing():
+    rules = RuleEngine()
+    assert rules.file_types(['a.JPG', 'b.tar.gz', 'c.mp3', 'README', '.bashrc', 'x.unknown']) == \
+        ['image', 'archive', 'audio', 'other', 'other', 'other']
+    assert split_ext('..a') == os.path.splitext('..a')[1] == ''
+    assert rules.folder_for('clip.mkv') == 'Videos' and rules.folder_for('a.bin') == 'Other'
+
+
+def test_user_rules_first_match_and_conditions(tmp_path):
+    rules = RuleEngine([
+        {'name': 'INV-*.pdf', 'type': 'document', 'folder': 'Finance'},
+        {'regex': r'^IMG_\d+', 'type': 'image'},
+        {'ext': '.log', 'min_size': 10, 'type': 'log', 'folder': 'Logs'},
+    ])
+    assert rules.match('inv-042.PDF').folder == 'Finance'      # globs ignore case
+    assert rules.match('report.pdf').folder == 'Documents'     # falls through to built-ins
+    assert rules.file_type('IMG_0001') == 'image' and rules.file_type('x_IMG_1') == 'other'
+
+    small, big = tmp_path / 'a.log', tmp_path / 'b.log'
+    small.write_text('x')
+    big.write_text('x' * 100)
+    assert rules.file_type('a.log', str(small)) == 'other'
+    assert rules.file_type('b.log', str(big), os.stat(big)) == 'log'
+
+    with pytest.raises(ValueError):
+        rules.set_user_rules([{'regex': '(', 'type': 'x'}])
+    assert rules.match('inv-1.pdf').folder == 'Finance'        # previous rules kept
+
+
+def test_user_regexes_match_independently():
+    rules = RuleEngine([
+        {'regex': '(?i)^inv', 'type': 'document', 'folder': 'Invoices'},
+        {'regex': r'^(?P<y>\d{4})-(?P=y)', 'type': 'document', 'folder': 'Twice'},
+        {'regex': r'^(?P<y>\d{4})_', 'type': 'document', 'folder': 'Dated'},
+        {'regex': r'^(a)x\1$', 'type': 'other', 'folder': 'Backref'},
+    ])
+    assert rules.match('INV-7.txt').folder == 'Invoices'
+    assert rules.match('2020-2020.txt').folder == 'Twice'
+    assert rules.match('2021_report.txt').folder == 'Dated'
+    assert rules.match('axa').folder == 'Backref' and rules.file_types(['axa', 'axb']) == ['other', 'other']
+    assert rules.match('axb') is None
+    with pytest.raises(ValueError, match="Rule 1: bad regex '\\['"):
+        rules.set_user_rules([{'ext': '.x', 'type': 'x'}, {'regex': '[', 'type': 'x'}])
+
+
+def test_sorter_user_folder_skips_content_analysis(tmp_path):
+    photo = tmp_path / 'scan_001.jpg'
+    photo.write_bytes(b'not really a jpeg')
+    sorter = AISmartSorter(rules=RuleEngine([{'name': 'scan_*', 'folder': 'Scans'}]))
+    assert sorter.classify_file(photo) == 'Scans'
+    assert sorter.classify_files([photo]) == ['Scans']
@@ -0,0 +1,44 @@
+import random
+
+from semantic_index import SemanticIndex, chunk_text, fuse
+
+TOPICS = {
+    'finance': 'invoice payment tax receipt budget account bank balance credit amount due total',
+    'travel': 'flight hotel passport booking airport trip itinerary luggage beach vacation',
+    'medical': 'doctor patient prescription hospital blood test diagnosis clinic medicine',
+}
+
+
+def _corpus(n=90):
+    rng = random.Random(0)
+    docs = []
+    for i in range(n):
+        topic = list(TOPICS)[i % len(TOPICS)]
+        words = TOPICS[topic].split() + ['the', 'and', 'of']
+        docs.append((f'/docs/{topic}_{i}.txt', 1.0, ' '.join(rng.choice(words) for _ in range(rng.randint(40, 400)))))
+    return docs
+
+
+def test_semantic_search_ranks_by_topic(tmp_path):
+    docs = _corpus()
+    index = SemanticIndex(str(tmp_path / 'sem'))
+    stats = index.build(docs)
+    assert stats['documents'] == 90 and stats['chunks'] >= 90
+
+    reopened = SemanticIndex(str(tmp_path / 'sem'))
+    assert reopened.is_current(docs) and not reopened.is_current(docs[1:])
+    for query, topic in (('bank payment', 'finance'), ('airport hotel', 'travel'), ('clinic doctor', 'medical')):
+        hits = reopened.search(query, limit=5)
+        assert len(hits) == 5 and all(h['name'].startswith(topic) for h in hits), (query, hits)
+    assert reopened.search('zebra') == []      # no known words
+
+
+def test_chunking_and_fusion():
+    text = ' '.join(f'w{i}' for i in range(300))
+    spans = chunk_text(text, words=100, overlap=20)
+    assert len(spans) == 4 and spans[0][0] == 0 and spans[-1][1] == len(text)
+
+    keyword = [{'path': 'a', 'snippet': ''}, {'path': 'b', 'snippet': 'kw'}]
+    semantic = [{'path': 'c', 'snippet': 'sc'}, {'path': 'a', 'snippet': 'sa'}]
+    fused = fuse(keyword, semantic)
+    assert [r['path'] for r in fused] == ['a', 'c', 'b'] and fused[0]['snippet'] == 'sa'
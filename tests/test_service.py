@@ -0,0 +1,83 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from rishflow_service import create_server
+
+
+def _post(port, path, payload, token=None):
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=json.dumps(payload).encode(),
+                                 headers={'Content-Type': 'application/json'})
+    if token:
+        req.add_header('X-RishFlow-Token', token)
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return resp.read().decode()
+
+
+def test_rpc_batch_and_stream(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(5):
+        (src / f"f{i}.txt").write_text('x')
+
+    server = create_server(host='127.0.0.1', port=0, workers=2, token='secret')
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        out = json.loads(_post(port, '/rpc', [
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'scan_source', 'params': [str(src)]},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'nope'},
+            {'jsonrpc': '2.0', 'id': 3, 'method': 'get_folder_stats', 'params': {'bogus': 1}},
+        ], token='secret'))
+        by_id = {r['id']: r for r in out}
+        assert len(by_id[1]['result']['files']) == 5
+        assert by_id[2]['error']['code'] == -32601
+        assert by_id[3]['error']['code'] == -32602
+
+        lines = _post(port, '/stream', {'method': 'scan_source',
+                                        'params': {'folder_path': str(src), 'batch': 2}},
+                      token='secret').splitlines()
+        chunks = [json.loads(line) for line in lines]
+        assert [len(c['files']) for c in chunks[:-1]] == [2, 2, 1]
+        assert chunks[-1] == {'done': True, 'count': 5}
+
+        try:
+            _post(port, '/rpc', {'jsonrpc': '2.0', 'id': 1, 'method': 'list_jobs'})
+            assert False, 'expected 401 without token'
+        except urllib.error.HTTPError as e:
+            assert e.code == 401
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rejects_cross_site_requests_and_internal_methods(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = create_server(host='127.0.0.1', port=0, workers=2)
+    port, token = server.server_address[1], server.token
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def status(headers, method='list_jobs'):
+        body = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method}).encode()
+        req = urllib.request.Request(f"http://127.0.0.1:{port}/rpc", data=body, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                return resp.status, json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    try:
+        assert token and status({'Content-Type': 'application/json'})[0] == 401
+        ok = {'Content-Type': 'application/json', 'X-RishFlow-Token': token}
+        assert status(ok)[0] == 200
+        assert status({**ok, 'Content-Type': 'text/plain'})[0] == 415
+        assert status({**ok, 'Origin': 'https://evil.example'})[0] == 403
+        assert status({**ok, 'Host': 'evil.example:8765'})[0] == 403
+        assert status({**ok, 'Origin': f"http://localhost:{port}"})[0] == 200
+        assert status(ok, 'save_state')[1]['error']['code'] == -32601
+        assert 'init_database' not in server.methods and 'dedupe_files' in server.methods
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import threading
+
+from PIL import Image
+
+from thumbnail_service import ThumbnailService
+
+
+def test_thumbnails_are_content_keyed_bounded_and_async(tmp_path):
+    photo = tmp_path / 'photo.jpg'
+    Image.new('RGB', (1600, 1200), (200, 40, 40)).save(photo, quality=90)
+    thumbs = ThumbnailService(str(tmp_path / 'cache'), size=128)
+
+    name = thumbs.get(str(photo))
+    with Image.open(os.path.join(thumbs.cache_dir, name)) as im:
+        assert max(im.size) == 128 and im.size == (128, 96)
+    moved = tmp_path / 'Sorted' / 'renamed.jpg'
+    moved.parent.mkdir()
+    shutil.copy(photo, moved)
+    assert thumbs.cached(str(moved)) == name          # same content, same thumbnail
+    assert thumbs.get(str(tmp_path / 'notes.txt')) is None
+
+    pngs = []
+    for i in range(4):
+        pngs.append(str(tmp_path / f'p{i}.png'))
+        Image.new('RGB', (300, 300), (i * 60, 0, 0)).save(pngs[-1])
+    done = threading.Event()
+    got = {}
+
+    def on_ready(path, thumb):
+        got[path] = thumb
+        if len(got) == 4:
+            done.set()
+
+    ready, pending = thumbs.request(pngs + [str(moved)], on_ready=on_ready)
+    assert ready == {str(moved): name} and pending == 4
+    assert done.wait(10) and all(got.values())
+    thumbs.shutdown()
+
+    thumbs.max_bytes = 1
+    assert thumbs.evict() >= 4 and thumbs.stats()['bytes'] <= 1
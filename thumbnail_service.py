@@ -0,0 +1,224 @@
+"""
+RishFlow v2.0 - Thumbnail Service
+Small WebP (JPEG when Pillow lacks WebP) previews for the dashboard grid, so it never
+loads full-size originals.
+
+- JPEGs are decoded in draft mode: libjpeg scales by 1/2..1/8 while decoding, so a 24 MP
+  photo is decoded at ~1.5 MP instead of in full
+- the cache is content-keyed (size + first/last 64 KB of the file + thumbnail size), so
+  organizing or renaming a file does not invalidate its thumbnail
+- the cache directory is bounded (max_bytes); least recently used thumbnails go first
+- generation runs on a small background pool; request() returns what is already cached
+  and calls on_ready for the rest as they finish
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+THUMB_DIR = '.rishflow_thumbs'
+DEFAULT_SIZE = 256
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+SAMPLE_BYTES = 64 * 1024
+# what Pillow can decode without plugins; SVG/HEIC are left to the UI
+THUMB_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp'}
+
+
+def content_key(path, size, st=None):
+    """Key from the file's size and its first/last SAMPLE_BYTES (plus the thumbnail size)"""
+    st = st or os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{st.st_size}|{size}|".encode('ascii'))
+    with open(path, 'rb') as f:
+        h.update(f.read(SAMPLE_BYTES))
+        if st.st_size > 2 * SAMPLE_BYTES:
+            f.seek(-SAMPLE_BYTES, os.SEEK_END)
+            h.update(f.read(SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def open_reduced(path, size):
+    """PIL image decoded at (roughly) the smallest scale that still covers `size` pixels,
+    upright per its EXIF orientation"""
+    from PIL import Image, ImageOps
+    img = Image.open(path)
+    if img.format == 'JPEG':
+        img.draft('RGB', (size, size))      # DCT scaling during decode
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+    return img
+
+
+class ThumbnailService:
+    """Content-keyed, size-bounded thumbnail cache with a background generation pool"""
+
+    def __init__(self, cache_dir=THUMB_DIR, size=DEFAULT_SIZE, max_bytes=MAX_CACHE_BYTES, workers=2, fmt=None):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.fmt = fmt or self._detect_format()
+        self.ext = '.webp' if self.fmt == 'WEBP' else '.jpg'
+        self._keys = {}             # (path, mtime_ns, st_size, size) -> key
+        self._failed = set()        # keys that could not be decoded
+        self._pending = {}          # key -> Future
+        self._lock = threading.Lock()
+        self._pool = None
+        self._usage = None          # bytes in cache_dir, counted on first write
+
+    @staticmethod
+    def _detect_format():
+        try:
+            from PIL import features
+            return 'WEBP' if features.check('webp') else 'JPEG'
+        except Exception:
+            return 'JPEG'
+
+    # ---------- cache ----------
+    def key_for(self, path, size=None):
+        size = size or self.size
+        st = os.stat(path)
+        memo = (path, st.st_mtime_ns, st.st_size, size)
+        key = self._keys.get(memo)
+        if key is None:
+            key = self._keys[memo] = content_key(path, size, st)
+        return key
+
+    def name_for(self, key):
+        """Cache-relative file name of a thumbnail ('ab/abcdef....webp')"""
+        return f"{key[:2]}/{key}{self.ext}"
+
+    def file_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.ext)
+
+    def base_url(self):
+        return Path(os.path.abspath(self.cache_dir)).as_uri()
+
+    def cached(self, path, size=None):
+        """Cached thumbnail name for path, or None (never generates)"""
+        key = self.key_for(path, size)
+        f = self.file_for(key)
+        if os.path.exists(f):
+            try:
+                os.utime(f)             # recency for eviction
+            except OSError:
+                pass
+            return self.name_for(key)
+        return None
+
+    # ---------- generation ----------
+    def _generate(self, path, key, size):
+        target = self.file_for(key)
+        if os.path.exists(target):
+            return self.name_for(key)
+        try:
+            img = open_reduced(path, size)
+            img.thumbnail((size, size))
+            if self.fmt == 'JPEG' and img.mode != 'RGB':
+                img = img.convert('RGB')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp = f"{target}.{threading.get_ident()}.tmp"
+            img.save(tmp, self.fmt, quality=80)
+            os.replace(tmp, target)
+        except Exception as e:
+            print(f"[thumbs] {path}: {e}")
+            with self._lock:
+                self._failed.add(key)
+            return None
+        self._account(os.path.getsize(target))
+        return self.name_for(key)
+
+    def get(self, path, size=None):
+        """Thumbnail name for path, generating it in the calling thread if needed (None: not an image)"""
+        size = size or self.size
+        if os.path.splitext(path)[1].lower() not in THUMB_EXTS:
+            return None
+        key = self.key_for(path, size)
+        if key in self._failed:
+            return None
+        return self.cached(path, size) or self._generate(path, key, size)
+
+    def request(self, paths, size=None, on_ready=None):
+        """{path: name} for thumbnails already cached; the rest are generated in the background
+        and reported through on_ready(path, name_or_None). Returns (ready, pending_count)."""
+        size = size or self.size
+        ready, pending = {}, 0
+        for path in paths:
+            if os.path.splitext(path)[1].lower() not in THUMB_EXTS:
+                continue
+            try:
+                key = self.key_for(path, size)
+            except OSError:
+                continue
+            if key in self._failed:
+                continue
+            name = self.cached(path, size)
+            if name:
+                ready[path] = name
+                continue
+            pending += 1
+            with self._lock:
+                fut = self._pending.get(key)
+                if fut is None:
+                    if self._pool is None:
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='rishflow-thumbs')
+                    fut = self._pool.submit(self._generate, path, key, size)
+                    self._pending[key] = fut
+                    fut.add_done_callback(lambda _f, k=key: self._pending.pop(k, None))
+            if on_ready:
+                fut.add_done_callback(lambda f, p=path: on_ready(p, f.result()))
+        return ready, pending
+
+    # ---------- eviction ----------
+    def _scan(self):
+        entries = []
+        for dirpath, _, files in os.walk(self.cache_dir):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, full))
+        return entries
+
+    def _account(self, added):
+        with self._lock:
+            if self._usage is None:
+                self._usage = sum(size for _, size, _ in self._scan())
+            else:
+                self._usage += added
+            over = self._usage > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self, target_ratio=0.9):
+        """Drop least recently used thumbnails until the cache is under target_ratio * max_bytes"""
+        with self._lock:
+            entries = sorted(self._scan())
+            usage = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, full in entries:
+                if usage <= self.max_bytes * target_ratio:
+                    break
+                try:
+                    os.remove(full)
+                    usage -= size
+                    removed += 1
+                except OSError:
+                    pass
+            self._usage = usage
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {'cache_dir': os.path.abspath(self.cache_dir), 'bytes': self._usage, 'max_bytes': self.max_bytes,
+                    'pending': len(self._pending), 'format': self.fmt}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None